@@ -0,0 +1,287 @@
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+# Offline benchmark for the three Streamlit apps. Each app is driven headlessly
+# through streamlit.testing.v1.AppTest with a scripted, typical user session,
+# against replayed OpenAI and yfinance responses (see replay.py), and the
+# report lists rerun latency, external calls per session and peak memory.
+#
+#   python app_benchmark.py                        # replay, realistic latency
+#   python app_benchmark.py --latency-scale 0      # replay, no injected latency
+#   python app_benchmark.py --output run.json --baseline baseline.json
+#   python app_benchmark.py --record               # refresh fixtures from the real services
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK_TICKERS = ["AAPL", "GOOGL", "MSFT"]
+DEFAULT_SESSIONS = 3
+DEFAULT_TOLERANCE = 0.25  # Relative increase in p95 latency or calls that counts as a regression
+
+
+def _button(at, label):
+    return next(button for button in at.button if button.label == label)
+
+
+def _submit_answer(at):
+    index = at.session_state.current_question_index
+    at.radio(key=f"question_{index}").set_value(at.radio(key=f"question_{index}").options[0])
+    at.button(key=f"submit_{index}").click()
+
+
+def _skip_question(at):
+    at.button(key=f"skip_{at.session_state.current_question_index}").click()
+
+
+# Scripted sessions: (step label, action applied before the rerun); None is the initial page load
+SESSIONS = {
+    "disease_analysis.py": [
+        ("load", None),
+        ("enter symptoms", lambda at: at.text_area[0].input("fever, cough, headache")),
+        ("select disease", lambda at: at.selectbox[0].select("Influenza")),
+        ("fill risk form", lambda at: (at.number_input[0].set_value(45), at.text_area[1].input("smoking, little exercise"))),
+        ("assess risk", lambda at: _button(at, "Assess Risk").click()),
+        ("compare diseases", lambda at: at.text_area[2].input("Cold, Influenza, HIV")),
+    ],
+    "financial_analysis.py": [
+        ("load", None),
+        ("change chart type", lambda at: at.selectbox(key="chart_type_AAPL").select("Bar")),
+        ("add ticker", lambda at: at.sidebar.text_input[0].input("AAPL, GOOGL, MSFT")),
+        ("widen date range", lambda at: at.sidebar.date_input[0].set_value(date(2023, 6, 1))),
+        ("hide indicators", lambda at: at.sidebar.checkbox[1].uncheck()),
+        ("comparative performance", lambda at: _button(at, "Comparative Performance").click()),
+    ],
+    "quiz_generator.py": [
+        ("load", None),
+        ("enter topic", lambda at: at.text_input[0].input("space")),
+        ("generate 3 questions", lambda at: _button(at, "Generate 3 New Questions").click()),
+        ("submit answer", _submit_answer),
+        ("skip question", _skip_question),
+        ("submit answer", _submit_answer),
+        ("generate question", lambda at: _button(at, "Generate New Question").click()),
+        ("submit answer", _submit_answer),
+    ],
+}
+
+
+def percentile(values, q):
+    """
+    Nearest-rank percentile of values (q between 0 and 100).
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def configure_environment(workdir):
+    """
+    Point every on-disk cache at workdir. Must run before the app modules are imported.
+    """
+    os.environ["LLM_CACHE_PATH"] = os.path.join(workdir, "llm_responses.sqlite3")
+    os.environ["MARKET_DATA_DIR"] = os.path.join(workdir, "market_data")
+    os.environ["QUESTION_BANK_PATH"] = os.path.join(workdir, "question_bank.sqlite3")
+    os.environ["METRICS_PATH"] = os.path.join(workdir, "metrics.jsonl")
+    os.environ["DISEASE_SNAPSHOT_PATH"] = os.path.join(workdir, "disease_snapshot.json.gz")
+    os.environ["SYMPTOM_CACHE_PATH"] = os.path.join(workdir, "symptom_diagnoses.sqlite3")
+
+
+def install_services(workdir, fixture_dir, latency_scale=1.0, seed=0, record=False):
+    """
+    Route the apps' OpenAI and market-data traffic through replay (or recording) fixtures.
+    Returns (gateway, provider).
+    """
+    import llm_gateway
+    import market_data
+    import replay
+
+    llm_fixture_path = os.path.join(fixture_dir, replay.LLM_FIXTURE_FILE)
+    market_fixture_dir = os.path.join(fixture_dir, replay.MARKET_FIXTURE_DIR)
+    if record:
+        client = replay.RecordingClient(llm_gateway.create_client(), llm_fixture_path)
+        provider = replay.RecordingProvider(market_data.YFinanceProvider(), market_fixture_dir)
+    else:
+        client = replay.ReplayClient(llm_fixture_path, latency_scale=latency_scale, seed=seed)
+        # Recorded prices are copied next to synthetic ones for tickers that were never recorded
+        replay_dir = os.path.join(workdir, "market_fixtures")
+        if os.path.isdir(market_fixture_dir):
+            shutil.copytree(market_fixture_dir, replay_dir, dirs_exist_ok=True)
+        replay.synthetic_market_fixtures(replay_dir, BENCHMARK_TICKERS, seed=seed)
+        provider = replay.ReplayProvider(replay_dir, latency_scale=latency_scale, seed=seed)
+
+    llm_gateway._gateway = llm_gateway.LLMGateway(client)
+    # The financial app builds its store with the default provider
+    market_data.YFinanceProvider = lambda: provider
+    return llm_gateway._gateway, provider
+
+
+def _market_calls(provider):
+    return len(getattr(provider, "download_calls", ())) + len(getattr(provider, "info_calls", ()))
+
+
+def _wait_for_background_work(at, timeout=60):
+    # Quiz prefetching keeps calling the LLM after the rerun returns; count those calls in this session
+    deadline = time.monotonic() + timeout
+    try:
+        prefetcher = at.session_state["prefetcher"]
+    except KeyError:
+        return
+    while prefetcher.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def run_session(app, steps, gateway, provider, trace_memory=False, timeout=120):
+    """
+    Drive one scripted session of app. Returns per-rerun timings, external calls and peak traced memory.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    llm_calls = gateway.stats["requests"]
+    market_calls = _market_calls(provider)
+    if trace_memory:
+        tracemalloc.start()
+
+    at = AppTest.from_file(os.path.join(APP_DIR, app), default_timeout=timeout)
+    timings, errors = [], []
+    for label, action in steps:
+        try:
+            if action is not None:
+                action(at)
+            start = time.perf_counter()
+            at.run()
+            timings.append({"step": label, "seconds": time.perf_counter() - start})
+        except Exception as e:
+            errors.append(f"{label}: {e}")
+            continue
+        if at.exception:
+            errors.append(f"{label}: {at.exception[0].message}")
+    _wait_for_background_work(at)
+
+    peak_memory = None
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        "timings": timings,
+        "llm_calls": gateway.stats["requests"] - llm_calls,
+        "market_calls": _market_calls(provider) - market_calls,
+        "peak_memory": peak_memory,
+        "errors": errors,
+    }
+
+
+def benchmark_app(app, gateway, provider, sessions=DEFAULT_SESSIONS):
+    """
+    Run sessions timed sessions of app followed by one memory-traced session
+    (tracemalloc slows the interpreter down, so its timings are not reported).
+    """
+    results = [run_session(app, SESSIONS[app], gateway, provider) for _ in range(sessions)]
+    traced = run_session(app, SESSIONS[app], gateway, provider, trace_memory=True)
+    reruns = [timing["seconds"] for result in results for timing in result["timings"]]
+    return {
+        "sessions": sessions,
+        "reruns": len(reruns),
+        "cold_load_ms": results[0]["timings"][0]["seconds"] * 1000 if results and results[0]["timings"] else None,
+        "p50_ms": percentile(reruns, 50) * 1000 if reruns else None,
+        "p95_ms": percentile(reruns, 95) * 1000 if reruns else None,
+        "max_ms": max(reruns) * 1000 if reruns else None,
+        "llm_calls_per_session": sum(result["llm_calls"] for result in results) / sessions,
+        "market_calls_per_session": sum(result["market_calls"] for result in results) / sessions,
+        "first_session_llm_calls": results[0]["llm_calls"] if results else None,
+        "peak_memory_mb": traced["peak_memory"] / 2 ** 20,
+        "errors": [error for result in results + [traced] for error in result["errors"]],
+        "steps": {
+            timing["step"]: timing["seconds"] * 1000
+            for timing in results[-1]["timings"]
+        } if results else {},
+    }
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Return the metrics that regressed by more than tolerance relative to baseline.
+    """
+    regressions = []
+    for app, current in report["apps"].items():
+        previous = baseline.get("apps", {}).get(app)
+        if previous is None:
+            continue
+        for metric in ("p95_ms", "llm_calls_per_session", "market_calls_per_session", "peak_memory_mb"):
+            before, after = previous.get(metric), current.get(metric)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + tolerance) and after - before > 1e-9:
+                regressions.append(f"{app} {metric}: {before:.1f} -> {after:.1f}")
+    return regressions
+
+
+def print_report(report):
+    columns = ["cold_load_ms", "p50_ms", "p95_ms", "max_ms", "llm_calls_per_session", "market_calls_per_session", "peak_memory_mb"]
+    print(f"{'app':<24}" + "".join(f"{column:>26}" for column in columns))
+    for app, result in report["apps"].items():
+        cells = "".join(f"{result[column]:>26.1f}" if result[column] is not None else f"{'n/a':>26}" for column in columns)
+        print(f"{app:<24}{cells}")
+    print(f"Process peak RSS: {report['max_rss_mb']:.1f} MB, latency scale {report['latency_scale']}, "
+          f"{report['sessions']} sessions per app")
+    for app, result in report["apps"].items():
+        for error in result["errors"]:
+            print(f"  {app} error: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline rerun-latency benchmark for the Streamlit apps.")
+    parser.add_argument("--apps", nargs="+", default=list(SESSIONS), choices=list(SESSIONS))
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS, help="Timed sessions per app")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplier for injected latency (0 disables it)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", default=None, help="Fixture directory (default: benchmark_fixtures/)")
+    parser.add_argument("--record", action="store_true", help="Call the real services and record fixtures")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="app_benchmark_")
+    configure_environment(workdir)
+    sys.path.insert(0, APP_DIR)
+    import replay
+
+    fixture_dir = args.fixtures or replay.DEFAULT_FIXTURE_DIR
+    gateway, provider = install_services(workdir, fixture_dir, args.latency_scale, args.seed, record=args.record)
+    try:
+        report = {
+            "sessions": args.sessions,
+            "latency_scale": args.latency_scale,
+            "apps": {app: benchmark_app(app, gateway, provider, args.sessions) for app in args.apps},
+        }
+    finally:
+        if args.record:
+            gateway.client.save()
+        shutil.rmtree(workdir, ignore_errors=True)
+    # ru_maxrss is reported in kilobytes on Linux
+    report["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline.get("latency_scale"), baseline.get("sessions")) != (report["latency_scale"], report["sessions"]):
+            print("Warning: the baseline was run with a different --latency-scale or --sessions")
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+
+# Runs disease reports and stock analyses in bulk without the Streamlit UI.
+# Jobs run on a bounded worker pool; the shared LLM gateway's rate limiter is
+# what paces them. Every finished job is written to the output before it is
+# recorded in a checkpoint file, so an interrupted run resumes where it stopped:
+#   python batch_runner.py diseases diseases.txt -o reports.jsonl
+#   python batch_runner.py stocks portfolios.txt --start 2024-01-01 -o stocks.parquet
+DEFAULT_WORKERS = 16
+PARQUET_ROWS_PER_FILE = 500
+PROGRESS_INTERVAL = 5  # Seconds between progress lines
+
+
+def read_lines(path):
+    """
+    Non-empty lines of a job file; lines starting with "#" are comments.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+
+
+class Checkpoint:
+    """
+    Append-only file of completed job ids. Ids are added only after their results are on disk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+
+    def mark(self, job_ids):
+        if not job_ids:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for job_id in job_ids:
+                f.write(f"{job_id}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(job_ids)
+
+
+class JsonlSink:
+    """
+    Appends one JSON record per line, flushed as soon as it is written.
+    write() and close() return the job ids whose records are now on disk.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return [record["job_id"]]
+
+    def close(self):
+        self._file.close()
+        return []
+
+
+class ParquetSink:
+    """
+    Writes records as numbered Parquet part files in a directory (readable with
+    pandas.read_parquet(directory)). The result is stored as a JSON string column.
+    """
+
+    def __init__(self, directory, rows_per_file=PARQUET_ROWS_PER_FILE):
+        self.directory = directory
+        self.rows_per_file = rows_per_file
+        self._rows = []
+        os.makedirs(directory, exist_ok=True)
+        self._part = len([name for name in os.listdir(directory) if name.endswith(".parquet")])
+
+    def write(self, record):
+        self._rows.append(dict(record, result=json.dumps(record["result"], default=str)))
+        if len(self._rows) >= self.rows_per_file:
+            return self._flush()
+        return []
+
+    def _flush(self):
+        import pandas as pd
+
+        if not self._rows:
+            return []
+        path = os.path.join(self.directory, f"part-{self._part:05d}.parquet")
+        temporary_path = f"{path}.tmp"
+        pd.DataFrame(self._rows).to_parquet(temporary_path, index=False)
+        os.replace(temporary_path, path)
+        self._part += 1
+        job_ids = [row["job_id"] for row in self._rows]
+        self._rows = []
+        return job_ids
+
+    def close(self):
+        return self._flush()
+
+
+def open_sink(path, output_format=None):
+    output_format = output_format or ("parquet" if path.endswith(".parquet") else "jsonl")
+    return ParquetSink(path) if output_format == "parquet" else JsonlSink(path)
+
+
+def run_batch(jobs, func, sink, checkpoint, workers=DEFAULT_WORKERS, log=sys.stderr):
+    """
+    Run func(payload) for every (job_id, payload) not yet in the checkpoint, keeping at most
+    2 * workers jobs queued. Failed jobs are written with their error but not checkpointed,
+    so a rerun retries them. Returns a summary dictionary.
+    """
+    pending = [(job_id, payload) for job_id, payload in jobs if job_id not in checkpoint.done]
+    summary = {"jobs": len(jobs), "skipped": len(jobs) - len(pending), "succeeded": 0, "failed": 0}
+    started = last_report = time.perf_counter()
+    remaining = iter(pending)
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    in_flight = {}
+    failed = set()
+
+    def commit(job_ids):
+        checkpoint.mark([job_id for job_id in job_ids if job_id not in failed])
+
+    def submit_next():
+        for job_id, payload in remaining:
+            in_flight[executor.submit(_run_job, func, payload)] = job_id
+            return True
+        return False
+
+    try:
+        while len(in_flight) < 2 * max(1, workers) and submit_next():
+            pass
+        while in_flight:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                job_id = in_flight.pop(future)
+                result, error, seconds = future.result()
+                record = {"job_id": job_id, "status": "ok" if error is None else "error",
+                          "result": result, "error": error, "seconds": round(seconds, 3)}
+                summary["succeeded" if error is None else "failed"] += 1
+                if error is not None:
+                    failed.add(job_id)
+                commit(sink.write(record))
+                submit_next()
+
+            now = time.perf_counter()
+            if log is not None and now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                finished = summary["succeeded"] + summary["failed"]
+                print(f"{finished}/{len(pending)} jobs, {finished / (now - started) * 60:.0f}/min, "
+                      f"{summary['failed']} failed", file=log)
+    finally:
+        # On interruption, queued jobs are dropped; buffered results are still written and checkpointed
+        executor.shutdown(wait=False, cancel_futures=True)
+        commit(sink.close())
+
+    elapsed = time.perf_counter() - started
+    summary["seconds"] = round(elapsed, 2)
+    summary["jobs_per_minute"] = round((summary["succeeded"] + summary["failed"]) / elapsed * 60, 1) if elapsed else 0.0
+    return summary
+
+
+def _run_job(func, payload):
+    started = time.perf_counter()
+    try:
+        return func(payload), None, time.perf_counter() - started
+    except Exception as e:
+        return None, repr(e), time.perf_counter() - started
+
+
+def disease_jobs(names, name_index=None):
+    """
+    One job per distinct canonical disease name.
+    """
+    jobs = {}
+    for name in names:
+        canonical = name_index.resolve(name) if name_index is not None else name
+        if canonical:
+            jobs.setdefault(canonical, canonical)
+    return list(jobs.items())
+
+
+def stock_jobs(lines, start_date, end_date):
+    """
+    One job per line of comma-separated tickers, identified by the tickers and the date range.
+    """
+    jobs = {}
+    for line in lines:
+        tickers = list(dict.fromkeys(ticker.strip().upper() for ticker in line.split(",") if ticker.strip()))
+        if tickers:
+            jobs.setdefault(f"{','.join(tickers)}@{start_date}..{end_date}", tickers)
+    return list(jobs.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run disease reports or stock analyses in bulk without the Streamlit UI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    diseases_parser = subparsers.add_parser("diseases", help="One disease name per line")
+    stocks_parser = subparsers.add_parser("stocks", help="One comma-separated list of tickers per line")
+    stocks_parser.add_argument("--start", default=str(date.today() - timedelta(days=365)), help="Start date (YYYY-MM-DD)")
+    stocks_parser.add_argument("--end", default=str(date.today()), help="End date (YYYY-MM-DD)")
+    stocks_parser.add_argument("--sentiment-text", help="Text whose sentiment is analyzed for each ticker")
+    stocks_parser.add_argument("--no-comparison", action="store_true", help="Skip the LLM comparison of each list")
+    for subparser in (diseases_parser, stocks_parser):
+        subparser.add_argument("input", help="Job file")
+        subparser.add_argument("-o", "--output", required=True, help="Output .jsonl file or .parquet directory")
+        subparser.add_argument("--format", choices=["jsonl", "parquet"], help="Default: from the output name")
+        subparser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+        subparser.add_argument("--checkpoint", help="Default: OUTPUT.checkpoint")
+    args = parser.parse_args(argv)
+
+    lines = read_lines(args.input)
+    if args.command == "diseases":
+        from disease_core import disease_report
+        from disease_names import DiseaseNameIndex
+        from disease_snapshot import DISEASE_CATALOG, DiseaseSnapshot
+
+        snapshot = DiseaseSnapshot()
+        jobs = disease_jobs(lines, DiseaseNameIndex(extra_names=DISEASE_CATALOG))
+        func = lambda name: disease_report(name, snapshot=snapshot)
+    else:
+        from finance_core import stock_report
+        from market_data import MarketDataStore
+
+        store = MarketDataStore()
+        jobs = stock_jobs(lines, args.start, args.end)
+        # Fill the price store for every ticker in one batched download before the workers start
+        store.get_prices(sorted({ticker for _, tickers in jobs for ticker in tickers}), args.start, args.end)
+        func = lambda tickers: stock_report(tickers, args.start, args.end, store, sentiment_text=args.sentiment_text,
+                                            comparison=not args.no_comparison)
+
+    checkpoint = Checkpoint(args.checkpoint or f"{args.output.rstrip(os.sep)}.checkpoint")
+    sink = open_sink(args.output, args.format)
+    try:
+        summary = run_batch(jobs, func, sink, checkpoint, workers=args.workers)
+    except KeyboardInterrupt:
+        print(f"Interrupted; {len(checkpoint.done)} jobs are checkpointed. Rerun the same command to resume.", file=sys.stderr)
+        return 130
+    print(json.dumps(summary))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
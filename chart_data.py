@@ -0,0 +1,204 @@
+import math
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Chart-data preparation for the price charts: long series are reduced to about
+# the number of points a chart can show (one per horizontal pixel) before they
+# are sent to the browser, with shape-preserving algorithms so spikes and
+# trends survive. Largest-Triangle-Three-Buckets (LTTB) is used for lines and
+# min/max bucketing for bars.
+#   python chart_data.py   # payload size and server render time before and after
+DEFAULT_MAX_POINTS = 700  # About one point per pixel of a chart in Streamlit's default (centered) layout
+TABLE_PAGE_SIZE = 100
+VOLUME_PERIODS = {"Daily": None, "Weekly": "W", "Monthly": "M"}
+
+
+def _x_values(index):
+    # LTTB needs numeric x values: seconds for a DatetimeIndex, positions otherwise
+    if isinstance(index, pd.DatetimeIndex):
+        return (index.asi8 - index.asi8[0]) / 1e9
+    return np.arange(len(index), dtype=float)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Positions of the threshold points chosen by Largest-Triangle-Three-Buckets. The first and
+    last points are always kept; every bucket in between keeps the point forming the largest
+    triangle with the previously kept point and the average of the next bucket.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # Bucket edges; bucket b spans [edges[b], edges[b + 1]) and the last "bucket" is the final point
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    bounds = np.append(edges, n)
+    average_x = np.add.reduceat(x, bounds[:-1]) / np.diff(bounds)
+    average_y = np.add.reduceat(y, bounds[:-1]) / np.diff(bounds)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        areas = np.abs((x[previous] - average_x[bucket + 1]) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (average_y[bucket + 1] - y[previous]))
+        previous = start + int(areas.argmax())
+        indices[bucket + 1] = previous
+    return indices
+
+
+def minmax_indices(y, buckets):
+    """
+    Positions of the minimum and maximum of each of `buckets` equal-width buckets, in order.
+    """
+    n = len(y)
+    if buckets * 2 >= n or buckets < 1:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    indices = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            segment = y[start:end]
+            indices += [start + int(np.argmin(segment)), start + int(np.argmax(segment))]
+    return np.unique(indices)
+
+
+def downsample(data, max_points=DEFAULT_MAX_POINTS, method="lttb"):
+    """
+    Reduce a Series or a DataFrame (one line per column) to at most about max_points rows.
+    Rows are selected per column (LTTB or min/max, ignoring missing values) and the union
+    is kept, so every line is drawn through its own shape-defining points.
+    """
+    if max_points is None or len(data) <= max_points:
+        return data
+    frame = data.to_frame() if isinstance(data, pd.Series) else data
+    per_column = max(3, max_points // max(1, frame.shape[1]))
+    x = _x_values(frame.index)
+    keep = [np.array([0, len(frame) - 1])]
+    for column in frame.columns:
+        values = frame[column].to_numpy(dtype=float)
+        valid = np.flatnonzero(np.isfinite(values))
+        if len(valid) == 0:
+            continue
+        if method == "minmax":
+            chosen = minmax_indices(values[valid], per_column // 2)
+        else:
+            chosen = lttb_indices(x[valid], values[valid], per_column)
+        keep.append(valid[chosen])
+    return data.iloc[np.unique(np.concatenate(keep))]
+
+
+def aggregate_volume(volume, period):
+    """
+    Total volume per week or month ("Weekly"/"Monthly"), labelled with the start of each period;
+    "Daily" returns the series unchanged.
+    """
+    rule = VOLUME_PERIODS[period]
+    if rule is None or volume.empty:
+        return volume
+    # Grouping by period is much faster than resample() on a business-day index
+    index = volume.index.tz_localize(None) if volume.index.tz is not None else volume.index
+    totals = volume.groupby(index.to_period(rule)).sum()
+    totals.index = totals.index.to_timestamp()
+    return totals
+
+
+def page_count(rows, page_size=TABLE_PAGE_SIZE):
+    return max(1, math.ceil(rows / page_size))
+
+
+def paginate(frame, page, page_size=TABLE_PAGE_SIZE):
+    """
+    Rows of the 1-based page of frame.
+    """
+    page = min(max(1, page), page_count(len(frame), page_size))
+    return frame.iloc[(page - 1) * page_size:page * page_size]
+
+
+# Benchmark: renders each chart through Streamlit's testing runtime, once with the full
+# data and once prepared, and reports the serialized element size and server time
+_BENCHMARK_SCRIPT = """
+import time
+import pandas as pd
+import streamlit as st
+import chart_data
+
+frame = pd.read_pickle(st.session_state.path)
+prepare = st.session_state.prepare
+close = frame["Close"]
+lines = pd.DataFrame({"Close": close, "SMA": close.rolling(20).mean(), "EMA": close.ewm(span=20).mean()})
+timings = {}
+
+def timed(name, draw):
+    start = time.perf_counter()
+    draw()
+    timings[name] = time.perf_counter() - start
+
+if prepare:
+    timed("price chart", lambda: st.line_chart(chart_data.downsample(close)))
+    timed("SMA/EMA chart", lambda: st.line_chart(chart_data.downsample(lines)))
+    timed("volume bars", lambda: st.bar_chart(chart_data.downsample(chart_data.aggregate_volume(frame["Volume"], "Weekly"), method="minmax")))
+    timed("raw table", lambda: st.dataframe(chart_data.paginate(frame, 1)))
+else:
+    timed("price chart", lambda: st.line_chart(close))
+    timed("SMA/EMA chart", lambda: st.line_chart(lines))
+    timed("volume bars", lambda: st.bar_chart(frame["Volume"]))
+    timed("raw table", lambda: st.dataframe(frame))
+st.session_state.timings = timings
+"""
+
+
+def _render(path, prepare):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string(_BENCHMARK_SCRIPT, default_timeout=120)
+    at.session_state.path = path
+    at.session_state.prepare = prepare
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    sizes = [element.proto.ByteSize() for element in at.main.children.values()]
+    return dict(zip(at.session_state.timings, zip(sizes, at.session_state.timings.values())))
+
+
+def benchmark(row_counts=(1260, 5040, 25000, 50000), repeat=3):
+    """
+    Payload bytes and server render time per chart for price histories of row_counts rows
+    (5 and 20 years of daily bars, and minute bars).
+    """
+    from indicators import synthetic_prices
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in row_counts:
+            frame = next(iter(synthetic_prices(1, rows).values()))
+            if rows > 10000:
+                frame.index = pd.date_range("2024-01-02 09:30", periods=rows, freq="min")
+            path = os.path.join(directory, f"prices-{rows}.pkl")
+            frame.to_pickle(path)
+            before = [_render(path, prepare=False) for _ in range(repeat)]
+            after = [_render(path, prepare=True) for _ in range(repeat)]
+            for chart in before[0]:
+                results.append({
+                    "rows": rows,
+                    "chart": chart,
+                    "bytes_before": before[0][chart][0],
+                    "bytes_after": after[0][chart][0],
+                    "seconds_before": min(run[chart][1] for run in before),
+                    "seconds_after": min(run[chart][1] for run in after),
+                })
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'rows':>7} {'chart':<14} {'payload before':>15} {'after':>10} {'render before':>14} {'after':>10}")
+    # python chart_data.py [rows ...]
+    row_counts = [int(arg) for arg in sys.argv[1:]] or (1260, 5040, 25000, 50000)
+    for row in benchmark(row_counts):
+        print(f"{row['rows']:>7} {row['chart']:<14} {row['bytes_before'] / 1024:>12.1f} KB {row['bytes_after'] / 1024:>7.1f} KB "
+              f"{row['seconds_before'] * 1000:>11.1f} ms {row['seconds_after'] * 1000:>7.1f} ms")
@@ -1,51 +1,85 @@
 import streamlit as st
-from openai import OpenAI
-import json
-import pandas as pd
+from llm_gateway import get_gateway
+from response_parsing import DISEASE_SCHEMA, normalize_disease_info, parse_structured, parse_stats
+from fanout import fan_out
+import pipeline
+from instrumentation import timed
+from disease_core import fetch_diagnosis, fetch_disease_info, fetch_health_tips, fetch_risk_assessment
+from disease_snapshot import DISEASE_CATALOG, DiseaseSnapshot
+from disease_names import DiseaseNameIndex
+from symptom_cache import SymptomCache, parse_symptoms
 
-# Replace "your_api_key_here" with your actual OpenAI API key
-client = OpenAI(api_key="your_api_key_here")
+# Rate-limited, retrying client shared by all apps and sessions; set OPENAI_API_KEY in the environment
+# (or replace "your_api_key_here" in llm_gateway.py with your actual OpenAI API key)
+client = get_gateway()
 
-# Caching the function to prevent repeated API calls for the same input
-@st.cache_data
+# Concurrency limit and per-request timeout (in seconds) for the Disease Comparison Tool
+COMPARISON_MAX_WORKERS = 8
+COMPARISON_TIMEOUT = 60
+
+# Precomputed info and tips for the catalog diseases, loaded once per process and refreshed in the background
+@st.cache_resource
+def get_disease_snapshot():
+    snapshot = DiseaseSnapshot()
+    snapshot.start_background_refresh(DISEASE_CATALOG)
+    return snapshot
+
+# Diagnoses shared across sessions and processes, keyed by the canonical set of symptoms
+@st.cache_resource
+def get_symptom_cache():
+    return SymptomCache()
+
+# Free-text disease names are mapped to canonical names before any cache or LLM lookup
+@st.cache_resource
+def get_disease_name_index():
+    return DiseaseNameIndex(extra_names=DISEASE_CATALOG)
+
+# Catalog diseases are answered from the snapshot; anything else is cached per input
+@timed()
 def get_disease_info(disease_name):
     """
     Function to query OpenAI and return structured information about a disease.
     """
-    medication_format = '''"name":""
-    "side_effects":[
-    0:""
-    1:""
-    ...
-    ]
-    "dosage":""'''
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": f"Please provide information on the following aspects for {disease_name}: 1. Key Statistics, 2. Recovery Options, 3. Recommended Medications. Format the response in JSON with keys for 'name', 'statistics', 'total_cases' (this always has to be a number), 'recovery_rate' (this always has to be a percentage), 'mortality_rate' (this always has to be a percentage) 'recovery_options', (explain each recovery option in detail), and 'medication', (give some side effect examples and dosages) always use this json format for medication : {medication_format} ."}
-        ]
-    )
-    return response.choices[0].message.content
+    snapshot_info = get_disease_snapshot().info(disease_name)
+    if snapshot_info is not None:
+        return snapshot_info
+    return cached_disease_info(disease_name)
+
+# Caching the function to prevent repeated API calls for the same input
+@st.cache_data
+def cached_disease_info(disease_name):
+    return fetch_disease_info(disease_name)
 
 def display_disease_info(disease_info):
     """
     Function to display the disease information in a structured way using Streamlit.
     """
-    try:
-        info = json.loads(disease_info)
+    info, missing_fields, _ = parse_structured(disease_info, DISEASE_SCHEMA, normalize_disease_info)
+    if info is None:
+        st.error("Failed to decode the response into JSON. Please check the format of the OpenAI response.")
+        st.write("### Raw Response:")
+        st.write(disease_info)  # Print the raw response for debugging purposes
+        return
+
+    statistics = info['statistics']
+    st.write(f"## Statistics for {info.get('name', 'Unknown disease')}")
 
-        st.write(f"## Statistics for {info['name']}")
+    col1, col2 = st.columns(2)
 
-        col1, col2 = st.columns(2)
+    # Numbers and percentages have already been coerced to floats, or are missing
+    total_cases = statistics.get('total_cases')
+    recovery_rate = statistics.get('recovery_rate')
+    mortality_rate = statistics.get('mortality_rate')
 
-        with col1:
-            st.metric(label="Total Cases", value=info['statistics']['total_cases'])
-            st.metric(label="Recovery Rate", value=info['statistics']['recovery_rate'])
-            st.metric(label="Mortality Rate", value=info['statistics']['mortality_rate'])
+    with col1:
+        st.metric(label="Total Cases", value=f"{total_cases:,.0f}" if isinstance(total_cases, float) else "N/A")
+        st.metric(label="Recovery Rate", value=f"{recovery_rate:g}%" if isinstance(recovery_rate, float) else "N/A")
+        st.metric(label="Mortality Rate", value=f"{mortality_rate:g}%" if isinstance(mortality_rate, float) else "N/A")
 
-        with col2:
-            recovery_rate = float(info['statistics']["recovery_rate"].strip('%'))
-            mortality_rate = float(info['statistics']["mortality_rate"].strip('%'))
+    with col2:
+        if isinstance(recovery_rate, float) and isinstance(mortality_rate, float):
+            # pandas is only imported once a chart is drawn, so the page starts rendering without it
+            import pandas as pd
 
             chart_data = pd.DataFrame(
                 {
@@ -56,111 +90,175 @@ def display_disease_info(disease_info):
             )
             st.bar_chart(chart_data)
 
-        st.write("## Recovery Options")
-        recovery_options = info['recovery_options']
+    st.write("## Recovery Options")
+    recovery_options = info.get('recovery_options')
+    if isinstance(recovery_options, dict):
         for option, description in recovery_options.items():
             st.subheader(option)
             st.write(description)
 
-        st.write("## Medication")
-        medication = info['medication']
+    st.write("## Medication")
+    medication = info.get('medication')
+    if isinstance(medication, dict):
         medication_count = 1
         for option, description in medication.items():
             st.subheader(f"{medication_count}. {option}")
             st.write(description)
             medication_count += 1
 
+    if missing_fields:
+        st.warning(f"The response did not include: {', '.join(missing_fields)}.")
 
-    except json.JSONDecodeError:
-        st.error("Failed to decode the response into JSON. Please check the format of the OpenAI response.")
-        st.write("### Raw Response:")
-        st.write(disease_info)  # Print the raw response for debugging purposes
-
-def get_diagnosis(symptoms):
+@timed()
+def get_diagnosis(symptoms, stream=False):
     """
     Function to query OpenAI for possible diagnoses based on symptoms.
+    With stream=True, returns an iterator of text chunks for st.write_stream.
     """
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": f"Based on the following symptoms: {symptoms}, suggest possible diagnoses. Provide a list of potential diseases with a brief description for each."}
-        ]
-    )
-    return response.choices[0].message.content
-
-def get_health_tips(disease_name):
+    return fetch_diagnosis(symptoms, stream=stream, client=client)
+
+@timed()
+def get_health_tips(disease_name, stream=False):
     """
     Function to query OpenAI for health tips and preventative measures for a disease.
+    With stream=True, returns an iterator of text chunks for st.write_stream.
     """
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": f"Provide health tips and preventative measures for managing or preventing {disease_name}."}
-        ]
-    )
-    return response.choices[0].message.content
-
-def get_risk_assessment(age, gender, habits, disease_name):
+    snapshot_tips = get_disease_snapshot().tips(disease_name)
+    if snapshot_tips is not None:
+        return iter([snapshot_tips]) if stream else snapshot_tips
+    return fetch_health_tips(disease_name, stream=stream, client=client)
+
+@timed()
+def get_risk_assessment(age, gender, habits, disease_name, stream=False):
     """
     Function to query OpenAI for a risk assessment based on personal data.
+    With stream=True, returns an iterator of text chunks for st.write_stream.
     """
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system",
-             "content": f"Based on the following data: age {age}, gender {gender}, habits {habits}, assess the risk for {disease_name} and provide a brief explanation."}
-        ]
-    )
-    return response.choices[0].message.content
+    return fetch_risk_assessment(age, gender, habits, disease_name, stream=stream, client=client)
 
 # Streamlit App Layout
+pipeline.begin_run()
+
 st.title("Disease Information Dashboard")
 
 # Symptom-based Diagnosis Suggestions
 st.write("## Symptom-based Diagnosis Suggestions")
 symptoms = st.text_area("Enter your symptoms:")
 if symptoms:
-    diagnosis_info = get_diagnosis(symptoms)
     st.write("### Possible Diagnoses")
-    st.write(diagnosis_info)
+    # Answers are cached per canonical symptom set ("Cough and fever" == "fever, cough"), and an
+    # earlier diagnosis for a nearly identical set of symptoms is reused without an LLM call.
+    # The terms are only the cache key: the LLM gets the text as typed, with durations and negations
+    symptom_terms = parse_symptoms(symptoms) or (symptoms.strip(),)
+    with pipeline.stage("diagnosis"):
+        match = get_symptom_cache().lookup(symptom_terms)
+        if match is not None:
+            if match.similarity < 1:
+                st.caption(f"Based on an earlier diagnosis for: {', '.join(match.terms)} ({match.similarity:.0%} similar)")
+            diagnosis_info = match.diagnosis
+            st.write(diagnosis_info)
+        else:
+            diagnosis_info = st.write_stream(get_diagnosis(symptoms, stream=True))
+            get_symptom_cache().store(symptom_terms, diagnosis_info)
 
 # Adding a selectbox for common diseases for user convenience
 st.write("## Disease Information")
-common_diseases = ["Cold", "Hypertension", "HIV", "AIDS", "COVID-19", "Influenza", "Cancer"]
-disease_name = st.text_input("Enter the name of the disease:", value="").capitalize()
+common_diseases = DISEASE_CATALOG
+disease_input = st.text_input("Enter the name of the disease:", value="")
+disease_name = get_disease_name_index().resolve(disease_input)
 disease_name = st.selectbox("Or select a common disease:", common_diseases) if disease_name == "" else disease_name
+if disease_input.strip() and disease_name.casefold() != " ".join(disease_input.split()).casefold():
+    st.caption(f"Showing results for {disease_name}")
+elif disease_input.strip():
+    suggestion = get_disease_name_index().suggest(disease_input)
+    if suggestion is not None:
+        st.caption(f"Did you mean {suggestion}? Enter it to see its results.")
 
 # Disease Information Display
 if disease_name:
-    disease_info = get_disease_info(disease_name)
-    display_disease_info(disease_info)
+    with pipeline.stage("disease information"):
+        disease_info = get_disease_info(disease_name)
+        display_disease_info(disease_info)
 
     # Health tips and Preventative Measures
     st.write("### Health Tips and Preventative Measures")
-    tips = get_health_tips(disease_name)
-    st.write(tips)
+    with pipeline.stage("health tips"):
+        pipeline.write_stream_cached(("health tips", disease_name), lambda: get_health_tips(disease_name, stream=True))
+
+
+# Risk Factor Assessment; its inputs only rerun this fragment, not the rest of the page
+@st.fragment
+def risk_assessment(disease_name):
+    pipeline.fragment_run("risk assessment")
+    st.write("## Risk Factor Assessment")
+    age = st.number_input("Enter your age:", min_value=0)
+    gender = st.selectbox("Select your gender:", ["Male", "Female", "Other"])
+    habits = st.text_area("Describe your lifestyle habits (e.g. smoking, exercise, diet):")
+
+    if st.button("Assess Risk"):
+        st.write("### Risk Assessment")
+        with pipeline.stage("risk assessment"):
+            st.write_stream(get_risk_assessment(age, gender, habits, disease_name, stream=True))
 
-# Risk Factor Assessment
-st.write("## Risk Factor Assessment")
-age = st.number_input("Enter your age:", min_value=0)
-gender = st.selectbox("Select your gender:", ["Male", "Female", "Other"])
-habits = st.text_area("Describe your lifestyle habits (e.g. smoking, exercise, diet):")
 
-if st.button("Assess Risk"):
-    risk_info = get_risk_assessment(age, gender, habits, disease_name)
-    st.write("### Risk Assessment")
-    st.write(risk_info)
+risk_assessment(disease_name)
+
 
 # Disease Comparison Tool
-st.write("## Disease Comparison Tool")
-diseases_input = st.text_area("Enter the names of diseases to compare (separate each disease with a comma):")
-if diseases_input:
-    # Split input by comma and process each disease
-    diseases_list = [disease.strip().capitalize() for disease in diseases_input.split(',')]
+def compare_diseases(diseases_input):
+    """
+    Fetch and display information for each comma-separated disease concurrently.
+    """
+    # Split input by comma and map each disease to its canonical name, so spelling variants are fetched once
+    name_index = get_disease_name_index()
+    diseases_list = [name_index.resolve(disease) for disease in diseases_input.split(',')]
+    # Reserve a container per disease so results can be rendered in input order as they arrive
+    containers = {}
     for disease in diseases_list:
         if disease:  # Ensure that the disease name is not empty
-            st.write(f"### Information for {disease}")
-            comparison_info = get_disease_info(disease)
-            display_disease_info(comparison_info)
+            if disease not in containers:
+                containers[disease] = st.container()
+                with containers[disease]:
+                    st.write(f"### Information for {disease}")
         else:
             st.error("One or more disease names were not valid.")
+
+    # Fetch all diseases concurrently (catalog diseases come from the snapshot) and display each one as soon as its response arrives
+    snapshot = get_disease_snapshot()
+    def fetch(disease):
+        return snapshot.info(disease) or fetch_disease_info(disease)
+    with st.spinner("Fetching disease information..."):
+        for disease, comparison_info, error in fan_out(fetch, containers, max_workers=COMPARISON_MAX_WORKERS, timeout=COMPARISON_TIMEOUT):
+            with containers[disease]:
+                if error is not None:
+                    st.error(f"Failed to fetch information for {disease}: {error}")
+                else:
+                    display_disease_info(comparison_info)
+
+
+@st.fragment
+def disease_comparison():
+    pipeline.fragment_run("disease comparison")
+    st.write("## Disease Comparison Tool")
+    diseases_input = st.text_area("Enter the names of diseases to compare (separate each disease with a comma):")
+    if diseases_input:
+        with pipeline.stage("disease comparison"):
+            compare_diseases(diseases_input)
+
+
+disease_comparison()
+
+# Share of structured responses that were usable, and how many needed local repair or a re-ask
+with st.sidebar.expander("Response parsing statistics"):
+    st.write(parse_stats.summary())
+
+with st.sidebar.expander("Disease snapshot"):
+    st.write(get_disease_snapshot().stats())
+
+with st.sidebar.expander("Disease name matching"):
+    st.write(get_disease_name_index().stats())
+
+with st.sidebar.expander("Symptom diagnosis cache"):
+    st.write(get_symptom_cache().stats())
+
+pipeline.end_run()
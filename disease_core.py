@@ -0,0 +1,101 @@
+import json
+
+from instrumentation import timed
+from llm_gateway import get_gateway
+from llm_streaming import completion
+from response_parsing import DISEASE_SCHEMA, normalize_disease_info, parse_structured, request_structured
+
+# Disease queries without any Streamlit dependency, shared by disease_analysis.py
+# and background jobs such as the disease snapshot refresh and batch_runner.py.
+MEDICATION_FORMAT = '''"name":""
+    "side_effects":[
+    0:""
+    1:""
+    ...
+    ]
+    "dosage":""'''
+
+
+@timed()
+def fetch_disease_info(disease_name, client=None):
+    """
+    Query OpenAI for structured information about a disease and return it as a JSON string
+    (or the raw response if it contained no usable JSON). Safe to call from worker threads.
+    """
+    info, content, _ = request_structured(
+        client or get_gateway(),
+        messages=[
+            {"role": "system", "content": f"Please provide information on the following aspects for {disease_name}: 1. Key Statistics, 2. Recovery Options, 3. Recommended Medications. Format the response in JSON with keys for 'name', 'statistics', 'total_cases' (this always has to be a number), 'recovery_rate' (this always has to be a percentage), 'mortality_rate' (this always has to be a percentage) 'recovery_options', (explain each recovery option in detail), and 'medication', (give some side effect examples and dosages) always use this json format for medication : {MEDICATION_FORMAT} ."}
+        ],
+        schema=DISEASE_SCHEMA,
+        normalize=normalize_disease_info
+    )
+    # Return the repaired JSON when available, otherwise the raw response for display
+    return json.dumps(info) if info is not None else content
+
+
+def fetch_health_tips(disease_name, stream=False, client=None):
+    """
+    Query OpenAI for health tips and preventative measures for a disease.
+    With stream=True, returns an iterator of text chunks.
+    """
+    return completion(
+        client or get_gateway(),
+        messages=[
+            {"role": "system", "content": f"Provide health tips and preventative measures for managing or preventing {disease_name}."}
+        ],
+        stream=stream
+    )
+
+
+def fetch_diagnosis(symptoms, stream=False, client=None):
+    """
+    Query OpenAI for possible diagnoses based on symptoms.
+    With stream=True, returns an iterator of text chunks.
+    """
+    return completion(
+        client or get_gateway(),
+        messages=[
+            {"role": "system", "content": f"Based on the following symptoms: {symptoms}, suggest possible diagnoses. Provide a list of potential diseases with a brief description for each."}
+        ],
+        stream=stream
+    )
+
+
+def fetch_risk_assessment(age, gender, habits, disease_name, stream=False, client=None):
+    """
+    Query OpenAI for a risk assessment based on personal data.
+    With stream=True, returns an iterator of text chunks.
+    """
+    return completion(
+        client or get_gateway(),
+        messages=[
+            {"role": "system",
+             "content": f"Based on the following data: age {age}, gender {gender}, habits {habits}, assess the risk for {disease_name} and provide a brief explanation."}
+        ],
+        stream=stream
+    )
+
+
+@timed()
+def disease_report(disease_name, client=None, name_index=None, snapshot=None):
+    """
+    Disease information and health tips for one disease as a JSON-serializable dictionary.
+    The name is resolved through name_index and answered from snapshot when given.
+    """
+    canonical = name_index.resolve(disease_name) if name_index is not None else disease_name
+    info_text = snapshot.info(canonical) if snapshot is not None else None
+    tips = snapshot.tips(canonical) if snapshot is not None else None
+    if info_text is None:
+        info_text = fetch_disease_info(canonical, client=client)
+    if tips is None:
+        tips = fetch_health_tips(canonical, client=client)
+    info, missing_fields, _ = parse_structured(info_text, DISEASE_SCHEMA, normalize_disease_info)
+    return {
+        "disease": disease_name,
+        "canonical_name": canonical,
+        "info": info,
+        "raw_info": info_text if info is None else None,
+        "missing_fields": missing_fields,
+        "health_tips": tips,
+    }
@@ -0,0 +1,298 @@
+import re
+import sys
+import threading
+
+# Maps free-text disease names to canonical names before any cache or LLM
+# lookup, so "covid", "COVID-19", "Covid 19" and "sars-cov-2" share one cache
+# entry. Names are matched through a synonym table first, then fuzzily through
+# a trigram index confirmed by edit distance. Fuzzy matching only corrects clear
+# typos of the alias table and catalog: free-text names are never learned, and
+# names that differ in a meaningful prefix or suffix (hypo/hyper, -itis/-osis)
+# are never mapped onto each other. Short names one edit away from another
+# disease ("canker"/"cancer") are only offered as a suggestion.
+DEFAULT_FUZZY_THRESHOLD = 0.8  # Minimum edit-distance similarity for a fuzzy match
+MAX_FUZZY_EDITS = 2  # ...and at most this many edits
+MIN_FUZZY_LENGTH = 5  # Shorter names ("flu", "hiv") must match exactly
+# Names shorter than this are only corrected when most of their trigrams match ("strok" -> "Stroke");
+# otherwise one edit can turn them into a different disease ("canker" -> "Cancer") and the
+# match is only offered as a suggestion
+MIN_CONFIDENT_LENGTH = 8
+MIN_TRIGRAM_OVERLAP = 0.6
+MAX_CANDIDATES = 8
+
+# Word parts that change the meaning of a name; two names carrying different ones are different diseases
+MEANINGFUL_PREFIXES = ("hyper", "hypo", "tachy", "brady", "macro", "micro", "poly", "oligo")
+MEANINGFUL_SUFFIXES = ("itis", "osis", "emia", "oma", "ia", "algia", "pathy", "plasia", "trophy")
+
+# Real conditions one typo away from a different known name; typed exactly, they are never fuzzily matched
+DISTINCT_NAMES = {
+    "hypotension", "hypertension", "hypothyroidism", "hyperthyroidism", "hypoglycemia", "hyperglycemia",
+    "hypokalemia", "hyperkalemia", "hyponatremia", "hypernatremia", "hypocalcemia", "hypercalcemia",
+    "hypothermia", "hyperthermia", "hypoparathyroidism", "hyperparathyroidism",
+}
+
+# Canonical name -> synonyms and common spellings
+DISEASE_ALIASES = {
+    "Cold": ["common cold", "head cold", "coryza", "rhinovirus infection", "acute viral rhinopharyngitis"],
+    "Hypertension": ["high blood pressure", "htn", "arterial hypertension", "hbp"],
+    "HIV": ["human immunodeficiency virus", "hiv infection"],
+    "AIDS": ["acquired immunodeficiency syndrome", "acquired immune deficiency syndrome"],
+    "COVID-19": ["covid", "covid19", "coronavirus", "coronavirus disease 2019", "sars-cov-2", "sars cov 2", "corona"],
+    "Influenza": ["flu", "the flu", "grippe", "seasonal flu", "seasonal influenza"],
+    "Cancer": ["malignancy", "malignant neoplasm", "cancers"],
+    "Diabetes": ["diabetes mellitus", "sugar diabetes"],
+    "Asthma": ["bronchial asthma"],
+    "Tuberculosis": ["tb", "consumption"],
+    "Malaria": ["paludism"],
+    "Pneumonia": ["lung infection"],
+    "Chickenpox": ["chicken pox", "varicella"],
+    "Measles": ["rubeola"],
+    "Alzheimer's disease": ["alzheimers", "alzheimer", "alzheimer disease"],
+    "Stroke": ["cerebrovascular accident", "cva", "brain attack"],
+    "Migraine": ["migraines", "migraine headache"],
+}
+
+_SEPARATORS = re.compile(r"[\s\-_/.,'’()]+")
+
+
+def normalize_name(name):
+    """
+    Casefold and collapse punctuation and whitespace: "COVID-19" and "Covid 19" both become "covid 19".
+    """
+    return _SEPARATORS.sub(" ", str(name).casefold()).strip()
+
+
+def _compact(normalized):
+    return normalized.replace(" ", "")
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[position:position + 3] for position in range(len(padded) - 2)}
+
+
+def edit_distance(a, b):
+    """
+    Edit distance counting insertions, deletions, substitutions and adjacent transpositions
+    ("lupsu" -> "lupus") as one edit each (optimal string alignment).
+    """
+    before_previous, previous = None, list(range(len(b) + 1))
+    for row in range(1, len(a) + 1):
+        current = [row] + [0] * len(b)
+        for column in range(1, len(b) + 1):
+            current[column] = min(previous[column] + 1, current[column - 1] + 1,
+                                  previous[column - 1] + (a[row - 1] != b[column - 1]))
+            if row > 1 and column > 1 and a[row - 1] == b[column - 2] and a[row - 2] == b[column - 1]:
+                current[column] = min(current[column], before_previous[column - 2] + 1)
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+def _distinguishing_tokens(normalized):
+    # Short or numeric tokens ("b" in "hepatitis b", "2" in "type 2 diabetes") carry the meaning
+    return {token for token in normalized.split() if len(token) <= 2 or any(char.isdigit() for char in token)}
+
+
+def _affixes(normalized):
+    # (prefix, suffix) of every token, from MEANINGFUL_PREFIXES and MEANINGFUL_SUFFIXES
+    affixes = []
+    for token in normalized.split():
+        prefix = next((prefix for prefix in MEANINGFUL_PREFIXES if token.startswith(prefix)), None)
+        suffix = next((suffix for suffix in sorted(MEANINGFUL_SUFFIXES, key=len, reverse=True) if token.endswith(suffix)), None)
+        affixes.append((prefix, suffix))
+    return affixes
+
+
+def _conflicting_affixes(a, b):
+    """
+    True if the names carry different meaningful prefixes or suffixes in the same token
+    ("hypotension"/"hypertension", "nephritis"/"nephrosis"). A missing affix is not a conflict,
+    so typos such as "diabetis" are still judged by edit distance alone.
+    """
+    affixes_a, affixes_b = _affixes(a), _affixes(b)
+    if len(affixes_a) != len(affixes_b):
+        return False
+    for (prefix_a, suffix_a), (prefix_b, suffix_b) in zip(affixes_a, affixes_b):
+        if prefix_a and prefix_b and prefix_a != prefix_b:
+            return True
+        if suffix_a and suffix_b and suffix_a != suffix_b:
+            return True
+    return False
+
+
+def _confident(key, candidate):
+    # Long names survive a typo or two; short ones must also share most of their trigrams
+    if min(len(key), len(candidate)) >= MIN_CONFIDENT_LENGTH:
+        return True
+    key_trigrams, candidate_trigrams = trigrams(key), trigrams(candidate)
+    return len(key_trigrams & candidate_trigrams) / len(key_trigrams | candidate_trigrams) >= MIN_TRIGRAM_OVERLAP
+
+
+def similarity(a, b):
+    if not a and not b:
+        return 1.0
+    return 1 - edit_distance(a, b) / max(len(a), len(b))
+
+
+class DiseaseNameIndex:
+    """
+    Alias table plus trigram index over the alias and catalog spellings. resolve() returns the
+    canonical name; unknown names are passed through without being added to the index.
+    """
+
+    def __init__(self, aliases=DISEASE_ALIASES, extra_names=(), threshold=DEFAULT_FUZZY_THRESHOLD,
+                 max_edits=MAX_FUZZY_EDITS):
+        self.threshold = threshold
+        self.max_edits = max_edits
+        self.counts = {"alias": 0, "fuzzy": 0, "unmatched": 0}
+        self._keys = {}  # Compact spelling -> canonical name
+        self._spellings = {}  # Compact spelling -> normalized spelling
+        self._trigrams = {}  # Trigram -> compact spellings containing it
+        self._lock = threading.Lock()
+        for canonical, synonyms in aliases.items():
+            self.add(canonical, canonical)
+            for synonym in synonyms:
+                self.add(synonym, canonical)
+        for name in extra_names:
+            if self.lookup(name)[1] != "alias":
+                self.add(name, name)
+
+    def add(self, spelling, canonical):
+        normalized = normalize_name(spelling)
+        key = _compact(normalized)
+        if not key:
+            return
+        with self._lock:
+            self._keys.setdefault(key, canonical)
+            self._spellings.setdefault(key, normalized)
+            for trigram in trigrams(key):
+                self._trigrams.setdefault(trigram, set()).add(key)
+
+    def lookup(self, name):
+        """
+        Return (canonical name or None, method, similarity) without counting.
+        """
+        normalized = normalize_name(name)
+        key = _compact(normalized)
+        if not key:
+            return None, "unmatched", 0.0
+        with self._lock:
+            canonical = self._keys.get(key)
+            if canonical is not None:
+                return canonical, "alias", 1.0
+            best, best_score = self._fuzzy_candidate(key, normalized)
+            if best is not None and _confident(key, best):
+                return self._keys[best], "fuzzy", best_score
+        return None, "unmatched", best_score
+
+    def suggest(self, name):
+        """
+        Canonical name of a close but uncertain match for an unmatched name ("canker" -> "Cancer"),
+        to offer as "did you mean", or None.
+        """
+        normalized = normalize_name(name)
+        key = _compact(normalized)
+        if not key or key in self._keys:
+            return None
+        with self._lock:
+            best, _ = self._fuzzy_candidate(key, normalized)
+            if best is None or _confident(key, best):
+                return None
+            return self._keys[best]
+
+    def _fuzzy_candidate(self, key, normalized):
+        # Closest spelling within max_edits and the threshold, with its similarity; called with the lock held
+        if len(key) < MIN_FUZZY_LENGTH or key in DISTINCT_NAMES:
+            return None, 0.0
+        # Candidates are the spellings sharing the most trigrams; edit distance makes the final call
+        shared = {}
+        for trigram in trigrams(key):
+            for candidate in self._trigrams.get(trigram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        candidates = sorted(shared, key=shared.get, reverse=True)[:MAX_CANDIDATES]
+        best, best_score = None, 0.0
+        tokens = _distinguishing_tokens(normalized)
+        for candidate in candidates:
+            spelling = self._spellings[candidate]
+            if _distinguishing_tokens(spelling) != tokens or _conflicting_affixes(normalized, spelling):
+                continue
+            distance = edit_distance(key, candidate)
+            score = 1 - distance / max(len(key), len(candidate))
+            if distance <= self.max_edits and score > best_score:
+                best, best_score = candidate, score
+        if best is not None and best_score >= self.threshold:
+            return best, best_score
+        return None, best_score
+
+    def resolve(self, name):
+        """
+        Map a free-text disease name to its canonical name. Unknown names are returned
+        with the previous .capitalize() formatting; blank names give "".
+        """
+        if not str(name).strip():
+            return ""
+        canonical, method, _ = self.lookup(name)
+        with self._lock:
+            self.counts[method] += 1
+        if canonical is None:
+            # Not learned: the first spelling someone types must not become the name everyone else gets
+            canonical = " ".join(str(name).split()).capitalize()
+        return canonical
+
+    def stats(self):
+        with self._lock:
+            total = sum(self.counts.values())
+            return dict(
+                self.counts,
+                lookups=total,
+                matched_ratio=(total - self.counts["unmatched"]) / total if total else 0.0,
+                known_spellings=len(self._keys),
+            )
+
+
+def hit_rate_report(queries, index=None):
+    """
+    Compare cache hit rates for a query log when keyed by the old .capitalize() names
+    and by canonical names (every repeat of a key is a cache hit).
+    """
+    index = index or DiseaseNameIndex()
+    queries = [query for query in queries if str(query).strip()]
+    before = [str(query).strip().capitalize() for query in queries]
+    after = [index.resolve(query) for query in queries]
+    total = len(queries)
+    return {
+        "queries": total,
+        "distinct_keys_before": len(set(before)),
+        "distinct_keys_after": len(set(after)),
+        "hit_rate_before": (total - len(set(before))) / total if total else 0.0,
+        "hit_rate_after": (total - len(set(after))) / total if total else 0.0,
+        "llm_calls_saved": len(set(before)) - len(set(after)),
+        "matches": index.stats(),
+    }
+
+
+# Representative free-text queries, used when no query log is given
+SAMPLE_QUERIES = [
+    "covid", "COVID-19", "Covid 19", "sars-cov-2", "coronavirus", "covid19", "Covid-19 ",
+    "flu", "Flu", "influenza", "Influenza", "influenze", "the flu", "grippe",
+    "cold", "Common cold", "common  cold", "head cold",
+    "high blood pressure", "Hypertension", "hypertenson", "HTN",
+    "HIV", "hiv", "Human immunodeficiency virus", "AIDS", "aids",
+    "diabetes", "Diabetes mellitus", "diabetis", "asthma", "Asthma", "astma",
+    "tuberculosis", "TB", "tuberclosis", "alzheimers", "Alzheimer's disease", "alzheimer",
+    "chicken pox", "chickenpox", "varicella", "lupus", "Lupus", "lupsu", "cancer", "Cancer", "cancers",
+]
+
+
+if __name__ == "__main__":
+    # python disease_names.py [query_log.txt]  (one disease query per line)
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = SAMPLE_QUERIES
+    report = hit_rate_report(queries)
+    print(f"{report['queries']} queries: {report['distinct_keys_before']} cache keys before, {report['distinct_keys_after']} after")
+    print(f"Cache hit rate: {report['hit_rate_before']:.0%} -> {report['hit_rate_after']:.0%} "
+          f"({report['llm_calls_saved']} fewer LLM calls)")
+    print(f"Matches: {report['matches']}")
@@ -0,0 +1,208 @@
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+
+# Precomputed disease information and health tips for a catalog of frequently
+# requested diseases. The snapshot is a small gzipped JSON file that is loaded
+# at startup and answers reads without an LLM call; stale entries keep being
+# served while a background thread refreshes them.
+# Build or refresh it before deploying with: python disease_snapshot.py
+SNAPSHOT_VERSION = 1  # Bump when the prompts or the stored format change
+DEFAULT_SNAPSHOT_PATH = os.environ.get(
+    "DISEASE_SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "disease_snapshot.json.gz"),
+)
+DEFAULT_CATALOG = ["Cold", "Hypertension", "HIV", "AIDS", "COVID-19", "Influenza", "Cancer"]
+DISEASE_CATALOG = [name.strip() for name in os.environ.get("DISEASE_CATALOG", ",".join(DEFAULT_CATALOG)).split(",") if name.strip()]
+DEFAULT_MAX_AGE = 14 * 24 * 60 * 60  # Entries older than this are refreshed in the background
+DEFAULT_REFRESH_INTERVAL = float(os.environ.get("DISEASE_SNAPSHOT_REFRESH_INTERVAL", 6 * 60 * 60))  # 0 disables it
+RELOAD_CHECK_INTERVAL = 60  # Seconds between checks for a snapshot written by another process
+
+
+def snapshot_key(disease_name):
+    return " ".join(str(disease_name).split()).casefold()
+
+
+class DiseaseSnapshot:
+    """
+    Versioned snapshot of {disease: (info JSON, health tips)} backed by a gzipped JSON file.
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.last_error = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._refresher = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """
+        Read the snapshot file. A missing file or one written by another SNAPSHOT_VERSION is ignored.
+        """
+        try:
+            mtime = os.path.getmtime(self.path)
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != SNAPSHOT_VERSION:
+            return False
+        with self._lock:
+            self.entries = data.get("entries", {})
+            self._mtime = mtime
+        return True
+
+    def save(self):
+        """
+        Write the snapshot atomically so readers in other processes never see a partial file.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock:
+            data = {"version": SNAPSHOT_VERSION, "saved_at": time.time(), "entries": dict(self.entries)}
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        with gzip.open(temporary_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(temporary_path, self.path)
+        with self._lock:
+            self._mtime = os.path.getmtime(self.path)
+
+    def _maybe_reload(self):
+        # Pick up refreshes written by other app processes, checking the file at most once a minute
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            if os.path.getmtime(self.path) != self._mtime:
+                self.load()
+        except OSError:
+            pass
+
+    def get(self, disease_name):
+        """
+        Return the entry for disease_name (stale or not), or None if it is not in the snapshot.
+        """
+        self._maybe_reload()
+        with self._lock:
+            entry = self.entries.get(snapshot_key(disease_name))
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def info(self, disease_name):
+        entry = self.get(disease_name)
+        return entry["info"] if entry is not None else None
+
+    def tips(self, disease_name):
+        entry = self.get(disease_name)
+        return entry["tips"] if entry is not None else None
+
+    def put(self, disease_name, info, tips):
+        with self._lock:
+            self.entries[snapshot_key(disease_name)] = {
+                "name": disease_name, "info": info, "tips": tips, "fetched_at": time.time(),
+            }
+
+    def stale(self, catalog):
+        """
+        Catalog diseases that are missing from the snapshot or older than max_age.
+        """
+        now = time.time()
+        with self._lock:
+            return [
+                name for name in catalog
+                if snapshot_key(name) not in self.entries
+                or now - self.entries[snapshot_key(name)]["fetched_at"] > self.max_age
+            ]
+
+    def refresh(self, catalog, force=False, max_workers=4):
+        """
+        Fetch info and tips for the stale (or, with force, all) catalog diseases concurrently
+        and save the snapshot. Returns the names that were refreshed.
+        """
+        from disease_core import fetch_disease_info, fetch_health_tips
+        from fanout import fan_out
+
+        names = list(catalog) if force else self.stale(catalog)
+        refreshed = []
+        for name, result, error in fan_out(lambda name: (fetch_disease_info(name), fetch_health_tips(name)),
+                                           names, max_workers=max_workers):
+            if error is not None:
+                self.last_error = error
+                continue
+            info, tips = result
+            try:
+                json.loads(info)
+            except (TypeError, ValueError):
+                # Unusable answers are retried on the next refresh instead of being served
+                self.last_error = ValueError(f"No JSON disease information for {name}")
+                continue
+            if not tips:
+                continue
+            self.put(name, info, tips)
+            refreshed.append(name)
+        if refreshed:
+            self.save()
+        return refreshed
+
+    def start_background_refresh(self, catalog, interval=DEFAULT_REFRESH_INTERVAL):
+        """
+        Refresh stale catalog entries now and then every interval seconds on a daemon thread.
+        """
+        if interval <= 0 or self._refresher is not None:
+            return None
+
+        def run():
+            while True:
+                try:
+                    self.refresh(catalog)
+                except Exception as e:
+                    self.last_error = e
+                if self._stop.wait(interval):
+                    return
+
+        self._refresher = threading.Thread(target=run, name="disease-snapshot-refresh", daemon=True)
+        self._refresher.start()
+        return self._refresher
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "last_error": repr(self.last_error) if self.last_error else None,
+            }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute disease information and health tips for the catalog.")
+    parser.add_argument("diseases", nargs="*", help="Diseases to include (default: DISEASE_CATALOG)")
+    parser.add_argument("--path", default=DEFAULT_SNAPSHOT_PATH)
+    parser.add_argument("--force", action="store_true", help="Refresh every entry, not only stale ones")
+    args = parser.parse_args()
+
+    snapshot = DiseaseSnapshot(args.path)
+    started = time.perf_counter()
+    refreshed = snapshot.refresh(args.diseases or DISEASE_CATALOG, force=args.force)
+    print(f"Refreshed {len(refreshed)} entries in {time.perf_counter() - started:.1f}s; "
+          f"{len(snapshot.entries)} entries in {args.path} ({os.path.getsize(args.path) if os.path.exists(args.path) else 0} bytes)")
+    if snapshot.last_error is not None:
+        print(f"Last error: {snapshot.last_error!r}")
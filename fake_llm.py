@@ -0,0 +1,52 @@
+import time
+from types import SimpleNamespace
+
+# Offline stand-in for the OpenAI client, exposing the same
+# client.chat.completions.create(...) interface used by the apps.
+
+
+class _FakeCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model, messages, **params):
+        return self._owner._complete(model, messages, **params)
+
+
+class FakeClient:
+    """
+    Fake chat client returning canned responses after an optional artificial latency.
+    `responder` may be a string or a callable taking (model, messages) and returning the text.
+    With stream=True the text is yielded in chunks of `chunk_size` characters, `chunk_delay` seconds apart.
+    """
+
+    def __init__(self, responder="This is a fake response.", latency=0.0, chunk_size=8, chunk_delay=0.0):
+        self.responder = responder
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.calls = []
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
+
+    def _respond(self, model, messages):
+        if callable(self.responder):
+            return self.responder(model, messages)
+        return self.responder
+
+    def _complete(self, model, messages, stream=False, **params):
+        self.calls.append({"model": model, "messages": messages, "params": dict(params, stream=stream)})
+        if self.latency:
+            time.sleep(self.latency)
+        content = self._respond(model, messages)
+        if stream:
+            return self._stream(content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def _stream(self, content):
+        for start in range(0, len(content), self.chunk_size):
+            if self.chunk_delay and start:
+                time.sleep(self.chunk_delay)
+            delta = SimpleNamespace(content=content[start:start + self.chunk_size])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+        # Like the real API, the final chunk carries no content
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None))])
@@ -0,0 +1,101 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Concurrent fan-out of independent lookups (e.g. one LLM call per disease),
+# yielding each result as soon as it arrives.
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 60  # Seconds allowed for each request
+
+
+def fan_out(func, items, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT):
+    """
+    Call func(item) for every item on a bounded thread pool and yield
+    (item, result, error) tuples in completion order. Requests that run past
+    `timeout` seconds are reported with a TimeoutError instead of a result.
+    """
+    items = list(items)
+    if not items:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))))
+    started = {}
+    try:
+        pending = {}
+        for index, item in enumerate(items):
+            future = executor.submit(_timed_call, func, item, started, index)
+            pending[future] = index
+
+        while pending:
+            # A request's clock starts when a worker picks it up, not when it is queued
+            now = time.monotonic()
+            deadlines = {future: started[index] + timeout for future, index in pending.items() if index in started}
+
+            for future, deadline in deadlines.items():
+                if deadline <= now and not future.done():
+                    index = pending.pop(future)
+                    yield items[index], None, TimeoutError(f"Request for {items[index]!r} timed out after {timeout} seconds")
+            if not pending:
+                break
+
+            wait_for = min([deadline - now for future, deadline in deadlines.items() if future in pending] or [timeout])
+            if len(deadlines) < len(pending):
+                # Poll briefly while some requests are still queued, so their deadlines get registered
+                wait_for = min(wait_for, 0.05)
+            done, _ = wait(list(pending), timeout=max(wait_for, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                error = future.exception()
+                if error is not None:
+                    yield items[index], None, error
+                else:
+                    yield items[index], future.result(), None
+    finally:
+        # Do not block on requests that already timed out
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _timed_call(func, item, started, index):
+    started[index] = time.monotonic()
+    return func(item)
+
+
+def benchmark(n_items=8, latencies=None, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Compare sequential and fanned-out wall-clock time against a local stub client.
+    """
+    from fake_llm import FakeClient
+
+    if latencies is None:
+        latencies = [0.1 + 0.05 * i for i in range(n_items)]
+    items = list(range(len(latencies)))
+    client = FakeClient(lambda model, messages: messages[0]["content"])
+
+    def lookup(i):
+        time.sleep(latencies[i])
+        return client.chat.completions.create(
+            model="gpt-3.5-turbo", messages=[{"role": "user", "content": f"item {i}"}]
+        ).choices[0].message.content
+
+    start = time.perf_counter()
+    for i in items:
+        lookup(i)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in fan_out(lookup, items, max_workers=max_workers):
+        pass
+    concurrent = time.perf_counter() - start
+
+    return {
+        "items": len(items),
+        "sum_of_latencies": sum(latencies),
+        "slowest_latency": max(latencies),
+        "sequential_seconds": sequential,
+        "fan_out_seconds": concurrent,
+    }
+
+
+if __name__ == "__main__":
+    results = benchmark()
+    for name, value in results.items():
+        print(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
@@ -0,0 +1,105 @@
+import math
+
+from indicators import compute_indicators, wide_frame
+from instrumentation import timed
+from llm_gateway import get_gateway
+from llm_streaming import completion
+from prompt_compaction import compact_prices, summarize_prices
+
+# Stock analyses without any Streamlit dependency, shared by financial_analysis.py
+# and batch_runner.py.
+# Token budgets for the price data sent to the LLM
+SENTIMENT_TOKEN_BUDGET = 500
+COMPARISON_TOKEN_BUDGET = 3000
+
+
+@timed()
+def analyze_sentiment(text, stock_data, stream=False, client=None):
+    """
+    Analyze the sentiment of text using OpenAI with the stock's recent performance as context.
+    With stream=True, returns an iterator of text chunks.
+    """
+    # Include a compact summary of the stock's recent performance for context in sentiment analysis
+    recent_performance = summarize_prices(stock_data, "Stock", SENTIMENT_TOKEN_BUDGET)
+
+    return completion(
+        client or get_gateway(),
+        messages=[
+            {"role": "system",
+             "content": "You are a financial sentiment analysis tool with enhanced capabilities. Use the stock's recent performance as context."},
+            {"role": "user",
+             "content": f"Analyze the sentiment of this text: {text} considering this recent stock performance: {recent_performance}"}
+        ],
+        stream=stream
+    )
+
+
+def comparison_messages(stocks_data):
+    """
+    Build the comparative performance prompt from compact, token-bounded summaries.
+    Returns (messages, prompt size report).
+    """
+    stocks_text, prompt_report = compact_prices(stocks_data, COMPARISON_TOKEN_BUDGET)
+    messages = [
+        {"role": "system",
+         "content": "You are a financial assistant that will retrieve tables of financial market data and will summarize the comparative performance in text, with a detailed analysis of each stock, key highlights, and a markdown-formatted conclusion."},
+        {"role": "user",
+         "content": f"Summaries of the stock data:\n{stocks_text}"}
+    ]
+    return messages, prompt_report
+
+
+@timed()
+def compare_performance(stocks_data, stream=False, client=None):
+    """
+    Summarize the comparative performance of {ticker: DataFrame} with OpenAI.
+    With stream=True, returns an iterator of text chunks.
+    """
+    messages, _ = comparison_messages(stocks_data)
+    return completion(client or get_gateway(), messages=messages, stream=stream)
+
+
+def _last(frame, ticker):
+    # Latest non-missing value as a JSON-friendly float (None if there is none)
+    if ticker not in frame:
+        return None
+    values = frame[ticker].dropna()
+    if values.empty:
+        return None
+    value = float(values.iloc[-1])
+    return value if math.isfinite(value) else None
+
+
+@timed()
+def stock_report(tickers, start_date, end_date, store, sentiment_text=None, comparison=True, client=None):
+    """
+    Key figures for a list of tickers as a JSON-serializable dictionary, with the
+    sentiment of sentiment_text per ticker and an LLM comparison when requested.
+    """
+    stocks_data = store.get_prices(tickers, start_date, end_date)
+    available = {ticker: data for ticker, data in stocks_data.items() if not data.empty}
+    close = wide_frame(available) if available else None
+    indicators = compute_indicators(close) if close is not None else {}
+
+    stocks = {}
+    for ticker in tickers:
+        if ticker not in available:
+            stocks[ticker] = {"rows": 0}
+            continue
+        prices = close[ticker].dropna()
+        stocks[ticker] = {
+            "rows": int(len(prices)),
+            "first_close": float(prices.iloc[0]),
+            "last_close": float(prices.iloc[-1]),
+            "return": float(prices.iloc[-1] / prices.iloc[0] - 1),
+            "volatility": _last(indicators["Volatility"], ticker),
+            "rsi": _last(indicators["RSI"], ticker),
+            "sma": _last(indicators["SMA"], ticker),
+        }
+        if sentiment_text:
+            stocks[ticker]["sentiment"] = analyze_sentiment(sentiment_text, available[ticker], client=client)
+
+    report = {"tickers": list(tickers), "start": str(start_date), "end": str(end_date), "stocks": stocks}
+    if comparison and len(available) > 1:
+        report["comparison"] = compare_performance(available, client=client)
+    return report
@@ -1,138 +1,215 @@
 import streamlit as st
-from openai import OpenAI
-import yfinance as yf
+from llm_gateway import get_gateway
 from datetime import date
+from llm_streaming import stream_completion
+import pipeline
+from instrumentation import timed
 
-# Replace "your_api_key_here" with your actual OpenAI API key
-client = OpenAI(api_key="your_api_key_here")
+# Rate-limited, retrying client shared by all apps and sessions; set OPENAI_API_KEY in the environment
+# (or replace "your_api_key_here" in llm_gateway.py with your actual OpenAI API key)
+client = get_gateway()
+
+pipeline.begin_run()
 
 st.title('Interactive Financial Stock Market Comparative Analysis Tool with Enhanced Sentiment Analysis')
 
 
-# Function to fetch stock data
-def get_stock_data(ticker, start_date, end_date):
-    data = yf.download(ticker, start=start_date, end=end_date)
-    return data
+# Shared local market-data store, reused across reruns and sessions. The data backends (pandas, numpy,
+# pyarrow) are imported on first use, so the title and sidebar render before they are loaded.
+@st.cache_resource
+def get_market_data_store():
+    from market_data import MarketDataStore
+
+    return MarketDataStore()
+
+
+# Function to fetch stock data for several tickers in one batched request
+@timed()
+def get_stocks_data(tickers, start_date, end_date):
+    return get_market_data_store().get_prices(tickers, start_date, end_date)
+
+
+# Keyed caches: each stage only recomputes when its own inputs change, not on every rerun
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_stocks_data(tickers, start_date, end_date):
+    return get_stocks_data(list(tickers), start_date, end_date)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+@timed()  # Inside the cache, so only actual computations are recorded
+def load_indicators(tickers, start_date, end_date):
+    from indicators import compute_indicators, wide_frame
+
+    close = wide_frame(load_stocks_data(tickers, start_date, end_date))
+    return close, compute_indicators(close)
 
 
-# Function to analyze sentiment using OpenAI with context
-def analyze_sentiment(text, stock_data):
-    # Include stock's recent performance summary for context in sentiment analysis
-    recent_performance = stock_data.describe().to_string()
+# Charts are downsampled to about one point per pixel (shape-preserving LTTB for lines, min/max buckets
+# for bars) before they are sent to the browser, once per input
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_price_chart(tickers, start_date, end_date, ticker, chart_type, volume_period):
+    from chart_data import aggregate_volume, downsample
 
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system",
-             "content": "You are a financial sentiment analysis tool with enhanced capabilities. Use the stock's recent performance as context."},
-            {"role": "user",
-             "content": f"Analyze the sentiment of this text: {text} considering this recent stock performance: {recent_performance}"}
-        ]
-    )
-    response_message = response.choices[0].message.content
-    return response_message
+    stock_data = load_stocks_data(tickers, start_date, end_date)[ticker]
+    if chart_type == 'Histogram':
+        return downsample(aggregate_volume(stock_data['Volume'], volume_period), method="minmax")
+    return downsample(stock_data['Close'], method="minmax" if chart_type == 'Bar' else "lttb")
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_indicator_charts(tickers, start_date, end_date):
+    import pandas as pd
+    from chart_data import downsample
+
+    close, indicators = load_indicators(tickers, start_date, end_date)
+    charts = {}
+    for ticker in close.columns:
+        charts[f"{ticker} SMA and EMA"] = downsample(pd.DataFrame({
+            'Close': close[ticker], 'SMA': indicators['SMA'][ticker], 'EMA': indicators['EMA'][ticker]
+        }))
+        charts[f"{ticker} Bollinger Bands"] = downsample(pd.DataFrame({
+            'Close': close[ticker],
+            'Upper': indicators['Bollinger Upper'][ticker],
+            'Middle': indicators['Bollinger Middle'][ticker],
+            'Lower': indicators['Bollinger Lower'][ticker],
+        }))
+    charts["RSI"] = downsample(indicators['RSI'])
+    charts["MACD"] = downsample(indicators['MACD'])
+    charts["Annualized Volatility"] = downsample(indicators['Volatility'])
+    return charts
+
+
+@st.cache_data(ttl=24 * 3600, show_spinner=False)
+def load_ticker_info(ticker):
+    return get_market_data_store().get_info(ticker)
 
 
 # Sidebar for user inputs
 st.sidebar.header('User Input Options')
-selected_stock = st.sidebar.text_input('Enter Stock Ticker 1', 'AAPL').upper()
-selected_stock2 = st.sidebar.text_input('Enter Stock Ticker 2', 'GOOGL').upper()
+tickers_input = st.sidebar.text_input('Enter Stock Tickers (separate each ticker with a comma)', 'AAPL, GOOGL')
+selected_stocks = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers_input.split(',') if ticker.strip()))
 start_date = st.sidebar.date_input('Start Date', date(2024, 1, 1))
 end_date = st.sidebar.date_input('End Date', date(2024, 2, 1))
 
-# Fetch stock data
-stock_data = get_stock_data(selected_stock, start_date, end_date)
-stock_data2 = get_stock_data(selected_stock2, start_date, end_date)
+# Display additional financial metrics
+st.sidebar.header("Additional Financial Metrics")
+show_ratios = st.sidebar.checkbox("Show Financial Ratios", value=True)
+show_technical_indicators = st.sidebar.checkbox("Show Technical Indicators", value=True)
+
+if not selected_stocks:
+    st.error("Please enter at least one stock ticker.")
+    st.stop()
 
-col1, col2 = st.columns(2)
+# Fetch stock data for all tickers in one batched request
+with pipeline.stage("fetch market data"):
+    stocks_data = load_stocks_data(tuple(selected_stocks), start_date, end_date)
 
 # Display stock data with enhanced chart options
 chart_types = ['Line', 'Bar', 'Area', 'Histogram']
-
-with col1:
-    st.subheader(f"Displaying data for: {selected_stock}")
-    st.write(stock_data)
-    chart_type = st.sidebar.selectbox(f'Select Chart Type for {selected_stock}', chart_types)
-
-    if chart_type == 'Line':
-        st.line_chart(stock_data['Close'])
-    elif chart_type == 'Bar':
-        st.bar_chart(stock_data['Close'])
-    elif chart_type == 'Area':
-        st.area_chart(stock_data['Close'])
-    elif chart_type == 'Histogram':
-        st.bar_chart(stock_data['Volume'])
-
-with col2:
-    st.subheader(f"Displaying data for: {selected_stock2}")
-    st.write(stock_data2)
-    chart_type2 = st.sidebar.selectbox(f'Select Chart Type for {selected_stock2}', chart_types)
-
-    if chart_type2 == 'Line':
-        st.line_chart(stock_data2['Close'])
-    elif chart_type2 == 'Bar':
-        st.bar_chart(stock_data2['Close'])
-    elif chart_type2 == 'Area':
-        st.area_chart(stock_data2['Close'])
-    elif chart_type2 == 'Histogram':
-        st.bar_chart(stock_data2['Volume'])
+volume_periods = ['Daily', 'Weekly', 'Monthly']
+
+
+# The raw data is shown one page at a time; paging only reruns this fragment
+@st.fragment
+def display_price_table(ticker, stock_data):
+    from chart_data import TABLE_PAGE_SIZE, page_count, paginate
+
+    pipeline.fragment_run(f"{ticker} table")
+    pages = page_count(len(stock_data))
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"table_page_{ticker}") if pages > 1 else 1
+    st.dataframe(paginate(stock_data, page))
+    if pages > 1:
+        st.caption(f"Rows {(page - 1) * TABLE_PAGE_SIZE + 1}-{min(page * TABLE_PAGE_SIZE, len(stock_data))} of {len(stock_data)}")
+
+
+# Changing the chart type only reruns this fragment, not the whole script
+@st.fragment
+def display_stock_chart(ticker, stock_data, data_key):
+    pipeline.fragment_run(f"{ticker} chart")
+    chart_type = st.selectbox(f'Select Chart Type for {ticker}', chart_types, key=f"chart_type_{ticker}")
+    volume_period = 'Daily'
+    if chart_type == 'Histogram':
+        volume_period = st.radio("Volume bars", volume_periods, horizontal=True, key=f"volume_period_{ticker}")
+
+    with pipeline.stage(f"{ticker} chart"):
+        if stock_data.empty:
+            st.warning(f"No data available for {ticker} in the selected date range.")
+            return
+        series = load_price_chart(*data_key, ticker, chart_type, volume_period)
+        if chart_type == 'Line':
+            st.line_chart(series)
+        elif chart_type == 'Bar':
+            st.bar_chart(series)
+        elif chart_type == 'Area':
+            st.area_chart(series)
+        elif chart_type == 'Histogram':
+            st.bar_chart(series)
+
+
+for ticker, tab in zip(selected_stocks, st.tabs(selected_stocks)):
+    with tab:
+        st.subheader(f"Displaying data for: {ticker}")
+        display_price_table(ticker, stocks_data[ticker])
+        display_stock_chart(ticker, stocks_data[ticker], (tuple(selected_stocks), start_date, end_date))
 
 # Sentiment Analysis Section
 st.header('Enhanced Sentiment Analysis')
 
-# Analyze sentiment based on the stock performance
-sentiment1 = analyze_sentiment(f"Analyzing sentiment for {selected_stock}", stock_data)
-sentiment2 = analyze_sentiment(f"Analyzing sentiment for {selected_stock2}", stock_data2)
+# Analyze sentiment based on the stock performance; each answer is requested once per ticker and date range
+with pipeline.stage("sentiment analysis"):
+    from finance_core import analyze_sentiment
 
-st.subheader(f"Sentiment Analysis for {selected_stock}")
-st.write(f"Sentiment: {sentiment1}")
+    for ticker in selected_stocks:
+        st.subheader(f"Sentiment Analysis for {ticker}")
+        st.write("Sentiment:")
+        pipeline.write_stream_cached(
+            ("sentiment", ticker, start_date, end_date),
+            lambda: analyze_sentiment(f"Analyzing sentiment for {ticker}", stocks_data[ticker], stream=True)
+        )
 
-st.subheader(f"Sentiment Analysis for {selected_stock2}")
-st.write(f"Sentiment: {sentiment2}")
+if show_ratios:
+    st.header(f"Financial Ratios for {', '.join(selected_stocks)}")
+    with pipeline.stage("financial ratios"):
+        for ticker in selected_stocks:
+            ticker_info = load_ticker_info(ticker)
 
-# Display additional financial metrics
-st.sidebar.header("Additional Financial Metrics")
-show_ratios = st.sidebar.checkbox("Show Financial Ratios", value=True)
-show_technical_indicators = st.sidebar.checkbox("Show Technical Indicators", value=True)
+            st.subheader(f"{ticker} Ratios")
+            st.write(f"P/E Ratio: {ticker_info.get('forwardPE', 'N/A')}")
+            st.write(f"Dividend Yield: {ticker_info.get('dividendYield', 'N/A')}")
+            st.write(f"Market Cap: {ticker_info.get('marketCap', 'N/A')}")
 
-if show_ratios:
-    st.header(f"Financial Ratios for {selected_stock} and {selected_stock2}")
-    ticker1_info = yf.Ticker(selected_stock).info
-    ticker2_info = yf.Ticker(selected_stock2).info
+if show_technical_indicators:
+    st.header(f"Technical Indicators for {', '.join(selected_stocks)}")
 
-    st.subheader(f"{selected_stock} Ratios")
-    st.write(f"P/E Ratio: {ticker1_info.get('forwardPE', 'N/A')}")
-    st.write(f"Dividend Yield: {ticker1_info.get('dividendYield', 'N/A')}")
-    st.write(f"Market Cap: {ticker1_info.get('marketCap', 'N/A')}")
+    # All indicators are computed for every ticker at once on a wide (dates x tickers) frame
+    with pipeline.stage("technical indicators"):
+        _, indicators = load_indicators(tuple(selected_stocks), start_date, end_date)
+        indicator_charts = load_indicator_charts(tuple(selected_stocks), start_date, end_date)
 
-    st.subheader(f"{selected_stock2} Ratios")
-    st.write(f"P/E Ratio: {ticker2_info.get('forwardPE', 'N/A')}")
-    st.write(f"Dividend Yield: {ticker2_info.get('dividendYield', 'N/A')}")
-    st.write(f"Market Cap: {ticker2_info.get('marketCap', 'N/A')}")
+    with pipeline.stage("indicator charts"):
+        for title, chart in indicator_charts.items():
+            st.subheader(title)
+            st.line_chart(chart)
 
-if show_technical_indicators:
-    st.header(f"Technical Indicators for {selected_stock} and {selected_stock2}")
-
-    st.subheader(f"{selected_stock} SMA and EMA")
-    stock_data['SMA'] = stock_data['Close'].rolling(window=20).mean()
-    stock_data['EMA'] = stock_data['Close'].ewm(span=20, adjust=False).mean()
-    st.line_chart(stock_data[['Close', 'SMA', 'EMA']])
-
-    st.subheader(f"{selected_stock2} SMA and EMA")
-    stock_data2['SMA'] = stock_data2['Close'].rolling(window=20).mean()
-    stock_data2['EMA'] = stock_data2['Close'].ewm(span=20, adjust=False).mean()
-    st.line_chart(stock_data2[['Close', 'SMA', 'EMA']])
-
-# Comparative Performance using OpenAI
-if st.button('Comparative Performance'):
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system",
-             "content": "You are a financial assistant that will retrieve two tables of financial market data and will summarize the comparative performance in text, with a detailed analysis of each stock, key highlights, and a markdown-formatted conclusion."},
-            {"role": "user",
-             "content": f"This is the {selected_stock} stock data : {stock_data.to_string()}, this is {selected_stock2} stock data: {stock_data2.to_string()}"}
-        ]
-    )
-    completion_message = response.choices[0].message.content
-    st.markdown(completion_message)
+        st.subheader("Correlation of Daily Returns")
+        st.dataframe(indicators['Correlation'])
+
+
+# Comparative Performance using OpenAI, only run when its button is clicked
+@st.fragment
+def comparative_performance(selected_stocks, stocks_data):
+    pipeline.fragment_run("comparative performance")
+    if st.button('Comparative Performance'):
+        with pipeline.stage("comparative performance"):
+            from finance_core import comparison_messages
+
+            # Send compact, token-bounded summaries instead of every row of every table
+            messages, prompt_report = comparison_messages({ticker: stocks_data[ticker] for ticker in selected_stocks})
+            st.caption(f"Prompt size: about {prompt_report['tokens_before']} tokens of raw data compacted to "
+                       f"{prompt_report['tokens_after']} tokens ({prompt_report['saved_ratio']:.0%} saved)")
+            st.write_stream(stream_completion(client, messages=messages))
+
+
+comparative_performance(selected_stocks, stocks_data)
+
+pipeline.end_run()
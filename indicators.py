@@ -0,0 +1,190 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+# Vectorized technical indicators over a wide price frame (one column per ticker),
+# so N tickers cost one pass per indicator instead of N separate per-frame loops.
+TRADING_DAYS_PER_YEAR = 252
+
+
+def wide_frame(stocks_data, field="Close"):
+    """
+    Align one field of several per-ticker frames into a single wide DataFrame (dates x tickers).
+    """
+    columns = {}
+    for ticker, frame in stocks_data.items():
+        if not frame.empty and field in frame:
+            series = frame[field]
+            # yfinance may return a one-column frame instead of a series
+            columns[ticker] = series.iloc[:, 0] if isinstance(series, pd.DataFrame) else series
+    return pd.DataFrame(columns)
+
+
+def rolling_mean(values, window):
+    """
+    Simple moving average of every column of a 2-D array using cumulative sums.
+    Windows containing a NaN produce NaN, matching pandas rolling().mean().
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.full(values.shape, np.nan)
+    if values.shape[0] < window:
+        return result
+
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    sums = np.vstack([np.zeros((1, values.shape[1])), sums])
+    counts = np.vstack([np.zeros((1, values.shape[1]), dtype=counts.dtype), counts])
+
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    result[window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+    return result
+
+
+def rolling_std(values, window):
+    """
+    Rolling sample standard deviation (ddof=1) of every column of a 2-D array.
+    """
+    values = np.asarray(values, dtype=float)
+    mean = rolling_mean(values, window)
+    mean_of_squares = rolling_mean(values * values, window)
+    variance = (mean_of_squares - mean * mean) * window / (window - 1)
+    return np.sqrt(np.clip(variance, 0.0, None))
+
+
+def compute_indicators(close, sma_window=20, ema_span=20, rsi_period=14, macd_fast=12, macd_slow=26,
+                       macd_signal=9, bollinger_window=20, bollinger_width=2.0, volatility_window=20):
+    """
+    Compute SMA, EMA, RSI, MACD, Bollinger bands, returns, volatility and the correlation
+    matrix for every ticker of a wide close-price frame at once.
+    Returns a dictionary of wide DataFrames (plus the ticker x ticker correlation matrix).
+    Every ticker is computed on its own trading days only, so tickers trading on different
+    calendars (or with gaps) give the same values as computing each ticker separately.
+    """
+    index, columns = close.index, close.columns
+    wide_values = close.to_numpy(dtype=float)
+
+    # Move each ticker's prices to the top of a compact array, so dates on which only
+    # other tickers traded never leave gaps in its windows
+    valid = ~np.isnan(wide_values)
+    rows, cols = np.nonzero(valid)
+    positions = np.cumsum(valid, axis=0)[rows, cols] - 1
+    values = np.full((int(valid.sum(axis=0).max(initial=0)), len(columns)), np.nan)
+    values[positions, cols] = wide_values[rows, cols]
+    close = pd.DataFrame(values, columns=columns)
+
+    def frame(array):
+        # Scatter a compact result back onto the original dates
+        array = np.asarray(array, dtype=float)
+        expanded = np.full(wide_values.shape, np.nan)
+        expanded[rows, cols] = array[positions, cols]
+        return pd.DataFrame(expanded, index=index, columns=columns)
+
+    sma = rolling_mean(values, sma_window)
+    ema = close.ewm(span=ema_span, adjust=False).mean()
+
+    # Wilder's RSI on the day-to-day changes
+    delta = close.diff()
+    average_gain = delta.clip(lower=0).ewm(alpha=1 / rsi_period, adjust=False).mean()
+    average_loss = (-delta.clip(upper=0)).ewm(alpha=1 / rsi_period, adjust=False).mean()
+    rsi = 100 - 100 / (1 + average_gain / average_loss)
+
+    macd = close.ewm(span=macd_fast, adjust=False).mean() - close.ewm(span=macd_slow, adjust=False).mean()
+    macd_signal_line = macd.ewm(span=macd_signal, adjust=False).mean()
+
+    bollinger_mid = sma if bollinger_window == sma_window else rolling_mean(values, bollinger_window)
+    bollinger_std = rolling_std(values, bollinger_window)
+
+    returns = close.pct_change(fill_method=None)
+    volatility = frame(rolling_std(returns.to_numpy(), volatility_window) * np.sqrt(TRADING_DAYS_PER_YEAR))
+    returns = frame(returns)
+
+    return {
+        "SMA": frame(sma),
+        "EMA": frame(ema),
+        "RSI": frame(rsi),
+        "MACD": frame(macd),
+        "MACD Signal": frame(macd_signal_line),
+        "MACD Histogram": frame(macd - macd_signal_line),
+        "Bollinger Upper": frame(bollinger_mid + bollinger_width * bollinger_std),
+        "Bollinger Middle": frame(bollinger_mid),
+        "Bollinger Lower": frame(bollinger_mid - bollinger_width * bollinger_std),
+        "Returns": returns,
+        "Volatility": volatility,
+        "Correlation": returns.corr(),
+    }
+
+
+def _per_frame_indicators(stocks_data):
+    """
+    Reference implementation: the original per-ticker rolling().mean()/ewm() approach.
+    """
+    results = {}
+    for ticker, frame in stocks_data.items():
+        close = frame["Close"]
+        delta = close.diff()
+        gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+        loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean()
+        macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+        mid = close.rolling(window=20).mean()
+        std = close.rolling(window=20).std()
+        returns = close.pct_change(fill_method=None)
+        results[ticker] = {
+            "SMA": close.rolling(window=20).mean(),
+            "EMA": close.ewm(span=20, adjust=False).mean(),
+            "RSI": 100 - 100 / (1 + gain / loss),
+            "MACD": macd,
+            "MACD Signal": macd.ewm(span=9, adjust=False).mean(),
+            "Bollinger Upper": mid + 2 * std,
+            "Bollinger Lower": mid - 2 * std,
+            "Returns": returns,
+            "Volatility": returns.rolling(window=20).std() * np.sqrt(TRADING_DAYS_PER_YEAR),
+        }
+    return results
+
+
+def synthetic_prices(n_tickers=50, n_days=TRADING_DAYS_PER_YEAR * 5, seed=0):
+    """
+    Generate random-walk OHLCV frames for benchmarking without network access.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2015-01-01", periods=n_days)
+    stocks_data = {}
+    for i in range(n_tickers):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+        stocks_data[f"T{i:03d}"] = pd.DataFrame(
+            {"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+             "Volume": rng.integers(1_000_000, 5_000_000, n_days)},
+            index=index,
+        )
+    return stocks_data
+
+
+def benchmark(ticker_counts=(2, 10, 50, 100), n_days=TRADING_DAYS_PER_YEAR * 5, repeat=3):
+    """
+    Compare the vectorized engine with the per-frame approach; returns the best time of `repeat` runs.
+    """
+    results = []
+    for n_tickers in ticker_counts:
+        stocks_data = synthetic_prices(n_tickers, n_days)
+
+        per_frame = min(_time(lambda: _per_frame_indicators(stocks_data)) for _ in range(repeat))
+        vectorized = min(_time(lambda: compute_indicators(wide_frame(stocks_data))) for _ in range(repeat))
+        results.append({"tickers": n_tickers, "days": n_days,
+                        "per_frame_seconds": per_frame, "vectorized_seconds": vectorized})
+    return results
+
+
+def _time(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    for row in benchmark():
+        print(f"{row['tickers']:>4} tickers x {row['days']} days: "
+              f"per-frame {row['per_frame_seconds'] * 1000:8.1f} ms, "
+              f"vectorized {row['vectorized_seconds'] * 1000:8.1f} ms")
@@ -0,0 +1,305 @@
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency, token, cost and cache-hit instrumentation shared by all three apps.
+# Every measurement is kept in an in-process registry and appended as one JSON
+# line to a local event log, so metrics_dashboard.py (or a Prometheus textfile
+# collector) can aggregate them across app processes.
+# Set METRICS_PATH to change the event log location, or to an empty string to disable it.
+DEFAULT_METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+DEFAULT_METRICS_PATH = os.environ.get("METRICS_PATH", os.path.join(DEFAULT_METRICS_DIR, "metrics.jsonl"))
+DEFAULT_PROMETHEUS_PATH = os.path.join(DEFAULT_METRICS_DIR, "metrics.prom")
+MAX_LOG_BYTES = 10 * 1024 * 1024  # The event log is rotated to <path>.1 above this size
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Estimated USD price per 1,000 (prompt, completion) tokens; unknown models are priced as gpt-3.5-turbo
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4-turbo": (0.01, 0.03),
+}
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    prompt_price, completion_price = MODEL_PRICES.get(model, MODEL_PRICES["gpt-3.5-turbo"])
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram in the Prometheus style.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        position = 0
+        while position < len(self.buckets) and value > self.buckets[position]:
+            position += 1
+        self.counts[position] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by linear interpolation inside the bucket that contains it.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for position, count in enumerate(self.counts):
+            upper = self.buckets[position] if position < len(self.buckets) else self.max
+            if count and seen + count >= rank:
+                return min(self.max, lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+            lower = upper
+        return self.max
+
+
+_local = threading.local()
+
+
+def current_span():
+    """
+    Name of the innermost instrumented call on this thread, used to attribute token usage.
+    """
+    stack = getattr(_local, "spans", None)
+    return stack[-1] if stack else None
+
+
+class Metrics:
+    """
+    Thread-safe registry of latency histograms, token usage and cache hits.
+    Events are also appended to the JSONL file at path (None disables the file).
+    """
+
+    def __init__(self, path=DEFAULT_METRICS_PATH):
+        self.path = path or None
+        self.latency = {}
+        self.errors = {}
+        self.usage = {}
+        self.span_usage = {}
+        self.cache = {}
+        self._lock = threading.Lock()
+        if self.path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def observe(self, name, seconds, error=False):
+        self._emit({"type": "latency", "name": name, "seconds": seconds, "error": error})
+
+    def record_usage(self, model, prompt_tokens, completion_tokens, estimated=False):
+        self._emit({
+            "type": "usage", "model": model, "span": current_span(),
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "cost": estimate_cost(model, prompt_tokens, completion_tokens), "estimated": estimated,
+        })
+
+    def record_cache(self, name, hit):
+        self._emit({"type": "cache", "name": name, "hit": hit})
+
+    def _emit(self, event):
+        event["ts"] = time.time()
+        with self._lock:
+            self._apply(event)
+            if self.path is not None:
+                self._append(event)
+
+    def _append(self, event):
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > MAX_LOG_BYTES:
+                os.replace(self.path, f"{self.path}.1")
+            with open(self.path, "a") as f:
+                f.write(json.dumps(event) + "\n")
+        except OSError:
+            # Metrics must never break the app they are measuring
+            pass
+
+    def _apply(self, event):
+        if event["type"] == "latency":
+            self.latency.setdefault(event["name"], Histogram()).observe(event["seconds"])
+            if event.get("error"):
+                self.errors[event["name"]] = self.errors.get(event["name"], 0) + 1
+        elif event["type"] == "usage":
+            for totals in (self.usage.setdefault(event["model"], {}),
+                           self.span_usage.setdefault(event.get("span") or "(other)", {})):
+                totals["calls"] = totals.get("calls", 0) + 1
+                for field in ("prompt_tokens", "completion_tokens", "cost"):
+                    totals[field] = totals.get(field, 0) + event[field]
+        elif event["type"] == "cache":
+            counts = self.cache.setdefault(event["name"], {"hits": 0, "misses": 0})
+            counts["hits" if event["hit"] else "misses"] += 1
+
+    @classmethod
+    def from_jsonl(cls, path=DEFAULT_METRICS_PATH):
+        """
+        Rebuild a registry (without a file sink) from an event log, e.g. for the debug page.
+        """
+        metrics = cls(path=None)
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        metrics._apply(json.loads(line))
+                    except (ValueError, KeyError):
+                        continue
+        return metrics
+
+    def summary(self):
+        with self._lock:
+            return {
+                "latency": {
+                    name: {
+                        "count": histogram.count,
+                        "errors": self.errors.get(name, 0),
+                        "mean": histogram.sum / histogram.count,
+                        "p50": histogram.quantile(0.5),
+                        "p95": histogram.quantile(0.95),
+                        "max": histogram.max,
+                    }
+                    for name, histogram in sorted(self.latency.items())
+                },
+                "usage": {model: dict(totals) for model, totals in sorted(self.usage.items())},
+                "span_usage": {span: dict(totals) for span, totals in sorted(self.span_usage.items())},
+                "cache": {
+                    name: dict(counts, hit_ratio=counts["hits"] / (counts["hits"] + counts["misses"]))
+                    for name, counts in sorted(self.cache.items())
+                },
+            }
+
+    def prometheus_text(self):
+        """
+        Render the registry in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            lines += ["# HELP app_call_seconds Latency of instrumented calls.", "# TYPE app_call_seconds histogram"]
+            for name, histogram in sorted(self.latency.items()):
+                cumulative = 0
+                for position, count in enumerate(histogram.counts):
+                    cumulative += count
+                    bound = f"{histogram.buckets[position]:g}" if position < len(histogram.buckets) else "+Inf"
+                    lines.append(f'app_call_seconds_bucket{{name="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'app_call_seconds_sum{{name="{name}"}} {histogram.sum:.6f}')
+                lines.append(f'app_call_seconds_count{{name="{name}"}} {histogram.count}')
+            lines += ["# HELP app_call_errors_total Instrumented calls that raised.", "# TYPE app_call_errors_total counter"]
+            for name, count in sorted(self.errors.items()):
+                lines.append(f'app_call_errors_total{{name="{name}"}} {count}')
+            lines += ["# HELP llm_tokens_total LLM tokens used.", "# TYPE llm_tokens_total counter"]
+            for model, totals in sorted(self.usage.items()):
+                for kind in ("prompt", "completion"):
+                    lines.append(f'llm_tokens_total{{model="{model}",kind="{kind}"}} {totals[f"{kind}_tokens"]}')
+            lines += ["# HELP llm_cost_usd_total Estimated LLM cost in US dollars.", "# TYPE llm_cost_usd_total counter"]
+            for model, totals in sorted(self.usage.items()):
+                lines.append(f'llm_cost_usd_total{{model="{model}"}} {totals["cost"]:.6f}')
+            lines += ["# HELP cache_requests_total Cache lookups by result.", "# TYPE cache_requests_total counter"]
+            for name, counts in sorted(self.cache.items()):
+                lines.append(f'cache_requests_total{{cache="{name}",result="hit"}} {counts["hits"]}')
+                lines.append(f'cache_requests_total{{cache="{name}",result="miss"}} {counts["misses"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=DEFAULT_PROMETHEUS_PATH):
+        """
+        Write the Prometheus text atomically, for node_exporter's textfile collector.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(temporary_path, path)
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def _active(name):
+    stack = _local.__dict__.setdefault("spans", [])
+    stack.append(name)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+@contextmanager
+def span(name, registry=None):
+    """
+    Time the enclosed block as name; LLM usage recorded inside it is attributed to name.
+    """
+    registry = registry or metrics
+    start = time.perf_counter()
+    error = False
+    try:
+        with _active(name):
+            yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        registry.observe(name, time.perf_counter() - start, error=error)
+
+
+def timed(name=None, registry=None):
+    """
+    Decorator recording the latency of every call. Generators (streamed responses) are
+    timed until they are exhausted rather than until they are created.
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                with _active(span_name):
+                    result = func(*args, **kwargs)
+            except BaseException:
+                (registry or metrics).observe(span_name, time.perf_counter() - start, error=True)
+                raise
+            if inspect.isgenerator(result):
+                return _timed_generator(span_name, result, start, registry)
+            (registry or metrics).observe(span_name, time.perf_counter() - start)
+            return result
+        return wrapper
+    return decorator
+
+
+def _timed_generator(name, generator, start, registry):
+    # The span is only active while the wrapped generator runs, not between chunks
+    error = False
+    try:
+        while True:
+            with _active(name):
+                try:
+                    chunk = next(generator)
+                except StopIteration:
+                    return
+            yield chunk
+    except BaseException:
+        error = True
+        raise
+    finally:
+        (registry or metrics).observe(name, time.perf_counter() - start, error=error)
+
+
+if __name__ == "__main__":
+    # Convert the event log into a Prometheus text file: python instrumentation.py [events.jsonl] [out.prom]
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_METRICS_PATH
+    target = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_PROMETHEUS_PATH
+    Metrics.from_jsonl(source).write_prometheus(target)
+    print(f"Wrote {target}")
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from instrumentation import metrics
+
+# Shared on-disk cache for chat completions, used by all three Streamlit apps.
+# Entries survive process restarts, so a repeated prompt is answered from disk
+# instead of going back to the OpenAI API.
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+DEFAULT_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "llm_responses.sqlite3"))
+DEFAULT_TTL = 7 * 24 * 60 * 60  # One week
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def normalize_prompt(text):
+    """
+    Collapse whitespace so that prompts differing only in formatting share a cache entry.
+    """
+    return re.sub(r"\s+", " ", str(text)).strip()
+
+
+def make_cache_key(model, messages, **params):
+    """
+    Build a stable cache key from the normalized prompt, the model and the request parameters.
+    """
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": message["role"], "content": normalize_prompt(message["content"])}
+            for message in messages
+        ],
+        "params": params,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    SQLite-backed response cache with a TTL, LRU eviction above max_entries and hit/miss counters.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+            self._conn.commit()
+
+    def get(self, key):
+        """
+        Return the cached value for key, or None if it is missing or has expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Store value under key and evict the least recently used entries above max_entries.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        """
+        Return the hit/miss counters for this process and the number of stored entries.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Return the process-wide cache shared by every app.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+        return _default_cache
+
+
+def cached_completion(client, messages, model="gpt-3.5-turbo", cache=None, validate=None, **params):
+    """
+    Return the completion text for messages, answering from the cache when possible.
+    If validate is given, only responses for which it returns True are stored.
+    cache=False bypasses the cache, for requests that must get a fresh answer every time.
+    """
+    if cache is False:
+        response = client.chat.completions.create(model=model, messages=messages, **params)
+        return response.choices[0].message.content
+    if cache is None:
+        cache = get_default_cache()
+
+    key = make_cache_key(model, messages, **params)
+    cached = cache.get(key)
+    metrics.record_cache("llm_response", cached is not None)
+    if cached is not None:
+        return cached
+
+    response = client.chat.completions.create(model=model, messages=messages, **params)
+    content = response.choices[0].message.content
+    if content is not None and (validate is None or validate(content)):
+        cache.set(key, content)
+    return content
@@ -0,0 +1,251 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from instrumentation import metrics as default_metrics
+from llm_cache import make_cache_key
+
+# Process-wide gateway in front of the OpenAI API, shared by every app and every
+# Streamlit session: one pooled HTTP client, a requests/tokens-per-minute rate
+# limiter, retries with exponential backoff and jitter, and coalescing of
+# identical in-flight requests.
+# Set OPENAI_API_KEY (and optionally OPENAI_BASE_URL) in the environment, or
+# replace "your_api_key_here" with your actual OpenAI API key.
+DEFAULT_API_KEY = "your_api_key_here"
+REQUESTS_PER_MINUTE = int(os.environ.get("LLM_REQUESTS_PER_MINUTE", 500))
+TOKENS_PER_MINUTE = int(os.environ.get("LLM_TOKENS_PER_MINUTE", 200000))
+MAX_RETRIES = 5
+BASE_DELAY = 0.5  # Seconds before the first retry
+MAX_DELAY = 30.0
+MAX_CONNECTIONS = 20
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most capacity tokens.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        """
+        Block until amount tokens are available and take them. Returns the time spent waiting.
+        """
+        # Requests larger than the bucket would never fit; let them through once it is full
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def estimate_prompt_tokens(messages):
+    """
+    Rough prompt token estimate (about four characters per token).
+    """
+    return sum(len(str(message.get("content", ""))) for message in messages) // 4 + 4 * len(messages)
+
+
+def estimate_tokens(messages, max_tokens=None):
+    """
+    Rough prompt-plus-completion token estimate for rate limiting.
+    """
+    return estimate_prompt_tokens(messages) + (max_tokens or 256)
+
+
+def backoff_delay(attempt, retry_after=None, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    """
+    Exponential backoff with full jitter, honouring a server-provided Retry-After.
+    """
+    if retry_after is not None:
+        return min(max_delay, retry_after)
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def _status_code(error):
+    status_code = getattr(error, "status_code", None)
+    if status_code is None and getattr(error, "response", None) is not None:
+        status_code = getattr(error.response, "status_code", None)
+    return status_code
+
+
+def _is_retryable(error):
+    status_code = _status_code(error)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    # Timeouts and dropped connections carry no status code
+    return type(error).__name__ in ("APITimeoutError", "APIConnectionError", "TimeoutError", "ConnectionError")
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def create_client(api_key=None, base_url=None, max_connections=MAX_CONNECTIONS):
+    """
+    Create an OpenAI client on a pooled HTTP connection. Retries are left to the gateway.
+    """
+    import httpx
+    from openai import OpenAI
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=httpx.Timeout(60.0, connect=10.0),
+    )
+    return OpenAI(
+        api_key=api_key or os.environ.get("OPENAI_API_KEY", DEFAULT_API_KEY),
+        base_url=base_url or os.environ.get("OPENAI_BASE_URL") or None,
+        http_client=http_client,
+        max_retries=0,
+    )
+
+
+class _GatewayCompletions:
+    def __init__(self, gateway):
+        self._gateway = gateway
+
+    def create(self, model, messages, **params):
+        return self._gateway.create(model, messages, **params)
+
+
+class LLMGateway:
+    """
+    Drop-in replacement for an OpenAI client (exposes chat.completions.create) that adds
+    rate limiting, retries and request coalescing around a shared underlying client.
+    """
+
+    def __init__(self, client=None, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE,
+                 max_retries=MAX_RETRIES, base_delay=BASE_DELAY, max_delay=MAX_DELAY, sleep=time.sleep, metrics=None):
+        self._client = client
+        self._client_lock = threading.Lock()
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.metrics = metrics if metrics is not None else default_metrics
+        self.stats = {"requests": 0, "coalesced": 0, "retries": 0, "failures": 0, "throttled_seconds": 0.0}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=_GatewayCompletions(self))
+
+    @property
+    def client(self):
+        # The underlying client (and its connection pool) is created on first use
+        with self._client_lock:
+            if self._client is None:
+                self._client = create_client()
+            return self._client
+
+    def create(self, model, messages, **params):
+        # Streams cannot be shared between callers, so only regular requests are coalesced
+        if params.get("stream"):
+            return self._call_with_retries(model, messages, **params)
+
+        key = make_cache_key(model, messages, **params)
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            response = self._call_with_retries(model, messages, **params)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _call_with_retries(self, model, messages, **params):
+        tokens = estimate_tokens(messages, params.get("max_tokens"))
+        attempt = 0
+        while True:
+            waited = self.request_bucket.acquire() + self.token_bucket.acquire(tokens)
+            with self._lock:
+                self.stats["requests"] += 1
+                self.stats["throttled_seconds"] += waited
+            start = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(model=model, messages=messages, **params)
+            except Exception as e:
+                self.metrics.observe("openai.chat.completions.create", time.perf_counter() - start, error=True)
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    with self._lock:
+                        self.stats["failures"] += 1
+                    raise
+                with self._lock:
+                    self.stats["retries"] += 1
+                self.sleep(backoff_delay(attempt, _retry_after(e), self.base_delay, self.max_delay))
+                attempt += 1
+                continue
+
+            if params.get("stream"):
+                return self._metered_stream(model, messages, response, start)
+            self.metrics.observe("openai.chat.completions.create", time.perf_counter() - start)
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self.metrics.record_usage(model, usage.prompt_tokens, usage.completion_tokens)
+            else:
+                content = response.choices[0].message.content or ""
+                self.metrics.record_usage(model, estimate_prompt_tokens(messages), len(content) // 4, estimated=True)
+            return response
+
+    def _metered_stream(self, model, messages, stream, start):
+        # Streams report no usage, so tokens are estimated from the text once the stream ends
+        characters = 0
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                characters += len(chunk.choices[0].delta.content)
+            yield chunk
+        self.metrics.observe("openai.chat.completions.create (stream)", time.perf_counter() - start)
+        self.metrics.record_usage(model, estimate_prompt_tokens(messages), characters // 4, estimated=True)
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """
+    Return the process-wide gateway shared by all apps and Streamlit sessions.
+    """
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
@@ -0,0 +1,52 @@
+import time
+
+from instrumentation import metrics
+from llm_cache import cached_completion, get_default_cache, make_cache_key
+
+# Streaming variant of cached_completion: yields text as it arrives so the apps
+# can render it with st.write_stream, and stores the full answer in the cache.
+# Time to first token and total time of streamed answers go to the latency histograms.
+
+
+def stream_completion(client, messages, model="gpt-3.5-turbo", cache=None, **params):
+    """
+    Yield the completion text for messages chunk by chunk. A cached answer is yielded at once;
+    otherwise the response is streamed and written to the cache once it completes.
+    """
+    if cache is None:
+        cache = get_default_cache()
+
+    start = time.perf_counter()
+    key = make_cache_key(model, messages, **params)
+    cached = cache.get(key)
+    metrics.record_cache("llm_response", cached is not None)
+    if cached is not None:
+        yield cached
+        return
+
+    time_to_first_token = None
+    parts = []
+    for chunk in client.chat.completions.create(model=model, messages=messages, stream=True, **params):
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - start
+            parts.append(delta)
+            yield delta
+
+    total_time = time.perf_counter() - start
+    metrics.observe("llm_stream.ttft", time_to_first_token if time_to_first_token is not None else total_time)
+    metrics.observe("llm_stream.total", total_time)
+    # Only complete responses are cached; an abandoned stream never reaches this point
+    cache.set(key, "".join(parts))
+
+
+def completion(client, messages, stream=False, **params):
+    """
+    Return either a chunk iterator (stream=True) or the full completion text.
+    """
+    if stream:
+        return stream_completion(client, messages, **params)
+    return cached_completion(client, messages, **params)
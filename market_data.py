@@ -0,0 +1,245 @@
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+from instrumentation import metrics, timed
+
+# Local market-data store used by financial_analysis.py. Daily price history is
+# kept in one Parquet file per ticker together with the date ranges already
+# fetched, so only the missing part of a requested window goes to the provider.
+DEFAULT_STORE_DIR = os.environ.get(
+    "MARKET_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "market_data"),
+)
+DEFAULT_INFO_TTL = 24 * 60 * 60  # Refresh ticker info once a day
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def _merge_ranges(ranges):
+    """
+    Merge overlapping or touching [start, end) date ranges.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(covered, start, end):
+    """
+    Return the parts of [start, end) that are not inside any of the covered ranges.
+    """
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in _merge_ranges(covered):
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = max(cursor, covered_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class YFinanceProvider:
+    """
+    Fetches prices from Yahoo Finance, downloading several tickers in one batched request.
+    Like every provider, download() leaves tickers whose download failed out of its result;
+    an empty frame means the ticker had no rows in the range.
+    """
+
+    @timed("yfinance.download")
+    def download(self, tickers, start, end):
+        import yfinance as yf
+
+        data = yf.download(list(tickers), start=start, end=end, group_by="ticker", progress=False, threads=True)
+        # yf.download reports failures here instead of raising
+        failed = set(getattr(yf.shared, "_ERRORS", {}))
+        frames = {}
+        for ticker in tickers:
+            if ticker.upper() in failed:
+                continue
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker in data.columns.get_level_values(0):
+                    frame = data[ticker]
+                elif ticker in data.columns.get_level_values(1):
+                    frame = data.xs(ticker, axis=1, level=1)
+                else:
+                    frame = pd.DataFrame()
+            else:
+                frame = data
+            frames[ticker] = frame.dropna(how="all")
+        return frames
+
+    @timed("yfinance.info")
+    def info(self, ticker):
+        import yfinance as yf
+
+        return yf.Ticker(ticker).info
+
+
+class CSVProvider:
+    """
+    Serves prices from local fixture files `<directory>/<TICKER>.csv` (with a Date column)
+    and optional `<directory>/<TICKER>.info.json`, so the store can be used offline.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.download_calls = []
+
+    def download(self, tickers, start, end):
+        self.download_calls.append((tuple(tickers), start, end))
+        frames = {}
+        for ticker in tickers:
+            path = os.path.join(self.directory, f"{ticker}.csv")
+            if not os.path.exists(path):
+                frames[ticker] = pd.DataFrame()
+                continue
+            frame = pd.read_csv(path, index_col="Date", parse_dates=True).sort_index()
+            frames[ticker] = frame.loc[(frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))]
+        return frames
+
+    def info(self, ticker):
+        path = os.path.join(self.directory, f"{ticker}.info.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+
+class MarketDataStore:
+    """
+    Columnar (Parquet) price store keyed by ticker and date with incremental range fill.
+    """
+
+    def __init__(self, provider=None, directory=DEFAULT_STORE_DIR, info_ttl=DEFAULT_INFO_TTL):
+        self.provider = provider if provider is not None else YFinanceProvider()
+        self.directory = directory
+        self.info_ttl = info_ttl
+        self._frames = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._coverage_path = os.path.join(directory, "coverage.json")
+        self._info_path = os.path.join(directory, "info.json")
+        self._coverage = self._load_json(self._coverage_path)
+        self._info = self._load_json(self._info_path)
+
+    @staticmethod
+    def _load_json(path):
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _save_json(path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+
+    def _parquet_path(self, ticker):
+        return os.path.join(self.directory, f"{ticker}.parquet")
+
+    def _covered(self, ticker):
+        return [(date.fromisoformat(start), date.fromisoformat(end)) for start, end in self._coverage.get(ticker, [])]
+
+    def _frame(self, ticker):
+        if ticker not in self._frames:
+            path = self._parquet_path(ticker)
+            self._frames[ticker] = pd.read_parquet(path) if os.path.exists(path) else pd.DataFrame()
+        return self._frames[ticker]
+
+    def _store(self, ticker, new_data, fetched_range):
+        frame = self._frame(ticker)
+        if not new_data.empty:
+            frame = pd.concat([frame, new_data]) if not frame.empty else new_data.copy()
+            frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+            frame.to_parquet(self._parquet_path(ticker))
+            self._frames[ticker] = frame
+
+        covered = self._covered(ticker)
+        # A successful download covers its range even without rows (holidays, halted tickers)
+        if fetched_range[1] > fetched_range[0]:
+            covered.append(fetched_range)
+        self._coverage[ticker] = [[start.isoformat(), end.isoformat()] for start, end in _merge_ranges(covered)]
+
+    def get_prices(self, tickers, start, end):
+        """
+        Return {ticker: DataFrame} for [start, end), fetching only the dates not already stored.
+        Tickers missing the same date range are downloaded together in one batched call.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        start, end = _to_date(start), _to_date(end)
+        # Today's bar is still changing, so never mark it (or the future) as covered
+        coverage_end = min(end, date.today())
+
+        with self._lock:
+            requests = {}
+            for ticker in tickers:
+                gaps = missing_ranges(self._covered(ticker), start, end)
+                metrics.record_cache("market_data", not gaps)
+                for gap in gaps:
+                    requests.setdefault(gap, []).append(ticker)
+
+        # Downloads run without the lock so other requests are served meanwhile
+        downloads = {gap: self.provider.download(gap_tickers, *gap) for gap, gap_tickers in requests.items()}
+
+        with self._lock:
+            for (gap_start, gap_end), gap_tickers in requests.items():
+                fetched = downloads[(gap_start, gap_end)]
+                for ticker in gap_tickers:
+                    if ticker not in fetched:
+                        continue  # Failed; the range is requested again next time
+                    covered_end = min(gap_end, max(gap_start, coverage_end))
+                    self._store(ticker, fetched[ticker], (gap_start, covered_end))
+            if requests:
+                self._save_json(self._coverage_path, self._coverage)
+
+            results = {}
+            for ticker in tickers:
+                frame = self._frame(ticker)
+                if frame.empty:
+                    results[ticker] = frame.copy()
+                else:
+                    results[ticker] = frame.loc[(frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))].copy()
+            return results
+
+    def get_stock_data(self, ticker, start, end):
+        return self.get_prices([ticker], start, end)[ticker]
+
+    def get_info(self, ticker):
+        """
+        Return the provider's info dictionary for ticker, cached on disk for info_ttl seconds.
+        """
+        with self._lock:
+            cached = self._info.get(ticker)
+            fresh = cached is not None and time.time() - cached["fetched_at"] < self.info_ttl
+            metrics.record_cache("ticker_info", fresh)
+            if fresh:
+                return cached["info"]
+
+        info = self.provider.info(ticker)
+        with self._lock:
+            self._info[ticker] = {"fetched_at": time.time(), "info": info}
+            self._save_json(self._info_path, self._info)
+        return info
+
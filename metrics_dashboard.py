@@ -0,0 +1,63 @@
+import streamlit as st
+import pandas as pd
+from instrumentation import DEFAULT_METRICS_PATH, DEFAULT_PROMETHEUS_PATH, Metrics
+
+# Debug page for the instrumentation event log written by the three apps.
+# Run it next to them with: streamlit run metrics_dashboard.py
+
+st.title("Latency and Cost Instrumentation")
+
+metrics_path = st.sidebar.text_input("Event log", DEFAULT_METRICS_PATH)
+if st.sidebar.button("Refresh"):
+    st.rerun()
+
+registry = Metrics.from_jsonl(metrics_path)
+summary = registry.summary()
+
+if not summary["latency"] and not summary["usage"] and not summary["cache"]:
+    st.info(f"No events recorded in {metrics_path} yet. Use one of the apps and refresh this page.")
+    st.stop()
+
+# Latency per instrumented call, in milliseconds
+st.header("Latency")
+if summary["latency"]:
+    latency = pd.DataFrame.from_dict(summary["latency"], orient="index")
+    for column in ("mean", "p50", "p95", "max"):
+        latency[column] = (latency[column] * 1000).round(1)
+    st.dataframe(latency.rename(columns={"mean": "mean (ms)", "p50": "p50 (ms)", "p95": "p95 (ms)", "max": "max (ms)"}))
+    st.bar_chart(latency["p95"])
+else:
+    st.write("No timed calls recorded.")
+
+# Token usage and estimated cost, per model and per calling function
+st.header("Tokens and Estimated Cost")
+if summary["usage"]:
+    total_cost = sum(totals["cost"] for totals in summary["usage"].values())
+    total_tokens = sum(totals["prompt_tokens"] + totals["completion_tokens"] for totals in summary["usage"].values())
+    col1, col2 = st.columns(2)
+    col1.metric("Total tokens", f"{total_tokens:,}")
+    col2.metric("Estimated cost", f"${total_cost:.4f}")
+    st.subheader("By model")
+    st.dataframe(pd.DataFrame.from_dict(summary["usage"], orient="index"))
+    st.subheader("By function")
+    st.dataframe(pd.DataFrame.from_dict(summary["span_usage"], orient="index"))
+    st.caption("Streamed responses report no usage, so their tokens are estimated from the text length.")
+else:
+    st.write("No LLM requests recorded.")
+
+# Cache hit ratios
+st.header("Caches")
+if summary["cache"]:
+    cache = pd.DataFrame.from_dict(summary["cache"], orient="index")
+    st.dataframe(cache)
+    st.bar_chart(cache["hit_ratio"])
+else:
+    st.write("No cache lookups recorded.")
+
+# Prometheus export
+st.header("Export")
+prometheus_text = registry.prometheus_text()
+st.download_button("Download Prometheus metrics", prometheus_text, file_name="metrics.prom", mime="text/plain")
+if st.button("Write Prometheus text file"):
+    registry.write_prometheus(DEFAULT_PROMETHEUS_PATH)
+    st.success(f"Wrote {DEFAULT_PROMETHEUS_PATH}")
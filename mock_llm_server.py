@@ -0,0 +1,117 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the OpenAI chat completions endpoint that injects latency
+# and 429 responses, for exercising llm_gateway without the network.
+# Point the apps at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, error_rate=0.0, retry_after=None, responder=None, seed=None):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.responder = responder or (lambda messages: f"Mock answer to: {messages[-1]['content'][:80]}")
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with server._lock:
+            server.requests += 1
+            rate_limited = server.random.random() < server.error_rate
+            if rate_limited:
+                server.rate_limited += 1
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+        if rate_limited:
+            headers = {"Retry-After": str(server.retry_after)} if server.retry_after is not None else None
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}}, headers)
+            return
+
+        content = server.responder(request.get("messages", []))
+        created = int(time.time())
+        model = request.get("model", "gpt-3.5-turbo")
+        if request.get("stream"):
+            self._stream(content, created, model)
+            return
+        self._send_json(200, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    def _stream(self, content, created, model):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        words = content.split(" ")
+        for position, word in enumerate(words):
+            delta = word if position == 0 else f" {word}"
+            chunk = {
+                "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def start_mock_server(port=0, **options):
+    """
+    Start the mock server on a background thread and return it; call shutdown() to stop it.
+    """
+    server = MockLLMServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat completions server with injected latency and 429s.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds of latency added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After header sent with 429 responses")
+    args = parser.parse_args()
+
+    mock_server = MockLLMServer(("127.0.0.1", args.port), latency=args.latency, error_rate=args.error_rate,
+                                retry_after=args.retry_after)
+    print(f"Mock LLM server listening on {mock_server.base_url}")
+    mock_server.serve_forever()
@@ -0,0 +1,84 @@
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+# Rerun bookkeeping for the Streamlit apps: records which stages ran on each
+# (full or fragment) rerun and how long they took, and shows them in a sidebar panel.
+MAX_RUNS_KEPT = 20
+
+
+def _runs():
+    return st.session_state.setdefault('_pipeline_runs', [])
+
+
+def _new_run(scope):
+    runs = _runs()
+    runs.append({"run": runs[-1]["run"] + 1 if runs else 1, "scope": scope, "stages": []})
+    del runs[:-MAX_RUNS_KEPT]
+
+
+def begin_run():
+    """
+    Mark the start of a full script rerun. Call at the top of the app.
+    """
+    st.session_state['_pipeline_full_run'] = True
+    _new_run("full rerun")
+
+
+def fragment_run(name):
+    """
+    Mark the start of a fragment. Fragment reruns get their own record; when the
+    fragment runs as part of a full rerun its stages are added to that rerun.
+    """
+    if not st.session_state.get('_pipeline_full_run') or not _runs():
+        _new_run(f"fragment: {name}")
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a pipeline stage and record it for the current rerun.
+    """
+    if not _runs():
+        _new_run("full rerun")
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _runs()[-1]["stages"].append({"stage": name, "seconds": time.perf_counter() - start})
+
+
+def write_stream_cached(key, make_stream):
+    """
+    Stream a response the first time key is seen in this session and replay the stored
+    text on later reruns, so unrelated widget changes never repeat the request.
+    """
+    responses = st.session_state.setdefault('_pipeline_responses', {})
+    if key in responses:
+        st.write(responses[key])
+    else:
+        responses[key] = st.write_stream(make_stream())
+    return responses[key]
+
+
+def end_run():
+    """
+    Mark the end of a full rerun and render the instrumentation panel in the sidebar.
+    """
+    st.session_state['_pipeline_full_run'] = False
+    with st.sidebar.expander("Rerun instrumentation"):
+        runs = _runs()
+        if not runs:
+            st.write("No stages recorded yet.")
+            return
+        current = runs[-1]
+        st.write(f"Rerun {current['run']} ({current['scope']}): "
+                 f"{sum(entry['seconds'] for entry in current['stages']) * 1000:.1f} ms in stages")
+        import pandas as pd
+
+        st.dataframe(pd.DataFrame([
+            {"run": run["run"], "scope": run["scope"], "stage": entry["stage"], "ms": round(entry["seconds"] * 1000, 1)}
+            for run in reversed(runs) for entry in run["stages"]
+        ]), hide_index=True)
+        st.caption("Fragment reruns are listed here on the next full rerun.")
@@ -0,0 +1,177 @@
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+# Turns price frames into compact, token-bounded text summaries for LLM prompts,
+# instead of sending DataFrame.to_string() of the whole history.
+DEFAULT_TOKEN_BUDGET = 1500
+MAX_TABLE_ROWS = 60
+MAX_NOTABLE_MOVES = 5
+MIN_STATISTICS_LINES = 2  # Period and close change are kept while any other statistic is dropped
+ESTIMATE_SAMPLE_ROWS = 50  # Rows rendered to estimate the token count of a whole frame
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional; fall back to a local approximation
+    _ENCODING = None
+
+
+def count_tokens(text):
+    """
+    Count the tokens in text locally, using tiktoken when it is installed and an approximation otherwise.
+    """
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # Roughly matches cl100k: words of up to ~4 letters and groups of up to 3 digits are one token
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        if piece.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece.isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += 1
+    return tokens
+
+
+def downsample_ohlcv(frame, rows):
+    """
+    Aggregate an OHLCV frame into at most `rows` consecutive buckets.
+    """
+    if len(frame) <= rows:
+        return frame
+    buckets = np.arange(len(frame)) * rows // len(frame)
+    aggregations = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    aggregated = frame.groupby(buckets).agg({column: how for column, how in aggregations.items() if column in frame})
+    # Label each bucket with its first date
+    aggregated.index = frame.index[np.unique(buckets, return_index=True)[1]]
+    return aggregated
+
+
+def _close(frame):
+    close = frame["Close"]
+    # yfinance may return a one-column frame instead of a series
+    return close.iloc[:, 0] if isinstance(close, pd.DataFrame) else close
+
+
+def _key_statistics(frame):
+    close = _close(frame)
+    first, last = close.iloc[0], close.iloc[-1]
+    running_max = close.cummax()
+    drawdown = close / running_max - 1
+    trough = drawdown.idxmin()
+    peak = close.loc[:trough].idxmax()
+    lines = [
+        f"Period: {frame.index[0]:%Y-%m-%d} to {frame.index[-1]:%Y-%m-%d} ({len(frame)} trading days)",
+        f"Close: first {first:.2f}, last {last:.2f}, change {(last / first - 1) * 100:+.2f}%",
+        f"Range: high {close.max():.2f} ({close.idxmax():%Y-%m-%d}), low {close.min():.2f} ({close.idxmin():%Y-%m-%d})",
+        f"Max drawdown: {drawdown.min() * 100:.2f}% from {peak:%Y-%m-%d} to {trough:%Y-%m-%d}",
+    ]
+    returns = close.pct_change().dropna()
+    if not returns.empty:
+        lines.append(f"Daily return: mean {returns.mean() * 100:+.3f}%, volatility {returns.std() * 100:.3f}%")
+    if "Volume" in frame:
+        lines.append(f"Average volume: {float(frame['Volume'].mean()):,.0f}")
+    return lines
+
+
+def _notable_moves(frame, count):
+    returns = _close(frame).pct_change().dropna()
+    largest = returns.abs().nlargest(count).index.sort_values()
+    return [f"{day:%Y-%m-%d}: {returns.loc[day] * 100:+.2f}%" for day in largest]
+
+
+def _table(frame, rows):
+    table = downsample_ohlcv(frame, rows)
+    columns = [column for column in ["Open", "High", "Low", "Close", "Volume"] if column in table]
+    lines = ["Date," + ",".join(columns)]
+    for day, values in zip(table.index, table[columns].to_numpy()):
+        formatted = [f"{value:.0f}" if column == "Volume" else f"{value:.2f}" for column, value in zip(columns, values)]
+        lines.append(f"{pd.Timestamp(day):%Y-%m-%d}," + ",".join(formatted))
+    return lines
+
+
+def summarize_prices(frame, ticker, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Summarize a price frame as key statistics, drawdown, notable moves and a downsampled
+    OHLCV table, shrinking the table, then the move list, then the statistics until the
+    text fits token_budget. The period and close change are always kept, so a very small
+    budget can still be exceeded; compact_prices enforces its budget by dropping tickers.
+    """
+    if not frame.empty:
+        # Days without a close (e.g. a delisted ticker's padding) would give NaT dates
+        frame = frame.loc[_close(frame).notna()]
+    if frame.empty:
+        return f"{ticker}: no data available."
+
+    rows, moves = min(len(frame), MAX_TABLE_ROWS), MAX_NOTABLE_MOVES
+    statistics = _key_statistics(frame)
+    while True:
+        sections = [f"{ticker} summary:"] + statistics
+        if moves:
+            sections += ["Largest daily moves:"] + _notable_moves(frame, moves)
+        if rows:
+            sections += [f"OHLCV downsampled to {min(rows, len(frame))} rows:"] + _table(frame, rows)
+        text = "\n".join(sections)
+
+        if count_tokens(text) <= token_budget or (rows == 0 and moves == 0 and len(statistics) <= MIN_STATISTICS_LINES):
+            return text
+        if rows > 0:
+            rows = rows // 2 if rows > 4 else 0
+        elif moves > 0:
+            moves -= 1
+        else:
+            statistics = statistics[:-1]
+
+
+def compact_prices(stocks_data, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Summarize several tickers within one shared budget and report the prompt size before and after.
+    If the minimal summaries of all tickers still exceed the budget, the last tickers are left out
+    and named in a closing note. Raises ValueError if not even one ticker fits.
+    Returns (text, report) where report holds the estimated token count of the full data and the
+    token count of the compacted text.
+    """
+    per_ticker_budget = max(1, token_budget // max(1, len(stocks_data)))
+    summaries = [summarize_prices(frame, ticker, per_ticker_budget) for ticker, frame in stocks_data.items()]
+    tickers = list(stocks_data)
+    kept = len(summaries)
+    while True:
+        omitted = tickers[kept:]
+        text = "\n\n".join(summaries[:kept] + ([f"Omitted to fit the token budget: {', '.join(omitted)}"] if omitted else []))
+        if count_tokens(text) <= token_budget or not summaries:
+            break
+        if kept == 1:
+            raise ValueError(f"A token budget of {token_budget} is too small to summarize any of {len(tickers)} tickers")
+        kept -= 1
+
+    before = sum(estimate_frame_tokens(frame) for frame in stocks_data.values())
+    report = prompt_size_report(before, count_tokens(text))
+    return text, report
+
+
+def estimate_frame_tokens(frame):
+    """
+    Estimate the tokens of frame.to_string() from its first rows, scaled by the number of
+    rows, without rendering the whole frame.
+    """
+    if len(frame) <= ESTIMATE_SAMPLE_ROWS:
+        return count_tokens(frame.to_string())
+    return round(count_tokens(frame.head(ESTIMATE_SAMPLE_ROWS).to_string()) * len(frame) / ESTIMATE_SAMPLE_ROWS)
+
+
+def prompt_size_report(before, after):
+    """
+    Compare the token count of the original and the compacted prompt.
+    """
+    return {
+        "tokens_before": before,
+        "tokens_after": after,
+        "saved_ratio": 1 - after / before if before else 0.0,
+    }
@@ -0,0 +1,178 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from question_index import DEFAULT_THRESHOLD, QuestionIndex, jaccard, normalize_question, shingles
+from quiz_questions import DEFAULT_QUESTIONS, Question
+
+# Persistent question bank shared by every quiz session. Sessions page questions
+# in lazily instead of holding (or regenerating) the whole bank. The MinHash LSH
+# band hashes of each question are stored next to it, so near-duplicate checks
+# query candidates by band instead of loading the bank into memory.
+DEFAULT_BANK_PATH = os.environ.get(
+    "QUESTION_BANK_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "question_bank.sqlite3"),
+)
+PAGE_SIZE = 20
+BANDS_SCHEMA_VERSION = 1  # PRAGMA user_version once every question has its band hashes
+
+
+class QuestionBank:
+    """
+    SQLite-backed store of quiz questions indexed by category and topic.
+    Pages are read with keyset pagination on the row id, so the cost of a page
+    does not depend on how deep into the bank a session is.
+    """
+
+    def __init__(self, path=DEFAULT_BANK_PATH, similarity_threshold=DEFAULT_THRESHOLD):
+        self.path = path
+        self.similarity_threshold = similarity_threshold
+        self._minhash = QuestionIndex(threshold=similarity_threshold)
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                "id INTEGER PRIMARY KEY, category TEXT NOT NULL, topic TEXT NOT NULL, "
+                "question TEXT NOT NULL, normalized TEXT NOT NULL UNIQUE, options TEXT NOT NULL, "
+                "correct_answer TEXT NOT NULL, explanation TEXT, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_category_topic ON questions (category, topic, id)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS question_bands ("
+                "band INTEGER NOT NULL, hash INTEGER NOT NULL, question_id INTEGER NOT NULL, "
+                "PRIMARY KEY (band, hash, question_id)) WITHOUT ROWID"
+            )
+            self._conn.commit()
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < BANDS_SCHEMA_VERSION:
+                self._index_unbanded()
+
+        if self.count() == 0:
+            for category, question in DEFAULT_QUESTIONS:
+                self.add(question, category)
+
+    def _index_unbanded(self):
+        # Banks created before the band table existed are indexed once, in chunks
+        last_id = 0
+        while True:
+            rows = self._conn.execute(
+                "SELECT id, question FROM questions WHERE id > ? ORDER BY id LIMIT 1000", (last_id,)
+            ).fetchall()
+            if not rows:
+                break
+            for question_id, text in rows:
+                self._store_bands(question_id, self._minhash.band_hashes(text))
+            self._conn.commit()
+            last_id = rows[-1][0]
+        self._conn.execute(f"PRAGMA user_version = {BANDS_SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def _store_bands(self, question_id, band_hashes):
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO question_bands (band, hash, question_id) VALUES (?, ?, ?)",
+            [(band, band_hash, question_id) for band, band_hash in enumerate(band_hashes)],
+        )
+
+    def _insert(self, question, category, topic, band_hashes):
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO questions "
+            "(category, topic, question, normalized, options, correct_answer, explanation, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (category, _normalize_topic(topic), question.question, normalize_question(question.question),
+             json.dumps(question.options), question.correct_answer, question.explanation, time.time()),
+        )
+        if cursor.rowcount == 0:
+            self._conn.commit()
+            return False
+        self._store_bands(cursor.lastrowid, band_hashes)
+        self._conn.commit()
+        question.bank_id = cursor.lastrowid
+        return True
+
+    def _find_duplicate(self, text, band_hashes):
+        candidates = self._conn.execute(
+            "SELECT DISTINCT q.question FROM question_bands b JOIN questions q ON q.id = b.question_id "
+            f"WHERE (b.band, b.hash) IN (VALUES {', '.join(['(?, ?)'] * len(band_hashes))})",
+            [value for band, band_hash in enumerate(band_hashes) for value in (band, band_hash)],
+        ).fetchall()
+        shingle_set = shingles(text)
+        best = None
+        for (candidate,) in candidates:
+            similarity = jaccard(shingle_set, shingles(candidate))
+            if similarity >= self.similarity_threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        return best
+
+    def add(self, question, category, topic=""):
+        """
+        Store question and set its bank_id. Returns False if the same question text is already stored.
+        """
+        band_hashes = self._minhash.band_hashes(question.question)
+        with self._lock:
+            return self._insert(question, category, topic, band_hashes)
+
+    def find_duplicate(self, text):
+        """
+        Return (existing_text, similarity) for the closest stored question at or above the
+        similarity threshold, or None if text is new.
+        """
+        band_hashes = self._minhash.band_hashes(text)
+        with self._lock:
+            return self._find_duplicate(text, band_hashes)
+
+    def add_if_new(self, question, category, topic=""):
+        """
+        Store question like add(), unless it is a near-duplicate of a stored question.
+        """
+        band_hashes = self._minhash.band_hashes(question.question)
+        with self._lock:
+            if self._find_duplicate(question.question, band_hashes) is not None:
+                return False
+            return self._insert(question, category, topic, band_hashes)
+
+    def page(self, after_id=0, limit=PAGE_SIZE, category=None, topic=None):
+        """
+        Return up to limit questions with an id greater than after_id, optionally
+        restricted to a category and topic.
+        """
+        conditions, parameters = ["id > ?"], [after_id]
+        if category is not None:
+            conditions.append("category = ?")
+            parameters.append(category)
+        if topic is not None:
+            conditions.append("topic = ?")
+            parameters.append(_normalize_topic(topic))
+        parameters.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, question, options, correct_answer, explanation FROM questions "
+                f"WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ?",
+                parameters,
+            ).fetchall()
+        return [
+            Question(question, json.loads(options), correct_answer, explanation, bank_id=question_id)
+            for question_id, question, options, correct_answer, explanation in rows
+        ]
+
+    def count(self, category=None, topic=None):
+        conditions, parameters = ["1 = 1"], []
+        if category is not None:
+            conditions.append("category = ?")
+            parameters.append(category)
+        if topic is not None:
+            conditions.append("topic = ?")
+            parameters.append(_normalize_topic(topic))
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM questions WHERE {' AND '.join(conditions)}", parameters
+            ).fetchone()[0]
+
+
+def _normalize_topic(topic):
+    return " ".join(str(topic).lower().split())
@@ -0,0 +1,132 @@
+import hashlib
+import re
+import struct
+import threading
+
+# Near-duplicate detection for quiz questions using MinHash signatures over
+# character shingles, bucketed with locality-sensitive hashing (LSH) so a lookup
+# only compares against a handful of candidates instead of the whole bank.
+DEFAULT_THRESHOLD = 0.6
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+SHINGLE_SIZE = 4
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_question(text):
+    """
+    Lowercase, drop punctuation and collapse whitespace.
+    """
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9 ]", " ", str(text).lower())).strip()
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """
+    Return the set of character shingles of the normalized text.
+    """
+    text = normalize_question(text)
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _hash(shingle):
+    return struct.unpack("<I", hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest())[0]
+
+
+def _band_hash(band_key):
+    # Signed, so it fits an SQLite INTEGER
+    return struct.unpack("<q", hashlib.blake2b(struct.pack(f"<{len(band_key)}Q", *band_key), digest_size=8).digest())[0]
+
+
+class QuestionIndex:
+    """
+    MinHash LSH index over question text. Candidates sharing an LSH band are verified
+    with the exact Jaccard similarity of their shingle sets. Safe to share between threads.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Fixed seeds keep signatures stable across processes
+        self._permutations = [
+            (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "little") % (_MERSENNE_PRIME - 1) + 1,
+             int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "little") % _MERSENNE_PRIME)
+            for i in range(num_perm)
+        ]
+        self._buckets = [{} for _ in range(bands)]
+        self._lock = threading.RLock()
+        self._texts = []
+        self._shingles = []
+
+    def __len__(self):
+        return len(self._texts)
+
+    def _signature(self, shingle_set):
+        hashes = [_hash(shingle) for shingle in shingle_set]
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._permutations
+        ]
+
+    def _band_keys(self, signature):
+        return [tuple(signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def band_hashes(self, text):
+        """
+        One 64-bit integer per LSH band of text, for storing the bands outside the index (e.g. in SQLite).
+        Questions sharing any band hash are duplicate candidates.
+        """
+        return [_band_hash(key) for key in self._band_keys(self._signature(shingles(text)))]
+
+    def find_duplicate(self, text):
+        """
+        Return (existing_text, similarity) for the closest indexed question at or above
+        the threshold, or None if text is new.
+        """
+        shingle_set = shingles(text)
+        band_keys = self._band_keys(self._signature(shingle_set))
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(band_keys):
+                candidates.update(self._buckets[band].get(key, ()))
+
+            best = None
+            for candidate in candidates:
+                similarity = jaccard(shingle_set, self._shingles[candidate])
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (self._texts[candidate], similarity)
+        return best
+
+    def add(self, text):
+        shingle_set = shingles(text)
+        band_keys = self._band_keys(self._signature(shingle_set))
+        with self._lock:
+            position = len(self._texts)
+            self._texts.append(text)
+            self._shingles.append(shingle_set)
+            for band, key in enumerate(band_keys):
+                self._buckets[band].setdefault(key, []).append(position)
+        return position
+
+    def add_if_new(self, text):
+        """
+        Index text and return True, unless it is a near-duplicate of an indexed question.
+        """
+        with self._lock:
+            if self.find_duplicate(text) is not None:
+                return False
+            self.add(text)
+        return True
@@ -0,0 +1,78 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Keeps a small buffer of ready-to-serve quiz questions per (category, topic),
+# filled by background workers while the user is answering the current question.
+DEFAULT_BUFFER_SIZE = 3
+DEFAULT_MAX_WORKERS = 2
+
+
+class QuestionPrefetcher:
+    """
+    Background question buffer. `generate(category, topic, n)` must return a list of
+    Question objects and must not touch Streamlit, since it runs in worker threads.
+    """
+
+    def __init__(self, generate, buffer_size=DEFAULT_BUFFER_SIZE, max_workers=DEFAULT_MAX_WORKERS, executor=None):
+        self.generate = generate
+        self.buffer_size = buffer_size
+        self.hits = 0
+        self.misses = 0
+        self.last_error = None
+        self._executor = executor if executor is not None else ThreadPoolExecutor(max_workers=max_workers)
+        self._buffers = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def ensure(self, category, topic, generate=None):
+        """
+        Schedule background generation so the buffer for (category, topic) fills up to buffer_size.
+        `generate` overrides the default generator for this request (e.g. to pass a fresh history).
+        """
+        key = (category, topic)
+        with self._lock:
+            buffered = len(self._buffers.get(key, ()))
+            missing = self.buffer_size - buffered - self._in_flight.get(key, 0)
+            if missing <= 0:
+                return None
+            self._in_flight[key] = self._in_flight.get(key, 0) + missing
+        return self._executor.submit(self._fill, key, missing, generate or self.generate)
+
+    def _fill(self, key, n, generate):
+        try:
+            questions = generate(key[0], key[1], n)
+            with self._lock:
+                self._buffers.setdefault(key, deque()).extend(questions)
+        except Exception as e:
+            self.last_error = e
+        finally:
+            with self._lock:
+                self._in_flight[key] -= n
+
+    def get(self, category, topic):
+        """
+        Pop a ready question for (category, topic), or return None if the buffer is empty.
+        """
+        with self._lock:
+            buffer = self._buffers.get((category, topic))
+            if buffer:
+                self.hits += 1
+                return buffer.popleft()
+            self.misses += 1
+            return None
+
+    def buffered(self, category, topic):
+        with self._lock:
+            return len(self._buffers.get((category, topic), ()))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "buffered": sum(len(buffer) for buffer in self._buffers.values()),
+                "in_flight": sum(self._in_flight.values()),
+            }
@@ -1,17 +1,67 @@
 import streamlit as st
-from openai import OpenAI
-import json
+from llm_gateway import get_gateway
 import time
-
-# Replace "your_api_key_here" with your actual OpenAI API key
-client = OpenAI(api_key="your_api_key_here")
-
-class Question:
-    def __init__(self, question, options, correct_answer, explanation=None):
-        self.question = question
-        self.options = options
-        self.correct_answer = correct_answer
-        self.explanation = explanation
+from concurrent.futures import ThreadPoolExecutor
+from quiz_questions import generate_questions
+from question_bank import QuestionBank
+from question_prefetch import QuestionPrefetcher
+from instrumentation import span, timed
+
+# Rate-limited, retrying client shared by all apps and sessions; set OPENAI_API_KEY in the environment
+# (or replace "your_api_key_here" in llm_gateway.py with your actual OpenAI API key)
+client = get_gateway()
+
+# Number of recent questions included in the generation prompt; duplicates are caught by the index instead
+HISTORY_SAMPLE_SIZE = 10
+
+# Number of questions kept ready per category/topic, and background workers shared by all sessions
+PREFETCH_BUFFER_SIZE = 3
+PREFETCH_MAX_WORKERS = 2
+
+CATEGORIES = ["General Knowledge", "Science", "History", "Technology"]
+
+# The question bank is shared by every session; each session only loads the pages it serves.
+# It also rejects near-duplicates of any stored question, not just the loaded ones
+@st.cache_resource
+def get_question_bank():
+    return QuestionBank()
+
+@st.cache_resource
+def get_prefetch_executor():
+    return ThreadPoolExecutor(max_workers=PREFETCH_MAX_WORKERS)
+
+def get_prefetcher():
+    if 'prefetcher' not in st.session_state:
+        st.session_state.prefetcher = QuestionPrefetcher(
+            generate=None, buffer_size=PREFETCH_BUFFER_SIZE, executor=get_prefetch_executor()
+        )
+    return st.session_state.prefetcher
+
+def recent_history():
+    history = ""
+    for q in st.session_state.questions[-HISTORY_SAMPLE_SIZE:]:
+        history += f"Question: {q.question} Answer: {q.correct_answer}\n"
+    return history
+
+def add_new_question(question, category, topic):
+    """
+    Store a generated question in the bank and the session unless it duplicates an existing one.
+    """
+    if not get_question_bank().add_if_new(question, category, topic):
+        return False
+    append_questions([question])
+    return True
+
+def append_questions(questions):
+    """
+    Add questions to the session, keeping track of which bank questions are already loaded.
+    """
+    for question in questions:
+        if question.bank_id is not None:
+            if question.bank_id in st.session_state.loaded_question_ids:
+                continue
+            st.session_state.loaded_question_ids.add(question.bank_id)
+        st.session_state.questions.append(question)
 
 class Quiz:
     def __init__(self):
@@ -21,17 +71,61 @@ class Quiz:
     def load_or_generate_questions(self):
         # Check if questions already exist in the session state
         if 'questions' not in st.session_state:
-            # Predefined questions or load from a source
-            st.session_state.questions = [
-                Question("What is the capital of France?", ["London", "Paris", "Berlin", "Madrid"], "Paris",
-                         "Paris is the capital and most populous city of France."),
-                Question("Who developed the theory of relativity?",
-                         ["Isaac Newton", "Albert Einstein", "Nikola Tesla", "Marie Curie"], "Albert Einstein",
-                         "Albert Einstein is known for developing the theory of relativity, one of the two pillars of modern physics.")
-            ]
-            # Optionally, add a step here to generate new questions via GPT-3 and append them
+            # Questions are loaded lazily from the shared question bank, one page at a time
+            st.session_state.questions = []
+            st.session_state.loaded_question_ids = set()
+            self.load_next_page()
         return st.session_state.questions
 
+    def load_next_page(self):
+        """
+        Load the next page of questions for the selected category (and topic, if one is given)
+        from the question bank into the session. Returns the number loaded.
+        """
+        category = st.session_state.get('category', CATEGORIES[0])
+        topic = st.session_state.get('topic', "").strip() or None
+        cursors = st.session_state.setdefault('bank_cursors', {})
+        page = get_question_bank().page(after_id=cursors.get((category, topic), 0), category=category, topic=topic)
+        if not page:
+            return 0
+        cursors[(category, topic)] = page[-1].bank_id
+        loaded_before = len(st.session_state.questions)
+        append_questions(page)
+        return len(st.session_state.questions) - loaded_before
+
+    def prefetch_questions(self):
+        """
+        Start generating questions for the selected category/topic in the background
+        once the user gets close to the end of the loaded questions.
+        """
+        prefetch_key = st.session_state.get('prefetch_key')
+        if prefetch_key is None:
+            return
+        remaining = len(st.session_state.questions) - st.session_state.current_question_index - 1
+        if remaining > PREFETCH_BUFFER_SIZE:
+            return
+
+        history = recent_history()
+        def generate(category, topic, n):
+            with span("prefetch_questions"):
+                questions, _ = generate_questions(client, topic, category, n=n, history=history)
+            return questions
+        get_prefetcher().ensure(*prefetch_key, generate=generate)
+
+    def take_prefetched_question(self):
+        """
+        Move one ready question from the prefetch buffer into the session. Returns True on success.
+        """
+        prefetch_key = st.session_state.get('prefetch_key')
+        if prefetch_key is None:
+            return False
+        while True:
+            question = get_prefetcher().get(*prefetch_key)
+            if question is None:
+                return False
+            if add_new_question(question, *prefetch_key):
+                return True
+
     def initialize_session_state(self):
         if 'current_question_index' not in st.session_state:
             st.session_state.current_question_index = 0
@@ -47,6 +141,8 @@ class Quiz:
             st.session_state.time_limit = 30  # Set a 30-second time limit for each question
 
     def display_quiz(self):
+        if st.session_state.answers_submitted >= len(st.session_state.questions):
+            self.load_next_page() or self.take_prefetched_question()
         self.update_progress_bar()
         if st.session_state.answers_submitted >= len(st.session_state.questions):
             self.display_results()
@@ -64,6 +160,8 @@ class Quiz:
             st.error("No more questions available.")
             return
 
+        self.prefetch_questions()
+
         question = st.session_state.questions[st.session_state.current_question_index]
 
         if st.session_state.start_time is None:
@@ -99,6 +197,14 @@ class Quiz:
         # Move to the next question
         st.session_state.current_question_index += 1
 
+        # Load the next page from the question bank before wrapping around
+        if st.session_state.current_question_index >= len(st.session_state.questions):
+            self.load_next_page()
+
+        # Otherwise serve a question generated in the background, without waiting for the LLM
+        if st.session_state.current_question_index >= len(st.session_state.questions):
+            self.take_prefetched_question()
+
         # Handle wrapping around to the start
         if st.session_state.current_question_index >= len(st.session_state.questions):
             st.session_state.current_question_index = 0
@@ -162,42 +268,54 @@ class Quiz:
         self.reset_timer()  # Reset the timer
         st.rerun()
 
-# Function to convert the GPT response into a Question object and append it to the questions list
-# Function to generate a new question via GPT-3 and append it to the session state questions
+# Function to serve questions for a topic from the question bank, generating via GPT only what is missing
+@timed()
 def generate_and_append_question(user_prompt, category, n=1):
-    history = ""
-    for q in st.session_state.questions:
-        history += f"Question: {q.question} Answer: {q.correct_answer}\n"
+    # Background prefetching for this category/topic only starts once the user asked for questions
+    st.session_state.setdefault('requested_topics', set()).add((category, user_prompt))
+
+    # Reuse questions other sessions already generated for this category and topic
+    bank = get_question_bank()
+    topic_cursors = st.session_state.setdefault('bank_topic_cursors', {})
+    reused = 0
+    while reused < n:
+        page = bank.page(after_id=topic_cursors.get((category, user_prompt), 0), limit=n, category=category, topic=user_prompt)
+        if not page:
+            break
+        topic_cursors[(category, user_prompt)] = page[-1].bank_id
+        for question in page:
+            if reused < n and question.bank_id not in st.session_state.loaded_question_ids:
+                append_questions([question])
+                reused += 1
+    n -= reused
+    if n <= 0:
+        return
+
+    # Serve questions already prefetched in the background for this category and topic
+    prefetched = 0
+    while prefetched < n:
+        question = get_prefetcher().get(category, user_prompt)
+        if question is None:
+            break
+        if add_new_question(question, category, user_prompt):
+            prefetched += 1
+    n -= prefetched
+    if n <= 0:
+        return
 
-    gpt_prompt = '''Generate a JSON response for a trivia question including the question, option, correct answer, and explanation. The format should be as follows:
-{
-    "Question": "The actual question text goes here?",
-    "Options": ["Option1", "Option2", "Option3", "Option4"],
-    "CorrectAnswer": "TheCorrectAnswer",
-    "Explanation": "A detailed explanation on why the correct answer is correct."
-}'''
     try:
-        for _ in range(n):
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": gpt_prompt},
-                    {"role": "user", "content": f"Create a question about {user_prompt} in the category {category}. Previous questions: {history}"}
-                ]
-            )
-
-            try:
-                gpt_response = json.loads(response.choices[0].message.content)
-                new_question = Question(
-                    question=gpt_response["Question"],
-                    options=gpt_response["Options"],
-                    correct_answer=gpt_response["CorrectAnswer"],
-                    explanation=gpt_response["Explanation"]
-                )
-                st.session_state.questions.append(new_question)
-            except json.JSONDecodeError:
-                st.error("Failed to decode the GPT response. The API response might not be in the expected format.")
-                st.write(f"Raw GTP response: {response.choices[0].message.content}")
+        # All n questions are requested in one structured response rather than n sequential calls
+        new_questions, failed_responses = generate_questions(client, user_prompt, category, n=n, history=recent_history())
+        duplicates = 0
+        for new_question in new_questions:
+            if not add_new_question(new_question, category, user_prompt):
+                duplicates += 1
+        if duplicates:
+            st.info(f"Skipped {duplicates} generated question(s) that duplicated existing ones.")
+
+        for raw_response in failed_responses:
+            st.error("Failed to decode the GPT response. The API response might not be in the expected format.")
+            st.write(f"Raw GTP response: {raw_response}")
 
     except Exception as e:
         st.error(f"An error occurred while generating the questions: {str(e)}")
@@ -212,9 +330,18 @@ st.title("Interactive Quiz App")
 st.write("Test your knowledge with this interactive quiz!")
 
 # Category Selection
-category = st.selectbox("Select a category", ["General Knowledge", "Science", "History", "Technology"])
+category = st.selectbox("Select a category", CATEGORIES, key='category')
 
-user_input = st.text_input("Enter a topic to generate a new question")
+user_input = st.text_input("Enter a topic to generate a new question", key='topic')
+
+# Keep a few questions for this category/topic ready in the background while the user answers,
+# once questions were generated for it (never for a blank topic, so an idle page makes no LLM request)
+prefetch_enabled = st.checkbox("Prepare new questions in the background", value=True)
+prefetch_key = (category, user_input)
+if prefetch_enabled and user_input.strip() and prefetch_key in st.session_state.get('requested_topics', set()):
+    st.session_state.prefetch_key = prefetch_key
+else:
+    st.session_state.prefetch_key = None
 
 col1, col2 = st.columns(2)
 if col1.button('Generate New Question'):
@@ -224,3 +351,6 @@ if col2.button('Generate 3 New Questions'):
     generate_and_append_question(user_input, category, n=3)
 
 st.session_state.quiz.display_quiz()
+
+with st.expander("Prefetch statistics"):
+    st.write(get_prefetcher().stats())
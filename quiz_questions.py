@@ -0,0 +1,141 @@
+import json
+
+from fanout import fan_out
+from llm_cache import cached_completion
+from response_parsing import JSON_MODE, QUESTION_SCHEMA, parse_stats, repair_json, request_structured
+
+# Question model and LLM-backed question generation for quiz_generator.py,
+# kept free of Streamlit calls so it can also run in worker threads.
+QUESTION_FORMAT = '''{
+    "Question": "The actual question text goes here?",
+    "Options": ["Option1", "Option2", "Option3", "Option4"],
+    "CorrectAnswer": "TheCorrectAnswer",
+    "Explanation": "A detailed explanation on why the correct answer is correct."
+}'''
+
+SINGLE_QUESTION_PROMPT = f'''Generate a JSON response for a trivia question including the question, option, correct answer, and explanation. The format should be as follows:
+{QUESTION_FORMAT}'''
+
+BATCH_QUESTION_PROMPT = f'''Generate a JSON response containing several different trivia questions, each including the question, options, correct answer, and explanation. The response must be a JSON object of the form {{"questions": [...]}} where every item has the following format:
+{QUESTION_FORMAT}'''
+
+MAX_CONCURRENT_REQUESTS = 4
+
+
+class Question:
+    # Slots keep per-question memory small when many questions are loaded into a session
+    __slots__ = ("question", "options", "correct_answer", "explanation", "bank_id")
+
+    def __init__(self, question, options, correct_answer, explanation=None, bank_id=None):
+        self.question = question
+        self.options = options
+        self.correct_answer = correct_answer
+        self.explanation = explanation
+        self.bank_id = bank_id
+
+
+# Predefined questions used to seed an empty question bank, as (category, question) pairs
+DEFAULT_QUESTIONS = [
+    ("General Knowledge",
+     Question("What is the capital of France?", ["London", "Paris", "Berlin", "Madrid"], "Paris",
+              "Paris is the capital and most populous city of France.")),
+    ("Science",
+     Question("Who developed the theory of relativity?",
+              ["Isaac Newton", "Albert Einstein", "Nikola Tesla", "Marie Curie"], "Albert Einstein",
+              "Albert Einstein is known for developing the theory of relativity, one of the two pillars of modern physics.")),
+]
+
+
+def question_from_dict(data):
+    """
+    Build a Question from one decoded item of a GPT response, or return None if it is invalid.
+    """
+    if not isinstance(data, dict):
+        return None
+    question, options, correct_answer = data.get("Question"), data.get("Options"), data.get("CorrectAnswer")
+    if not isinstance(question, str) or not question.strip():
+        return None
+    if not isinstance(options, list) or len(options) < 2 or not all(isinstance(option, str) for option in options):
+        return None
+    if correct_answer not in options:
+        return None
+    return Question(question=question, options=options, correct_answer=correct_answer, explanation=data.get("Explanation"))
+
+
+def parse_questions(content):
+    """
+    Decode a GPT response holding one question, a list of questions or {"questions": [...]},
+    repairing common JSON formatting problems. Returns the valid Question objects; invalid
+    items are dropped. Raises json.JSONDecodeError if the response contains no JSON at all.
+    """
+    data, _ = repair_json(content)
+    if isinstance(data, dict) and isinstance(data.get("questions"), list):
+        data = data["questions"]
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        return []
+    return [question for question in map(question_from_dict, data) if question is not None]
+
+
+def is_valid_questions_response(content):
+    try:
+        return len(parse_questions(content)) > 0
+    except json.JSONDecodeError:
+        return False
+
+
+def generate_questions(client, topic, category, n=1, history="", max_workers=MAX_CONCURRENT_REQUESTS):
+    """
+    Generate up to n questions about topic. All n are requested in a single structured
+    JSON response; if it yields fewer valid questions, the shortfall is requested
+    concurrently, one question per call. Responses are never cached: a question rejected as a
+    duplicate would otherwise be served again for the same prompt.
+    Returns (questions, failed_responses) where failed_responses holds raw responses that could not be used.
+    """
+    questions, failed_responses = [], []
+
+    if n > 1:
+        content = cached_completion(
+            client,
+            messages=[
+                {"role": "system", "content": BATCH_QUESTION_PROMPT},
+                {"role": "user", "content": f"Create {n} different questions about {topic} in the category {category}. Previous questions: {history}"}
+            ],
+            validate=is_valid_questions_response,
+            cache=False,
+            response_format=JSON_MODE
+        )
+        try:
+            questions = parse_questions(content)[:n]
+            parse_stats.record("parsed" if questions else "failed")
+        except json.JSONDecodeError:
+            # Not reported to the user: the fallback below requests the questions individually
+            parse_stats.record("failed")
+            questions = []
+
+    def request_single(index):
+        # Missing fields (e.g. the explanation) are re-asked for instead of regenerating the question
+        return request_structured(
+            client,
+            messages=[
+                {"role": "system", "content": SINGLE_QUESTION_PROMPT},
+                # The index keeps concurrent requests distinct
+                {"role": "user", "content": f"Create a question about {topic} in the category {category}. This is question {index + 1} of {n}. Previous questions: {history}"}
+            ],
+            schema=QUESTION_SCHEMA,
+            cache=False
+        )
+
+    missing = range(len(questions), n)
+    for _, result, error in fan_out(request_single, missing, max_workers=max_workers):
+        if error is not None:
+            raise error
+        data, content, _ = result
+        question = question_from_dict(data)
+        if question is not None:
+            questions.append(question)
+        else:
+            failed_responses.append(content)
+
+    return questions, failed_responses
@@ -0,0 +1,307 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+from fake_llm import FakeClient
+from llm_cache import make_cache_key
+from market_data import CSVProvider
+
+# Record/replay fixtures for the two external services the apps depend on, so
+# benchmarks run offline with realistic latency. Recording wraps the real
+# OpenAI client or yfinance provider and stores every response (and how long
+# it took); replaying serves the stored responses after the same delays.
+# Requests that were never recorded get a deterministic synthetic answer.
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_fixtures")
+LLM_FIXTURE_FILE = "openai_responses.json"
+MARKET_FIXTURE_DIR = "market_data"
+
+
+class LatencyModel:
+    """
+    Log-normal latency around median seconds, seeded for reproducible runs and multiplied by scale.
+    """
+
+    def __init__(self, median, sigma=0.35, scale=1.0, seed=0):
+        self.median = median
+        self.sigma = sigma
+        self.scale = scale
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, recorded=None):
+        """
+        Return a delay: the recorded one when available, otherwise one drawn from the model.
+        """
+        if self.scale <= 0:
+            return 0.0
+        if recorded is not None:
+            return recorded * self.scale
+        with self._lock:
+            return self.random.lognormvariate(0, self.sigma) * self.median * self.scale
+
+
+# Typical delays of the real services: time to the (first) response and per streamed chunk
+OPENAI_LATENCY = 0.6
+OPENAI_CHUNK_LATENCY = 0.02
+YFINANCE_DOWNLOAD_LATENCY = 0.35
+YFINANCE_INFO_LATENCY = 0.25
+
+
+def _request_key(model, messages, params):
+    # Streaming and non-streaming requests for the same prompt share a fixture
+    return make_cache_key(model, messages, **{name: value for name, value in params.items() if name != "stream"})
+
+
+def _load_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(temporary_path, path)
+
+
+class RecordingClient:
+    """
+    Wraps a real chat client and records each response with its latency. Call save() when done.
+    """
+
+    def __init__(self, client, path=os.path.join(DEFAULT_FIXTURE_DIR, LLM_FIXTURE_FILE)):
+        self.client = client
+        self.path = path
+        self.fixtures = _load_json(path)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **params):
+        key = _request_key(model, messages, params)
+        start = time.perf_counter()
+        response = self.client.chat.completions.create(model=model, messages=messages, **params)
+        if params.get("stream"):
+            return self._record_stream(key, response, start)
+        self._store(key, response.choices[0].message.content, time.perf_counter() - start, None, 1)
+        return response
+
+    def _record_stream(self, key, stream, start):
+        parts = []
+        first_chunk = None
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - start
+                parts.append(chunk.choices[0].delta.content)
+            yield chunk
+        total = time.perf_counter() - start
+        first_chunk = first_chunk if first_chunk is not None else total
+        self._store(key, "".join(parts), first_chunk, (total - first_chunk) / max(1, len(parts)), len(parts))
+
+    def _store(self, key, content, latency, chunk_latency, chunks):
+        with self._lock:
+            self.fixtures[key] = {"content": content, "latency": latency, "chunk_latency": chunk_latency, "chunks": chunks}
+
+    def save(self):
+        with self._lock:
+            _save_json(self.path, self.fixtures)
+
+
+class ReplayClient(FakeClient):
+    """
+    Offline chat client serving recorded responses with their recorded latency.
+    Unrecorded requests are answered by `fallback` (synthetic_response by default) with modelled latency.
+    """
+
+    def __init__(self, path=os.path.join(DEFAULT_FIXTURE_DIR, LLM_FIXTURE_FILE), fallback=None,
+                 latency_scale=1.0, seed=0, chunk_size=16):
+        super().__init__(responder=fallback or synthetic_response, chunk_size=chunk_size)
+        self.fixtures = _load_json(path)
+        self.response_latency = LatencyModel(OPENAI_LATENCY, scale=latency_scale, seed=seed)
+        self.chunk_latency = LatencyModel(OPENAI_CHUNK_LATENCY, sigma=0.2, scale=latency_scale, seed=seed + 1)
+        self.replayed = 0
+        self.synthesized = 0
+        self._calls_lock = threading.Lock()
+
+    def _complete(self, model, messages, stream=False, **params):
+        fixture = self.fixtures.get(_request_key(model, messages, params))
+        with self._calls_lock:
+            self.calls.append({"model": model, "messages": messages, "params": dict(params, stream=stream)})
+            if fixture is not None:
+                self.replayed += 1
+            else:
+                self.synthesized += 1
+
+        if fixture is not None:
+            content = fixture["content"]
+            time.sleep(self.response_latency.sample(fixture["latency"]))
+            chunk_delay = self.chunk_latency.sample(fixture.get("chunk_latency"))
+        else:
+            content = self._respond(model, messages)
+            time.sleep(self.response_latency.sample())
+            chunk_delay = self.chunk_latency.sample()
+
+        if stream:
+            return self._stream_with_delay(content, chunk_delay)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def _stream_with_delay(self, content, chunk_delay):
+        for position, chunk in enumerate(self._stream(content)):
+            if position and chunk_delay:
+                time.sleep(chunk_delay)
+            yield chunk
+
+
+class RecordingProvider:
+    """
+    Wraps a market-data provider (e.g. YFinanceProvider) and writes what it returns as
+    CSVProvider fixtures, plus the observed latency of each call in latency.json.
+    """
+
+    def __init__(self, provider, directory=os.path.join(DEFAULT_FIXTURE_DIR, MARKET_FIXTURE_DIR)):
+        self.provider = provider
+        self.directory = directory
+        self.latencies = _load_json(os.path.join(directory, "latency.json"))
+        self.download_calls = []
+        self.info_calls = []
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _record_latency(self, kind, seconds):
+        with self._lock:
+            self.latencies.setdefault(kind, []).append(seconds)
+            _save_json(os.path.join(self.directory, "latency.json"), self.latencies)
+
+    def download(self, tickers, start, end):
+        self.download_calls.append((tuple(tickers), start, end))
+        started = time.perf_counter()
+        frames = self.provider.download(tickers, start, end)
+        self._record_latency("download", time.perf_counter() - started)
+        for ticker, frame in frames.items():
+            if frame.empty:
+                continue
+            path = os.path.join(self.directory, f"{ticker}.csv")
+            if os.path.exists(path):
+                existing = pd.read_csv(path, index_col="Date", parse_dates=True)
+                frame = pd.concat([existing, frame])
+                frame = frame[~frame.index.duplicated(keep="last")]
+            frame = frame.sort_index()
+            frame.index.name = "Date"
+            frame.to_csv(path)
+        return frames
+
+    def info(self, ticker):
+        self.info_calls.append(ticker)
+        started = time.perf_counter()
+        info = self.provider.info(ticker)
+        self._record_latency("info", time.perf_counter() - started)
+        with open(os.path.join(self.directory, f"{ticker}.info.json"), "w") as f:
+            json.dump(info, f, default=str)
+        return info
+
+
+class ReplayProvider(CSVProvider):
+    """
+    CSVProvider that sleeps like the real service: the median recorded latency when a
+    latency.json exists, otherwise a modelled one.
+    """
+
+    def __init__(self, directory=os.path.join(DEFAULT_FIXTURE_DIR, MARKET_FIXTURE_DIR), latency_scale=1.0, seed=0):
+        super().__init__(directory)
+        recorded = _load_json(os.path.join(directory, "latency.json"))
+        self.download_latency = LatencyModel(_median(recorded.get("download"), YFINANCE_DOWNLOAD_LATENCY),
+                                             scale=latency_scale, seed=seed)
+        self.info_latency = LatencyModel(_median(recorded.get("info"), YFINANCE_INFO_LATENCY),
+                                         scale=latency_scale, seed=seed + 1)
+        self.info_calls = []
+
+    def download(self, tickers, start, end):
+        time.sleep(self.download_latency.sample())
+        return super().download(tickers, start, end)
+
+    def info(self, ticker):
+        self.info_calls.append(ticker)
+        time.sleep(self.info_latency.sample())
+        return super().info(ticker)
+
+
+def _median(values, default):
+    if not values:
+        return default
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def synthetic_market_fixtures(directory, tickers, start="2020-01-01", days=1500, seed=0):
+    """
+    Write synthetic OHLCV fixtures for tickers that have no recorded CSV yet.
+    """
+    from indicators import synthetic_prices
+
+    os.makedirs(directory, exist_ok=True)
+    missing = [ticker for ticker in tickers if not os.path.exists(os.path.join(directory, f"{ticker}.csv"))]
+    if not missing:
+        return []
+    frames = synthetic_prices(len(missing), days, seed=seed)
+    for ticker, frame in zip(missing, frames.values()):
+        frame.index = pd.bdate_range(start, periods=days, name="Date")
+        frame.to_csv(os.path.join(directory, f"{ticker}.csv"))
+        with open(os.path.join(directory, f"{ticker}.info.json"), "w") as f:
+            json.dump({"forwardPE": 25.0, "dividendYield": 0.005, "marketCap": 2_000_000_000_000}, f)
+    return missing
+
+
+_WORDS = ("atom river empire planet novel engine ocean treaty mountain language galaxy protein volcano "
+          "algorithm dynasty glacier senate satellite orchestra compass cathedral enzyme canyon telescope "
+          "railway pigment harbour theorem monsoon parliament circuit fossil desert opera molecule island").split()
+
+
+def _synthetic_question(seed):
+    rng = random.Random(seed)
+    words = rng.sample(_WORDS, 7)
+    options = [word.capitalize() for word in rng.sample(_WORDS, 4)]
+    return {
+        "Question": f"Which {words[0]} is linked to the {words[1]} {words[2]} of the {words[3]} {words[4]}?",
+        "Options": options,
+        "CorrectAnswer": options[rng.randrange(4)],
+        "Explanation": f"The {words[5]} and {words[6]} explain it.",
+    }
+
+
+def synthetic_response(model, messages):
+    """
+    Deterministic stand-in answer shaped like what each app expects for its prompt.
+    """
+    text = messages[-1]["content"]
+    prompt = " ".join(str(message["content"]) for message in messages)
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12], 16)
+    if "Format the response in JSON" in prompt:
+        rng = random.Random(seed)
+        return json.dumps({
+            "name": "Condition",
+            "statistics": {"total_cases": rng.randrange(10_000, 50_000_000), "recovery_rate": f"{rng.uniform(60, 99):.1f}%",
+                           "mortality_rate": f"{rng.uniform(0.1, 5):.1f}%"},
+            "recovery_options": {"Rest": "Get plenty of sleep and fluids.", "Therapy": "Follow the treatment plan."},
+            "medication": {"Paracetamol": {"side_effects": ["Nausea", "Rash"], "dosage": "500 mg every 6 hours"}},
+        })
+    batch = re.match(r"Create (\d+) different questions", text)
+    if batch:
+        return json.dumps({"questions": [_synthetic_question(seed + position) for position in range(int(batch.group(1)))]})
+    if '"Question"' in prompt:
+        return json.dumps(_synthetic_question(seed))
+    sentences = ["The data points to a steady trend with moderate volatility.",
+                 "Recent moves are in line with the broader market.",
+                 "Risk factors include lifestyle, age and family history.",
+                 "Consult a professional for advice specific to your situation."]
+    rng = random.Random(seed)
+    return " ".join(rng.choice(sentences) for _ in range(12))
@@ -0,0 +1,325 @@
+import json
+import re
+import threading
+
+from llm_cache import cached_completion
+
+# Tolerant parsing of structured (JSON) LLM responses: repairs common formatting
+# problems locally, validates the payload against a small schema and re-asks
+# the model only for the fields that are still missing, instead of discarding
+# the whole answer and paying for a full retry.
+
+# Schemas map a field to its expected kind: "string", "number", "percentage",
+# "mapping", "string_list" or a nested schema dictionary.
+DISEASE_SCHEMA = {
+    "name": "string",
+    "statistics": {
+        "total_cases": "number",
+        "recovery_rate": "percentage",
+        "mortality_rate": "percentage",
+    },
+    "recovery_options": "mapping",
+    "medication": "mapping",
+}
+
+QUESTION_SCHEMA = {
+    "Question": "string",
+    "Options": "string_list",
+    "CorrectAnswer": "string",
+    "Explanation": "string",
+}
+
+JSON_MODE = {"type": "json_object"}
+
+_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+_STRING_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"')
+_NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?(?:e[+-]?\d+)?")
+_MULTIPLIERS = {"thousand": 1e3, "million": 1e6, "billion": 1e9, "trillion": 1e12, "k": 1e3, "m": 1e6, "b": 1e9}
+# Scale words may follow after a space ("1.2 million"); letters only directly ("1.2m"), so units such as
+# "5 m" or "5 mg" are never read as multipliers
+_SCALE_WORD_PATTERN = re.compile(r"\s*(thousand|million|billion|trillion)s?\b")
+_SCALE_LETTER_PATTERN = re.compile(r"([kmb])\b")
+_RANGE_SEPARATOR_PATTERN = re.compile(r"\s*(?:-|–|—|to|and)\s*")
+
+
+class ParseStats:
+    """
+    Counts how structured responses were obtained, to measure how many round-trips repair saves.
+    """
+
+    def __init__(self):
+        self.counts = {"parsed": 0, "repaired": 0, "reasked": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def record(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def summary(self):
+        with self._lock:
+            total = sum(self.counts.values())
+            succeeded = total - self.counts["failed"]
+            return dict(
+                self.counts,
+                total=total,
+                success_rate=succeeded / total if total else None,
+                # Responses that would have needed a full retry without local repair
+                round_trips_saved=self.counts["repaired"],
+            )
+
+
+parse_stats = ParseStats()
+
+
+def repair_json(content):
+    """
+    Parse JSON from an LLM response, tolerating code fences, surrounding prose,
+    trailing commas, smart quotes and Python literals.
+    Returns (data, repaired) and raises json.JSONDecodeError if nothing parseable is found.
+    """
+    try:
+        return json.loads(content), False
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    text = str(content)
+    fenced = _FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1)
+
+    # Keep only the outermost JSON value when the model wrapped it in prose
+    starts = [position for position in (text.find("{"), text.find("[")) if position != -1]
+    if starts:
+        start = min(starts)
+        end = text.rfind("}" if text[start] == "{" else "]")
+        if end > start:
+            text = text[start:end + 1]
+
+    text = text.replace("“", '"').replace("”", '"').replace("‘", "'").replace("’", "'")
+    return json.loads(_outside_strings(text, _repair_syntax)), True
+
+
+def _repair_syntax(text):
+    text = _TRAILING_COMMA_PATTERN.sub(r"\1", text)
+    return re.sub(r"\bTrue\b", "true", re.sub(r"\bFalse\b", "false", re.sub(r"\bNone\b", "null", text)))
+
+
+def _outside_strings(text, repair):
+    # Apply repair to everything but the JSON string literals, so "None of the above" stays intact
+    parts, position = [], 0
+    for match in _STRING_PATTERN.finditer(text):
+        parts += [repair(text[position:match.start()]), match.group()]
+        position = match.end()
+    parts.append(repair(text[position:]))
+    return "".join(parts)
+
+
+def coerce_number(value):
+    """
+    Convert values such as 1200, "1,200", "~1.2 million", "1.2e6" or "45%" to a float, or return None.
+    A range ("between 10 and 20 million", "3-5") gives its midpoint.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    text = value.replace(",", "").lower()
+    numbers = _scaled_numbers(text)
+    if not numbers:
+        return None
+    number, scale, _, end = numbers[0]
+    if len(numbers) > 1:
+        second, second_scale, start, _ = numbers[1]
+        gap = text[end:start]
+        if not gap.strip() and second < 0:
+            # "10-20": the hyphen was read as the sign of the second number
+            gap, second = "-", -second
+        if gap and _RANGE_SEPARATOR_PATTERN.fullmatch(gap):
+            # A scale written once applies to both ends: "10 to 20 million"
+            return (number * (scale or second_scale or 1) + second * (second_scale or scale or 1)) / 2
+    return number * (scale or 1)
+
+
+def _scaled_numbers(text):
+    # (number, multiplier or None, start, end including the multiplier) for every number in text
+    numbers = []
+    for match in _NUMBER_PATTERN.finditer(text):
+        scale, end = None, match.end()
+        suffix = _SCALE_WORD_PATTERN.match(text, end) or _SCALE_LETTER_PATTERN.match(text, end)
+        if suffix:
+            scale, end = _MULTIPLIERS[suffix.group(1)], suffix.end()
+        numbers.append((float(match.group()), scale, match.start(), end))
+    return numbers
+
+
+def coerce_percentage(value):
+    """
+    Convert "45%", "45" or 45 to a percentage between 0 and 100, or return None.
+    """
+    number = coerce_number(value)
+    if number is None:
+        return None
+    return number if 0 <= number <= 100 else None
+
+
+def _as_mapping(value):
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, list) and value:
+        # Lists of {"name": ..., ...} items become {name: item}
+        mapping = {}
+        for position, item in enumerate(value, start=1):
+            if isinstance(item, dict):
+                name = item.get("name") or item.get("option") or f"Option {position}"
+                mapping[str(name)] = {key: detail for key, detail in item.items() if key != "name"}
+            else:
+                mapping[f"Option {position}"] = item
+        return mapping
+    return None
+
+
+def validate(data, schema, prefix=""):
+    """
+    Check data against schema, coercing numbers and percentages in place.
+    Returns the dotted paths of fields that are missing or could not be coerced.
+    """
+    missing = []
+    for field, kind in schema.items():
+        path = f"{prefix}{field}"
+        value = data.get(field)
+        if isinstance(kind, dict):
+            if not isinstance(value, dict):
+                value = data[field] = {}
+            missing += validate(value, kind, prefix=f"{path}.")
+        elif kind == "string":
+            if not isinstance(value, str) or not value.strip():
+                missing.append(path)
+        elif kind == "string_list":
+            if not isinstance(value, list) or len(value) < 2 or not all(isinstance(item, str) for item in value):
+                missing.append(path)
+        elif kind == "mapping":
+            mapping = _as_mapping(value)
+            if mapping is None:
+                missing.append(path)
+            else:
+                data[field] = mapping
+        elif kind in ("number", "percentage"):
+            number = coerce_number(value) if kind == "number" else coerce_percentage(value)
+            if number is None:
+                missing.append(path)
+            else:
+                data[field] = number
+    return missing
+
+
+def normalize_disease_info(data):
+    """
+    Move statistics the model placed at the top level into 'statistics' before validation.
+    """
+    statistics = data.get("statistics")
+    if not isinstance(statistics, dict):
+        statistics = data["statistics"] = {}
+    for field in DISEASE_SCHEMA["statistics"]:
+        if field not in statistics and field in data:
+            statistics[field] = data.pop(field)
+    return data
+
+
+def _get_path(data, path):
+    for part in path.split("."):
+        if not isinstance(data, dict) or part not in data:
+            return None
+        data = data[part]
+    return data
+
+
+def _set_path(data, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        data = data.setdefault(part, {})
+    data[parts[-1]] = value
+
+
+def parse_structured(content, schema, normalize=None):
+    """
+    Repair, normalize and validate one response. Returns (data, missing_fields, repaired);
+    data is None if the response contains no JSON object at all.
+    """
+    try:
+        data, repaired = repair_json(content)
+    except json.JSONDecodeError:
+        return None, list(schema), False
+    if not isinstance(data, dict):
+        return None, list(schema), repaired
+    if normalize is not None:
+        data = normalize(data)
+    return data, validate(data, schema), repaired
+
+
+def request_structured(client, messages, schema, normalize=None, max_reasks=1, json_mode=True, stats=None, **params):
+    """
+    Request a JSON object matching schema. Malformed JSON is repaired locally; fields that
+    are still missing are requested again in a targeted follow-up (up to max_reasks times).
+    Returns (data, content, missing_fields); data is None if no usable JSON was received.
+    """
+    if stats is None:
+        stats = parse_stats
+    if json_mode:
+        params["response_format"] = JSON_MODE
+
+    def parses(content):
+        return parse_structured(content, schema, normalize)[0] is not None
+
+    content = cached_completion(client, messages, validate=parses, **params)
+    data, missing, repaired = parse_structured(content, schema, normalize)
+    if data is None:
+        stats.record("failed")
+        return None, content, missing
+
+    reasked = False
+    for _ in range(max_reasks):
+        if not missing:
+            break
+        reasked = True
+        follow_up = messages + [
+            {"role": "assistant", "content": content},
+            {"role": "user", "content": "Your JSON response is missing or has invalid values for these fields: "
+                                        f"{', '.join(missing)}. Reply with a JSON object containing only these fields, "
+                                        "using the same nesting."},
+        ]
+        patch_content = cached_completion(client, follow_up, validate=parses_any_json, **params)
+        try:
+            patch, _ = repair_json(patch_content)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(patch, dict):
+            continue
+        for path in missing:
+            value = _get_path(patch, path)
+            if value is None:
+                # Models sometimes answer with the leaf field name only
+                value = patch.get(path.split(".")[-1])
+            if value is not None:
+                _set_path(data, path, value)
+        missing = validate(data, schema)
+
+    if missing:
+        stats.record("failed")
+    elif reasked:
+        stats.record("reasked")
+    elif repaired:
+        stats.record("repaired")
+    else:
+        stats.record("parsed")
+    return data, content, missing
+
+
+def parses_any_json(content):
+    try:
+        repair_json(content)
+        return True
+    except json.JSONDecodeError:
+        return False
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Cold-start benchmark for the three Streamlit apps: import time, time to the
+# first rendered page and resident memory of a fresh process. Each app is first
+# run once with replayed services to fill the on-disk caches, then started again
+# in a new interpreter under `python -X importtime`, so the numbers are those of
+# a restarted server whose caches are warm but whose modules are not loaded.
+#
+#   python startup_benchmark.py
+#   python startup_benchmark.py --runs 5 --output startup.json --baseline before.json
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APPS = ["disease_analysis.py", "financial_analysis.py", "quiz_generator.py"]
+HEAVY_PACKAGES = ["pandas", "numpy", "pyarrow", "openai", "httpx", "yfinance"]
+DEFAULT_RUNS = 3
+DEFAULT_TOLERANCE = 0.25  # Relative increase that counts as a regression
+TOP_MODULES = 8
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output into {top-level package: seconds spent importing it}.
+    """
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # Header line
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1e6
+    return packages
+
+
+def _offline_client():
+    from fake_llm import FakeClient
+
+    return FakeClient("Offline answer.")
+
+
+def _run_app(app, workdir, warm):
+    # Runs inside the child process
+    sys.path.insert(0, APP_DIR)
+    os.chdir(APP_DIR)
+    from app_benchmark import configure_environment
+
+    configure_environment(workdir)
+    os.environ["METRICS_PATH"] = ""
+    os.environ["DISEASE_SNAPSHOT_REFRESH_INTERVAL"] = "0"
+    if warm:
+        from app_benchmark import install_services
+
+        install_services(workdir, os.path.join(APP_DIR, "benchmark_fixtures"), latency_scale=0)
+    else:
+        # Anything the warm-up did not cache is answered offline (and counted) instead of hitting the network
+        import llm_gateway
+
+        llm_gateway.create_client = lambda *args, **kwargs: _offline_client()
+
+    import resource
+    from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+    from streamlit.testing.v1 import AppTest
+
+    # The browser starts painting when the first element arrives, not when the script finishes
+    first_element = []
+    enqueue = ForwardMsgQueue.enqueue
+
+    def recording_enqueue(self, msg):
+        if not first_element and msg.WhichOneof("type") == "delta":
+            first_element.append(time.time())
+        return enqueue(self, msg)
+
+    ForwardMsgQueue.enqueue = recording_enqueue
+
+    start = time.perf_counter()
+    at = AppTest.from_file(os.path.join(APP_DIR, app), default_timeout=120).run()
+    first_render = time.perf_counter() - start
+
+    import llm_gateway
+
+    gateway = llm_gateway._gateway
+    print(json.dumps({
+        "first_render_s": first_render,
+        "first_element_at": first_element[0] if first_element else None,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "heavy_packages_loaded": [package for package in HEAVY_PACKAGES if package in sys.modules],
+        "llm_calls": gateway.stats["requests"] if gateway is not None else 0,
+        "errors": [exception.message for exception in at.exception],
+    }))
+
+
+def measure_app(app, workdir):
+    """
+    Start app in a fresh interpreter and return its import and first-render timings.
+    """
+    started, started_at = time.perf_counter(), time.time()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child", app, "--workdir", workdir],
+        capture_output=True, text=True, cwd=APP_DIR,
+    )
+    wall = time.perf_counter() - started
+    if process.returncode != 0:
+        raise RuntimeError(f"{app} failed to start:\n{process.stderr[-2000:]}")
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    packages = parse_importtime(process.stderr)
+    result["wall_s"] = wall
+    result["first_element_s"] = result["first_element_at"] - started_at if result["first_element_at"] else wall
+    result["import_s"] = sum(packages.values())
+    result["packages"] = packages
+    return result
+
+
+def benchmark(apps=APPS, runs=DEFAULT_RUNS):
+    report = {}
+    for app in apps:
+        with tempfile.TemporaryDirectory(prefix="startup-benchmark-") as workdir:
+            warm = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", app, "--workdir", workdir, "--warm"],
+                                  capture_output=True, text=True, cwd=APP_DIR)
+            if warm.returncode != 0:
+                raise RuntimeError(f"Warm-up of {app} failed:\n{warm.stderr[-2000:]}")
+            results = [measure_app(app, workdir) for _ in range(runs)]
+
+        best = min(results, key=lambda result: result["wall_s"])
+        packages = sorted(best["packages"].items(), key=lambda item: item[1], reverse=True)
+        report[app] = {
+            "runs": runs,
+            "wall_ms": min(result["wall_s"] for result in results) * 1000,
+            "first_element_ms": min(result["first_element_s"] for result in results) * 1000,
+            "import_ms": min(result["import_s"] for result in results) * 1000,
+            "first_render_ms": min(result["first_render_s"] for result in results) * 1000,
+            "max_rss_mb": min(result["max_rss_mb"] for result in results),
+            "heavy_packages_loaded": best["heavy_packages_loaded"],
+            "uncached_llm_calls": best["llm_calls"],
+            "errors": best["errors"],
+            "top_imports_ms": {package: seconds * 1000 for package, seconds in packages[:TOP_MODULES]},
+        }
+    return report
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Return regressions of report against baseline (wall time, first element, first render and memory).
+    """
+    regressions = []
+    for app, result in report.items():
+        previous = baseline.get(app)
+        if previous is None:
+            continue
+        for metric in ("wall_ms", "first_element_ms", "first_render_ms", "max_rss_mb"):
+            if previous.get(metric) and result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{app} {metric}: {previous[metric]:.1f} -> {result[metric]:.1f}")
+    return regressions
+
+
+def print_report(report, baseline=None):
+    columns = ["wall_ms", "first_element_ms", "import_ms", "first_render_ms", "max_rss_mb"]
+    print(f"{'app':<24}" + "".join(f"{column:>18}" for column in columns))
+    for app, result in report.items():
+        print(f"{app:<24}" + "".join(f"{result[column]:>18.1f}" for column in columns))
+        if baseline and app in baseline:
+            print(f"{'  baseline':<24}" + "".join(f"{baseline[app].get(column, 0):>18.1f}" for column in columns))
+    for app, result in report.items():
+        print(f"\n{app}: loads {', '.join(result['heavy_packages_loaded']) or 'no heavy packages'}; "
+              f"{result['uncached_llm_calls']} uncached LLM calls")
+        print("  slowest imports: " + ", ".join(f"{package} {ms:.0f} ms" for package, ms in result["top_imports_ms"].items()))
+        for error in result["errors"]:
+            print(f"  error: {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure import time, first render and memory of each app's cold start.")
+    parser.add_argument("apps", nargs="*", default=APPS)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Fresh processes per app (the fastest is reported)")
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--baseline", help="Compare against an earlier --output report")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--warm", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_app(args.child, args.workdir, args.warm)
+        sys.exit(0)
+
+    report = benchmark(args.apps, args.runs)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if baseline:
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
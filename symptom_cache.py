@@ -0,0 +1,225 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from disease_names import similarity
+
+# Diagnosis cache keyed by a canonical, order-independent set of symptom terms,
+# so "fever, cough" and "Cough and fever" share one answer. An earlier symptom set
+# that contains every queried symptom and is similar enough (Jaccard similarity
+# above a threshold) is reused without calling the LLM at all; a query with a
+# symptom the earlier set lacks always gets its own diagnosis.
+DEFAULT_SYMPTOM_CACHE_PATH = os.environ.get(
+    "SYMPTOM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "symptom_diagnoses.sqlite3"),
+)
+DEFAULT_TTL = 30 * 24 * 60 * 60  # 30 days
+DEFAULT_SIMILARITY_THRESHOLD = 0.8  # e.g. four of the five cached symptoms
+FUZZY_TERM_THRESHOLD = 0.8
+MIN_FUZZY_LENGTH = 5
+
+# Canonical symptom -> other ways of writing it
+SYMPTOM_SYNONYMS = {
+    "fever": ["high temperature", "temperature", "pyrexia", "feverish", "high fever", "fevers"],
+    "cough": ["coughing", "coughs", "dry cough"],
+    "headache": ["headaches", "head ache", "head pain"],
+    "sore throat": ["throat pain", "scratchy throat", "painful throat"],
+    "runny nose": ["rhinorrhea", "running nose"],
+    "stuffy nose": ["blocked nose", "nasal congestion", "congestion", "stuffed nose"],
+    "sneezing": ["sneezes", "sneeze"],
+    "fatigue": ["tiredness", "tired", "exhaustion", "exhausted", "lethargy", "weakness"],
+    "shortness of breath": ["breathlessness", "dyspnea", "dyspnoea", "difficulty breathing", "trouble breathing"],
+    "chest pain": ["chest pains", "chest tightness"],
+    "nausea": ["feeling sick", "nauseous", "queasy"],
+    "vomiting": ["throwing up", "being sick", "vomit"],
+    "diarrhea": ["diarrhoea", "loose stools"],
+    "abdominal pain": ["stomach ache", "stomachache", "stomach pain", "belly pain", "tummy ache", "abdominal cramps"],
+    "muscle ache": ["muscle aches", "muscle pain", "body aches", "body ache", "myalgia", "aching muscles"],
+    "joint pain": ["joint pains", "aching joints", "arthralgia"],
+    "chills": ["shivering", "shivers", "chill"],
+    "dizziness": ["dizzy", "lightheaded", "light headed", "vertigo"],
+    "rash": ["skin rash", "rashes", "spots"],
+    "loss of smell": ["anosmia", "can't smell", "cannot smell"],
+    "loss of taste": ["ageusia", "can't taste", "cannot taste"],
+    "itching": ["itchy", "itchiness", "pruritus"],
+    "swelling": ["swollen", "oedema", "edema"],
+    "weight loss": ["losing weight"],
+    "night sweats": ["sweating at night"],
+    "back pain": ["backache", "back ache"],
+    "insomnia": ["can't sleep", "trouble sleeping", "sleeplessness"],
+}
+
+_SPLIT_PATTERN = re.compile(r"[,;\n/&+]+|\b(?:and|with|plus|also)\b")
+_FILLER_PATTERN = re.compile(r"^(?:i have|i've got|i've had|i've|i am having|i'm having|i am|i'm|having|have|got|"
+                             r"feeling|feel|some|a|an|the|my|of)\s+")
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s']+")
+
+
+def _build_vocabulary():
+    vocabulary = {}
+    for canonical, synonyms in SYMPTOM_SYNONYMS.items():
+        vocabulary[canonical] = canonical
+        for synonym in synonyms:
+            vocabulary[synonym] = canonical
+    return vocabulary
+
+
+SYMPTOM_VOCABULARY = _build_vocabulary()
+
+
+def normalize_term(term):
+    """
+    Map one symptom phrase to its canonical form: fillers and punctuation are removed,
+    synonyms and simple plurals are mapped, and close misspellings of known symptoms are corrected.
+    """
+    term = " ".join(_PUNCTUATION_PATTERN.sub(" ", term.casefold().replace("’", "'")).split())
+    previous = None
+    while term != previous:
+        previous = term
+        term = _FILLER_PATTERN.sub("", term)
+    if not term:
+        return ""
+    if term in SYMPTOM_VOCABULARY:
+        return SYMPTOM_VOCABULARY[term]
+    if term.endswith("s") and not term.endswith("ss") and term[:-1] in SYMPTOM_VOCABULARY:
+        return SYMPTOM_VOCABULARY[term[:-1]]
+    if len(term) >= MIN_FUZZY_LENGTH:
+        best = max(SYMPTOM_VOCABULARY, key=lambda known: similarity(term, known))
+        if similarity(term, best) >= FUZZY_TERM_THRESHOLD:
+            return SYMPTOM_VOCABULARY[best]
+    return term
+
+
+def parse_symptoms(text):
+    """
+    Parse free-text symptoms into a sorted tuple of distinct canonical terms.
+    """
+    terms = {normalize_term(part) for part in _SPLIT_PATTERN.split(str(text))}
+    terms.discard("")
+    return tuple(sorted(terms))
+
+
+def symptom_key(terms):
+    return "|".join(sorted(set(terms)))
+
+
+def jaccard(a, b):
+    a, b = set(a), set(b)
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SymptomMatch:
+    """
+    A cached diagnosis, the symptom terms it was produced for and their similarity to the query.
+    """
+    __slots__ = ("diagnosis", "terms", "similarity")
+
+    def __init__(self, diagnosis, terms, similarity):
+        self.diagnosis = diagnosis
+        self.terms = terms
+        self.similarity = similarity
+
+
+class SymptomCache:
+    """
+    SQLite-backed diagnosis cache keyed by symptom set, with an in-memory inverted index
+    (term -> symptom sets) for similarity lookups.
+    """
+
+    def __init__(self, path=DEFAULT_SYMPTOM_CACHE_PATH, ttl=DEFAULT_TTL, threshold=DEFAULT_SIMILARITY_THRESHOLD):
+        self.path = path
+        self.ttl = ttl
+        self.threshold = threshold
+        self.counts = {"exact": 0, "similar": 0, "misses": 0}
+        self._terms = {}  # Key -> terms
+        self._index = {}  # Term -> keys
+        self._last_rowid = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS diagnoses ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL UNIQUE, terms TEXT NOT NULL, "
+                "diagnosis TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+            self._sync()
+
+    def _sync(self):
+        # Index rows added since the last sync, including those written by other processes
+        cutoff = time.time() - self.ttl if self.ttl is not None else 0
+        rows = self._conn.execute(
+            "SELECT id, key, terms FROM diagnoses WHERE id > ? AND created_at >= ? ORDER BY id",
+            (self._last_rowid, cutoff),
+        ).fetchall()
+        for rowid, key, terms in rows:
+            terms = tuple(json.loads(terms))
+            self._terms[key] = terms
+            for term in terms:
+                self._index.setdefault(term, set()).add(key)
+            self._last_rowid = rowid
+
+    def _fetch(self, key):
+        row = self._conn.execute("SELECT diagnosis, created_at FROM diagnoses WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl is not None and time.time() - row[1] > self.ttl):
+            return None
+        return row[0]
+
+    def lookup(self, terms):
+        """
+        Return a SymptomMatch for the same symptom set or the most similar earlier superset
+        of it at or above the threshold, or None.
+        """
+        key = symptom_key(terms)
+        with self._lock:
+            diagnosis = self._fetch(key)
+            if diagnosis is not None:
+                self.counts["exact"] += 1
+                return SymptomMatch(diagnosis, tuple(terms), 1.0)
+
+            self._sync()
+            # Only sets containing every queried term qualify
+            candidates = set.intersection(*(self._index.get(term, set()) for term in terms)) if terms else set()
+            best, best_score = None, 0.0
+            for candidate in candidates:
+                score = jaccard(terms, self._terms[candidate])
+                if score > best_score:
+                    best, best_score = candidate, score
+            if best is not None and best_score >= self.threshold:
+                diagnosis = self._fetch(best)
+                if diagnosis is not None:
+                    self.counts["similar"] += 1
+                    return SymptomMatch(diagnosis, self._terms[best], best_score)
+            self.counts["misses"] += 1
+            return None
+
+    def store(self, terms, diagnosis):
+        if not terms or not diagnosis:
+            return
+        key = symptom_key(terms)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO diagnoses (key, terms, diagnosis, created_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(sorted(set(terms))), diagnosis, time.time()),
+            )
+            self._conn.commit()
+            self._sync()
+
+    def stats(self):
+        with self._lock:
+            lookups = sum(self.counts.values())
+            return dict(
+                self.counts,
+                lookups=lookups,
+                hit_ratio=(self.counts["exact"] + self.counts["similar"]) / lookups if lookups else 0.0,
+                symptom_sets=len(self._terms),
+            )
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the default caches and the metrics log out of the working tree; the
+# modules read these when first imported
+_CACHE_DIR = tempfile.mkdtemp(prefix="app-tests-")
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_CACHE_DIR, "llm_responses.sqlite3"))
+os.environ.setdefault("QUESTION_BANK_PATH", os.path.join(_CACHE_DIR, "question_bank.sqlite3"))
+os.environ.setdefault("MARKET_DATA_DIR", os.path.join(_CACHE_DIR, "market_data"))
+os.environ.setdefault("SYMPTOM_CACHE_PATH", os.path.join(_CACHE_DIR, "symptom_diagnoses.sqlite3"))
+os.environ.setdefault("DISEASE_SNAPSHOT_PATH", os.path.join(_CACHE_DIR, "disease_snapshot.json.gz"))
+os.environ.setdefault("METRICS_PATH", "")
@@ -0,0 +1,40 @@
+import pytest
+
+from disease_names import DiseaseNameIndex
+from disease_snapshot import DISEASE_CATALOG
+
+
+@pytest.fixture
+def index():
+    return DiseaseNameIndex(extra_names=DISEASE_CATALOG)
+
+
+@pytest.mark.parametrize("typo, canonical", [
+    ("hypertenson", "Hypertension"),
+    ("diabetis", "Diabetes"),
+    ("influenze", "Influenza"),
+    ("tuberclosis", "Tuberculosis"),
+    ("strok", "Stroke"),
+])
+def test_corrects_clear_typos(index, typo, canonical):
+    assert index.resolve(typo) == canonical
+
+
+@pytest.mark.parametrize("name", ["canker", "Canker", "strep", "hypotension", "Hypothyroidism", "lupsu"])
+def test_never_maps_near_homonyms_onto_another_disease(index, name):
+    canonical, method, _ = index.lookup(name)
+    assert canonical is None and method == "unmatched"
+    assert index.resolve(name) == name.capitalize()
+
+
+def test_offers_uncertain_short_matches_as_suggestions(index):
+    assert index.suggest("canker") == "Cancer"
+    assert index.suggest("astma") == "Asthma"
+    assert index.suggest("strep") is None
+    assert index.suggest("cancer") is None
+    assert index.suggest("hypertenson") is None
+
+
+def test_unknown_names_are_not_learned(index):
+    index.resolve("Hyperthyroidism")
+    assert index.lookup("Hypothyroidism")[0] is None
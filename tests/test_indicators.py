@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import _per_frame_indicators, compute_indicators, synthetic_prices, wide_frame
+
+COMPARED = ["SMA", "EMA", "RSI", "MACD", "MACD Signal", "Bollinger Upper", "Bollinger Lower", "Returns", "Volatility"]
+
+
+def _mixed_calendar():
+    stock = synthetic_prices(1, 130, seed=1)["T000"]
+    # A crypto-like ticker trading every calendar day over the same period
+    days = pd.date_range(stock.index[0], stock.index[-1], freq="D")
+    crypto = pd.DataFrame({"Close": 100 * np.exp(np.cumsum(np.random.default_rng(2).normal(0, 0.03, len(days))))},
+                          index=days)
+    # A second stock missing two trading days
+    gapped = synthetic_prices(1, 130, seed=3)["T000"].drop(stock.index[[60, 61]])
+    return {"STOCK": stock, "CRYPTO": crypto, "GAPPED": gapped}
+
+
+def _assert_matches_per_frame(stocks_data):
+    indicators = compute_indicators(wide_frame(stocks_data))
+    reference = _per_frame_indicators(stocks_data)
+    for ticker, frame in stocks_data.items():
+        for name in COMPARED:
+            result = indicators[name][ticker].reindex(frame.index)
+            expected = reference[ticker][name]
+            assert result.notna().sum() == expected.notna().sum(), (ticker, name)
+            np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-7, atol=1e-9, equal_nan=True,
+                                       err_msg=f"{ticker} {name}")
+
+
+def test_matches_per_frame_on_a_shared_calendar():
+    _assert_matches_per_frame(synthetic_prices(3, 200))
+
+
+def test_matches_per_frame_on_mixed_calendars():
+    stocks_data = _mixed_calendar()
+    _assert_matches_per_frame(stocks_data)
+
+    indicators = compute_indicators(wide_frame(stocks_data))
+    weekend = indicators["RSI"].index.dayofweek >= 5
+    assert indicators["RSI"].loc[weekend, "STOCK"].isna().all()
+    assert indicators["SMA"]["STOCK"].notna().sum() == len(stocks_data["STOCK"]) - 19
+    assert indicators["SMA"]["GAPPED"].notna().sum() == len(stocks_data["GAPPED"]) - 19
+
+
+def test_correlation_uses_overlapping_returns():
+    indicators = compute_indicators(wide_frame(_mixed_calendar()))
+    correlation = indicators["Correlation"]
+    assert list(correlation.columns) == ["STOCK", "CRYPTO", "GAPPED"]
+    assert correlation.loc["STOCK", "STOCK"] == pytest.approx(1.0)
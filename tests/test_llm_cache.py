@@ -0,0 +1,90 @@
+import pytest
+
+import llm_cache
+from fake_llm import FakeClient
+from llm_cache import LLMCache, cached_completion, make_cache_key
+
+MESSAGES = [{"role": "user", "content": "What is a stock?"}]
+
+
+class Clock:
+    """
+    Stand-in for time.time that only moves when advanced.
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+
+def test_cache_key_ignores_whitespace_but_not_parameters():
+    reformatted = [{"role": "user", "content": "  What is\n a   stock? "}]
+    assert make_cache_key("gpt", MESSAGES) == make_cache_key("gpt", reformatted)
+    assert make_cache_key("gpt", MESSAGES) != make_cache_key("gpt", MESSAGES, temperature=0.5)
+    assert make_cache_key("gpt", MESSAGES) != make_cache_key("other", MESSAGES)
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    cache.set("key", "value")
+    clock.now += 59
+    assert cache.get("key") == "value"
+    clock.now += 2
+    assert cache.get("key") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    for key in ("a", "b"):
+        clock.now += 1
+        cache.set(key, key)
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.set("c", "c")
+    assert [cache.get(key) for key in ("a", "b", "c")] == ["a", None, "c"]
+    assert len(cache) == 2
+
+
+def test_repeated_prompt_is_answered_from_the_cache(tmp_path):
+    client = FakeClient("A share of a company.")
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+    answers = [cached_completion(client, MESSAGES, cache=cache) for _ in range(3)]
+    assert answers == ["A share of a company."] * 3
+    assert len(client.calls) == 1
+    assert cache.stats() == {"hits": 2, "misses": 1, "hit_ratio": 2 / 3, "entries": 1}
+
+
+def test_cached_answers_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    client = FakeClient("A share of a company.")
+    cached_completion(client, MESSAGES, cache=LLMCache(path))
+    assert cached_completion(client, MESSAGES, cache=LLMCache(path)) == "A share of a company."
+    assert len(client.calls) == 1
+
+
+def test_invalid_responses_are_not_stored(tmp_path):
+    client = FakeClient("not json")
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+    for _ in range(2):
+        cached_completion(client, MESSAGES, cache=cache, validate=lambda content: content.startswith("{"))
+    assert len(client.calls) == 2
+    assert len(cache) == 0
+
+
+def test_cache_false_always_calls_the_client(tmp_path):
+    client = FakeClient("fresh")
+    for _ in range(2):
+        assert cached_completion(client, MESSAGES, cache=False) == "fresh"
+    assert len(client.calls) == 2
@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+from fake_llm import FakeClient
+from instrumentation import Metrics
+from llm_gateway import LLMGateway, TokenBucket, backoff_delay, create_client
+from mock_llm_server import start_mock_server
+
+
+def ask(gateway, prompt):
+    response = gateway.chat.completions.create(model="gpt-3.5-turbo", messages=[{"role": "user", "content": prompt}])
+    return response.choices[0].message.content
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def serve(**options):
+        server = start_mock_server(**options)
+        servers.append(server)
+        return server
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_rate_limited_requests_are_retried_until_they_succeed(serve):
+    server = serve(error_rate=0.5, seed=7, responder=lambda messages: messages[-1]["content"].upper())
+    delays = []
+    gateway = LLMGateway(create_client(api_key="test", base_url=server.base_url), sleep=delays.append, metrics=Metrics(path=None))
+
+    answers = [ask(gateway, f"question {number}") for number in range(10)]
+    assert answers == [f"QUESTION {number}" for number in range(10)]
+    assert server.rate_limited > 0
+    assert gateway.stats["retries"] == server.rate_limited == len(delays)
+    assert gateway.stats["requests"] == server.requests
+    assert gateway.stats["failures"] == 0
+
+
+def test_retry_after_header_sets_the_delay(serve):
+    server = serve(error_rate=1.0, retry_after=2)
+    delays = []
+    gateway = LLMGateway(create_client(api_key="test", base_url=server.base_url), max_retries=3,
+                         sleep=delays.append, metrics=Metrics(path=None))
+
+    with pytest.raises(Exception) as error:
+        ask(gateway, "question")
+    assert error.value.status_code == 429
+    assert delays == [2.0, 2.0, 2.0]
+    assert server.requests == 4
+    assert gateway.stats["failures"] == 1
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def test_client_errors_are_not_retried():
+    calls = []
+
+    def responder(model, messages):
+        calls.append(messages)
+        raise StatusError(400)
+
+    gateway = LLMGateway(FakeClient(responder), sleep=lambda delay: None, metrics=Metrics(path=None))
+    with pytest.raises(StatusError):
+        ask(gateway, "question")
+    assert len(calls) == 1
+    assert gateway.stats["retries"] == 0
+
+
+def test_identical_in_flight_requests_are_coalesced():
+    client = FakeClient("shared answer", latency=0.2)
+    gateway = LLMGateway(client, metrics=Metrics(path=None))
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(ask(gateway, "question"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert answers == ["shared answer"] * 5
+    assert len(client.calls) == 1
+    assert gateway.stats["coalesced"] == 4
+
+    # Finished requests are not reused
+    ask(gateway, "question")
+    assert len(client.calls) == 2
+
+
+def test_token_bucket_waits_for_a_refill():
+    bucket = TokenBucket(rate_per_minute=6000, capacity=1)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() > 0.0
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    for attempt in range(8):
+        assert 0 <= backoff_delay(attempt, base_delay=0.5, max_delay=4.0) <= min(4.0, 0.5 * 2 ** attempt)
+    assert backoff_delay(3, retry_after=10.0, max_delay=4.0) == 4.0
@@ -0,0 +1,61 @@
+import pytest
+
+import llm_streaming
+from fake_llm import FakeClient
+from instrumentation import Metrics
+from llm_cache import LLMCache
+from llm_streaming import completion, stream_completion
+
+MESSAGES = [{"role": "user", "content": "What causes a cold?"}]
+ANSWER = "Colds are caused by viruses such as rhinoviruses."
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = Metrics(path=None)
+    monkeypatch.setattr(llm_streaming, "metrics", metrics)
+    return metrics
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCache(str(tmp_path / "cache.sqlite3"))
+
+
+def test_answer_is_streamed_in_chunks_then_cached(cache, metrics):
+    client = FakeClient(ANSWER, chunk_size=8)
+    chunks = list(stream_completion(client, MESSAGES, cache=cache))
+    assert len(chunks) == -(-len(ANSWER) // 8)
+    assert "".join(chunks) == ANSWER
+    assert client.calls[0]["params"]["stream"] is True
+
+    assert list(stream_completion(client, MESSAGES, cache=cache)) == [ANSWER]
+    assert len(client.calls) == 1
+    assert metrics.summary()["cache"]["llm_response"]["hits"] == 1
+
+
+def test_abandoned_stream_is_not_cached(cache, metrics):
+    client = FakeClient(ANSWER, chunk_size=8)
+    stream = stream_completion(client, MESSAGES, cache=cache)
+    next(stream)
+    stream.close()
+    assert len(cache) == 0
+
+    list(stream_completion(client, MESSAGES, cache=cache))
+    assert len(client.calls) == 2
+    assert len(cache) == 1
+
+
+def test_time_to_first_token_is_recorded(cache, metrics):
+    client = FakeClient(ANSWER, latency=0.05, chunk_size=16, chunk_delay=0.02)
+    list(stream_completion(client, MESSAGES, cache=cache))
+    latency = metrics.summary()["latency"]
+    assert latency["llm_stream.ttft"]["count"] == 1
+    assert latency["llm_stream.ttft"]["max"] >= 0.05
+    assert latency["llm_stream.total"]["max"] >= latency["llm_stream.ttft"]["max"] + 0.02 * 3
+
+
+def test_completion_without_stream_returns_the_full_text(cache, metrics):
+    client = FakeClient(ANSWER)
+    assert completion(client, MESSAGES, cache=cache) == ANSWER
+    assert client.calls[0]["params"]["stream"] is False
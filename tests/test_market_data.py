@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pandas as pd
+
+from market_data import MarketDataStore
+
+
+class StubProvider:
+    """
+    Returns a business-day price frame per ticker; tickers in `empty` get no rows,
+    tickers in `failing` are left out of the result (a failed download).
+    """
+
+    def __init__(self, empty=(), failing=(), delay=0.0):
+        self.empty, self.failing, self.delay = set(empty), set(failing), delay
+        self.calls = []
+
+    def download(self, tickers, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        time.sleep(self.delay)
+        index = pd.bdate_range(start, end, inclusive="left")
+        frames = {}
+        for ticker in tickers:
+            if ticker in self.failing:
+                continue
+            rows = index if ticker not in self.empty else index[:0]
+            frames[ticker] = pd.DataFrame({"Close": range(len(rows))}, index=rows, dtype=float)
+        return frames
+
+    def info(self, ticker):
+        return {}
+
+
+def test_fetches_only_missing_ranges_in_one_batch(tmp_path):
+    provider = StubProvider()
+    store = MarketDataStore(provider=provider, directory=str(tmp_path))
+    store.get_prices(["AAA", "BBB"], "2024-01-01", "2024-02-01")
+    prices = store.get_prices(["AAA", "BBB"], "2024-01-15", "2024-03-01")
+    assert [call[0] for call in provider.calls] == [("AAA", "BBB"), ("AAA", "BBB")]
+    assert str(provider.calls[1][1]) == "2024-02-01"
+    assert prices["AAA"].index.min() == pd.Timestamp("2024-01-15")
+
+
+def test_an_empty_successful_download_covers_its_range(tmp_path):
+    provider = StubProvider(empty={"HALTED"})
+    store = MarketDataStore(provider=provider, directory=str(tmp_path))
+    assert store.get_prices(["HALTED"], "2024-01-01", "2024-02-01")["HALTED"].empty
+    store.get_prices(["HALTED"], "2024-01-01", "2024-02-01")
+    assert len(provider.calls) == 1
+
+
+def test_a_failed_download_is_retried(tmp_path):
+    provider = StubProvider(failing={"DOWN"})
+    store = MarketDataStore(provider=provider, directory=str(tmp_path))
+    store.get_prices(["DOWN"], "2024-01-01", "2024-02-01")
+    store.get_prices(["DOWN"], "2024-01-01", "2024-02-01")
+    assert len(provider.calls) == 2
+
+
+def test_stored_tickers_are_served_during_a_download(tmp_path):
+    provider = StubProvider()
+    store = MarketDataStore(provider=provider, directory=str(tmp_path))
+    store.get_prices(["AAA"], "2024-01-01", "2024-02-01")
+    provider.delay = 1.0
+    slow = threading.Thread(target=store.get_prices, args=(["SLOW"], "2024-01-01", "2024-02-01"))
+    slow.start()
+    time.sleep(0.1)
+    started = time.perf_counter()
+    assert len(store.get_prices(["AAA"], "2024-01-01", "2024-02-01")["AAA"]) == 23
+    assert time.perf_counter() - started < 0.5
+    slow.join()
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from indicators import synthetic_prices
+from prompt_compaction import compact_prices, count_tokens, summarize_prices
+
+
+def test_summary_fits_its_budget():
+    frame = synthetic_prices(1, 1260)["T000"]
+    assert count_tokens(summarize_prices(frame, "T000", 500)) <= 500
+
+
+def test_comparison_fits_its_budget_with_many_tickers():
+    text, report = compact_prices(synthetic_prices(50, 1260), 3000)
+    assert count_tokens(text) <= 3000
+    assert report["tokens_after"] <= 3000 < report["tokens_before"]
+
+
+def test_tickers_that_do_not_fit_are_named():
+    text, _ = compact_prices(synthetic_prices(50, 300), 800)
+    assert count_tokens(text) <= 800
+    assert "Omitted to fit the token budget:" in text and "T049" in text
+
+
+def test_too_small_a_budget_fails_loudly():
+    with pytest.raises(ValueError):
+        compact_prices(synthetic_prices(3, 100), 5)
+
+
+def test_tickers_without_closes_are_labelled():
+    stocks_data = synthetic_prices(2, 100)
+    stocks_data["T001"]["Close"] = np.nan
+    stocks_data["T000"].iloc[:10, stocks_data["T000"].columns.get_loc("Close")] = np.nan
+    text, _ = compact_prices(stocks_data, 3000)
+    assert "T001: no data available." in text
+    assert "(90 trading days)" in text
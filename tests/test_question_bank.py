@@ -0,0 +1,37 @@
+import sqlite3
+
+from question_bank import QuestionBank
+from quiz_questions import Question
+
+
+def _question(text):
+    return Question(text, ["A", "B", "C", "D"], "A", "")
+
+
+def test_rejects_near_duplicates_of_any_stored_question(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.sqlite3"))
+    assert bank.add_if_new(_question("Which planet is known as the red planet?"), "Science", "space")
+    # Not loaded by any session and stored under another category, but still a duplicate
+    assert not bank.add_if_new(_question("Which planet is known as the Red Planet??"), "General Knowledge")
+    assert bank.find_duplicate("which planet is known as the red planet") is not None
+    assert bank.add_if_new(_question("Which planet has the most moons?"), "Science", "space")
+
+
+def test_duplicate_check_survives_a_restart(tmp_path):
+    path = str(tmp_path / "bank.sqlite3")
+    QuestionBank(path).add(_question("Who painted the Mona Lisa in the sixteenth century?"), "History")
+    reopened = QuestionBank(path)
+    assert reopened.find_duplicate("Who painted the Mona Lisa in the 16th century?") is not None
+
+
+def test_indexes_banks_created_without_band_hashes(tmp_path):
+    path = str(tmp_path / "bank.sqlite3")
+    QuestionBank(path).add(_question("What is the boiling point of water at sea level?"), "Science")
+    conn = sqlite3.connect(path)
+    conn.execute("DELETE FROM question_bands")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    bank = QuestionBank(path)
+    assert bank.find_duplicate("What is the boiling point of water at sea level") is not None
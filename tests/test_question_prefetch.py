@@ -0,0 +1,76 @@
+import json
+import threading
+
+from fake_llm import FakeClient
+from question_prefetch import QuestionPrefetcher
+from quiz_questions import generate_questions
+
+
+def question(number):
+    return {
+        "Question": f"Question {number}?",
+        "Options": ["A", "B", "C", "D"],
+        "CorrectAnswer": "A",
+        "Explanation": "Because.",
+    }
+
+
+def responder(model, messages):
+    prompt = messages[-1]["content"]
+    if prompt.startswith("Create a question"):
+        return json.dumps(question(99))
+    n = int(prompt.split()[1])
+    return json.dumps({"questions": [question(number) for number in range(n)]})
+
+
+def test_buffer_fills_from_the_fake_client():
+    client = FakeClient(responder)
+    prefetcher = QuestionPrefetcher(
+        lambda category, topic, n: generate_questions(client, topic, category, n=n)[0], buffer_size=3
+    )
+    prefetcher.ensure("Science", "Physics").result()
+    assert prefetcher.buffered("Science", "Physics") == 3
+    assert len(client.calls) == 1
+
+    assert prefetcher.get("Science", "Physics").question == "Question 0?"
+    assert prefetcher.get("History", "Rome") is None
+    assert prefetcher.stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5, "buffered": 2, "in_flight": 0}
+
+    # Only the served question is replaced, with a single-question request
+    prefetcher.ensure("Science", "Physics").result()
+    assert prefetcher.buffered("Science", "Physics") == 3
+    assert len(client.calls) == 2
+    assert client.calls[1]["messages"][-1]["content"].startswith("Create a question")
+    assert prefetcher.last_error is None
+
+
+def test_in_flight_requests_are_not_scheduled_twice():
+    release = threading.Event()
+    calls = []
+
+    def generate(category, topic, n):
+        calls.append(n)
+        release.wait(5)
+        return [question(number) for number in range(n)]
+
+    prefetcher = QuestionPrefetcher(generate, buffer_size=2)
+    future = prefetcher.ensure("Science", "Physics")
+    assert prefetcher.ensure("Science", "Physics") is None
+    assert prefetcher.stats()["in_flight"] == 2
+    release.set()
+    future.result()
+    assert prefetcher.ensure("Science", "Physics") is None
+    assert calls == [2]
+
+
+def test_generation_errors_are_kept_and_do_not_block_retries():
+    def failing(category, topic, n):
+        raise RuntimeError("rate limited")
+
+    prefetcher = QuestionPrefetcher(failing, buffer_size=2)
+    prefetcher.ensure("Science", "Physics").result()
+    assert str(prefetcher.last_error) == "rate limited"
+    assert prefetcher.stats()["in_flight"] == 0
+
+    prefetcher.ensure("Science", "Physics", generate=lambda category, topic, n: [question(0)] * n).result()
+    assert prefetcher.buffered("Science", "Physics") == 2
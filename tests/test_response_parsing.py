@@ -0,0 +1,105 @@
+import pytest
+
+from fake_llm import FakeClient
+from llm_cache import LLMCache
+from response_parsing import QUESTION_SCHEMA, ParseStats, coerce_number, coerce_percentage, repair_json, request_structured
+
+MESSAGES = [{"role": "user", "content": "Create a question about Mars."}]
+QUESTION = '''```json
+{"Question": "Which planet is red?", "Options": ["Mars", "Venus",], "CorrectAnswer": "Mars",}
+```'''
+
+
+@pytest.mark.parametrize("value, expected", [
+    (1200, 1200.0),
+    ("1,200", 1200.0),
+    ("~1.2 million", 1.2e6),
+    ("1.2m", 1.2e6),
+    ("1.2e6", 1.2e6),
+    ("1.5E-3", 0.0015),
+    ("about 3k", 3000.0),
+    ("Between 10 and 20 million", 15e6),
+    ("10 million - 20 million", 15e6),
+    ("3-5", 4.0),
+    ("approximately 5 mg", 5.0),
+    ("5 m", 5.0),
+    ("2 b", 2.0),
+    ("unknown", None),
+    (True, None),
+])
+def test_coerce_number(value, expected):
+    assert coerce_number(value) == (pytest.approx(expected) if expected is not None else None)
+
+
+def test_coerce_percentage_takes_the_midpoint_of_a_range():
+    assert coerce_percentage("40-50%") == 45.0
+    assert coerce_percentage("120%") is None
+
+
+def test_repair_keeps_python_literals_inside_strings():
+    data, repaired = repair_json('{"answer": "None of the above", "note": "True, False]", "value": None, "ok": True,}')
+    assert repaired
+    assert data == {"answer": "None of the above", "note": "True, False]", "value": None, "ok": True}
+
+
+def test_repair_strips_fences_and_prose():
+    data, repaired = repair_json('Sure! ```json\n{"a": [1, 2,], "b": "say \\"None\\""}\n``` Hope this helps.')
+    assert repaired and data == {"a": [1, 2], "b": 'say "None"'}
+
+
+def scripted(*responses):
+    """
+    Fake client answering with the given responses in order.
+    """
+    remaining = list(responses)
+    return FakeClient(lambda model, messages: remaining.pop(0))
+
+
+def test_repaired_response_needs_no_second_call(tmp_path):
+    client, stats = scripted(QUESTION.replace('"Mars",}', '"Mars", "Explanation": "Iron oxide.",}')), ParseStats()
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+    data, _, missing = request_structured(client, MESSAGES, QUESTION_SCHEMA, stats=stats, cache=cache)
+    assert data["Options"] == ["Mars", "Venus"] and data["Explanation"] == "Iron oxide."
+    assert missing == []
+    assert len(client.calls) == 1
+    assert client.calls[0]["params"]["response_format"] == {"type": "json_object"}
+    assert stats.counts == {"parsed": 0, "repaired": 1, "reasked": 0, "failed": 0}
+
+    # The repairable response was cached and is not requested again
+    request_structured(client, MESSAGES, QUESTION_SCHEMA, stats=stats, cache=cache)
+    assert len(client.calls) == 1
+
+
+def test_missing_field_is_reasked_on_its_own():
+    client, stats = scripted(QUESTION, '{"Explanation": "Iron oxide covers its surface."}'), ParseStats()
+    data, _, missing = request_structured(client, MESSAGES, QUESTION_SCHEMA, stats=stats, cache=False)
+    assert data == {
+        "Question": "Which planet is red?",
+        "Options": ["Mars", "Venus"],
+        "CorrectAnswer": "Mars",
+        "Explanation": "Iron oxide covers its surface.",
+    }
+    assert missing == []
+    assert len(client.calls) == 2
+    follow_up = client.calls[1]["messages"][-1]["content"]
+    assert "Explanation" in follow_up and "CorrectAnswer" not in follow_up
+    assert stats.counts == {"parsed": 0, "repaired": 0, "reasked": 1, "failed": 0}
+
+
+def test_field_still_missing_after_reask_is_reported():
+    client, stats = scripted(QUESTION, '{"Hint": "Think of rust."}'), ParseStats()
+    data, _, missing = request_structured(client, MESSAGES, QUESTION_SCHEMA, stats=stats, cache=False)
+    assert data["Question"] == "Which planet is red?"
+    assert missing == ["Explanation"]
+    assert len(client.calls) == 2
+    assert stats.counts["failed"] == 1
+
+
+def test_response_without_json_is_not_reasked_or_cached(tmp_path):
+    client, stats = scripted("I cannot help with that."), ParseStats()
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+    data, content, _ = request_structured(client, MESSAGES, QUESTION_SCHEMA, stats=stats, cache=cache)
+    assert data is None and content == "I cannot help with that."
+    assert len(client.calls) == 1
+    assert len(cache) == 0
+    assert stats.counts["failed"] == 1